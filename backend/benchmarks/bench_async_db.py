@@ -0,0 +1,130 @@
+"""Read latency while answers are being written concurrently.
+
+``blocking`` reproduces the old service layer, where ``async def`` services ran
+sync ``Session`` queries and commits on the event loop. ``async`` runs the same
+reads and writes through the current services and ``AsyncSession``.
+
+    python -m benchmarks.bench_async_db --rate 100 --writers 4 --duration 5
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from benchmarks.common import (
+    async_engine,
+    async_session_maker,
+    open_loop_reads,
+    percentiles,
+    print_table,
+    seed,
+    sync_engine,
+    temp_db_path,
+)
+from domuwa.models.answer import Answer, AnswerCreate
+from domuwa.models.question import Question
+from domuwa.services.answers_services import AnswerServices
+from domuwa.services.questions_services import QuestionServices
+
+QUESTION_ID = 1
+
+
+def blocking_read(engine: Engine):
+    with Session(engine) as session:
+        question = session.get(Question, QUESTION_ID)
+        [answer.author for answer in question.answers]  # type: ignore
+
+
+async def blocking_writer(engine: Engine, ids: dict, stop: asyncio.Event) -> int:
+    writes = 0
+    while not stop.is_set():
+        with Session(engine) as session:
+            session.add(Answer(text=f"blocking answer {writes}", **ids))
+            session.commit()
+        writes += 1
+        await asyncio.sleep(0)
+    return writes
+
+
+async def async_read(session_maker: async_sessionmaker[AsyncSession]):
+    async with session_maker() as session:
+        await QuestionServices().get_by_id(QUESTION_ID, session)
+
+
+async def async_writer(
+    session_maker: async_sessionmaker[AsyncSession],
+    ids: dict,
+    stop: asyncio.Event,
+) -> int:
+    services = AnswerServices()
+    writes = 0
+    while not stop.is_set():
+        async with session_maker() as session:
+            answer = AnswerCreate(text=f"async answer {writes}", **ids)
+            await services.create(answer, session)
+        writes += 1
+    return writes
+
+
+async def run(mode: str, rate: float, writers: int, duration: float):
+    with temp_db_path() as db_path:
+        engine = sync_engine(db_path)
+        ids = seed(engine, questions=50, answers_per_question=5)
+        aengine = async_engine(db_path)
+        session_maker = async_session_maker(aengine)
+
+        stop = asyncio.Event()
+        samples: list[float] = []
+        if mode == "blocking":
+
+            async def read():
+                blocking_read(engine)
+
+            writer_coros = [blocking_writer(engine, ids, stop) for _ in range(writers)]
+        else:
+
+            async def read():
+                await async_read(session_maker)
+
+            writer_coros = [
+                async_writer(session_maker, ids, stop) for _ in range(writers)
+            ]
+        reader_task = asyncio.create_task(open_loop_reads(read, rate, stop, samples))
+        writer_tasks = [asyncio.create_task(coro) for coro in writer_coros]
+
+        await asyncio.sleep(duration)
+        stop.set()
+        writes = sum(await asyncio.gather(*writer_tasks))
+        await reader_task
+
+        await aengine.dispose()
+        engine.dispose()
+
+    return {"mode": mode, "writes": writes} | percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=100, help="reads per second")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument(
+        "--mode",
+        choices=["blocking", "async", "both"],
+        default="both",
+    )
+    args = parser.parse_args()
+
+    modes = ["blocking", "async"] if args.mode == "both" else [args.mode]
+    rows = [
+        asyncio.run(run(mode, args.rate, args.writers, args.duration)) for mode in modes
+    ]
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Throughput of the NDJSON deck import and export.
+
+Generates a deck file, imports it into an empty database and exports it back,
+through the same services the ``/api/decks`` endpoints use. With ``--memory``
+the peak of Python allocations is traced too, which slows both phases down,
+so throughput and memory are better read from separate runs.
+
+    python -m benchmarks.bench_decks --questions 100000 --answers 2
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.common import (
+    async_engine,
+    async_session_maker,
+    print_table,
+    sync_engine,
+    temp_db_path,
+)
+from domuwa.models.deck import DeckAnswer, DeckQuestion
+from domuwa.models.game_type import GameTypeChoices
+from domuwa.models.qna_category import QnACategoryChoices
+from domuwa.services import choices_cache
+from domuwa.services.decks_services import DeckServices, iter_lines
+
+CHUNK_SIZE = 64 * 1024
+AUTHORS = 20
+
+
+def write_deck(path: Path, questions: int, answers: int) -> int:
+    game_types = list(GameTypeChoices)
+    categories = list(QnACategoryChoices)
+    with path.open("wb") as deck:
+        for i in range(questions):
+            choices = {
+                "game_type": game_types[i % len(game_types)],
+                "game_category": categories[i % len(categories)],
+            }
+            question = DeckQuestion(
+                text=f"question text {i}",
+                author=f"Player {i % AUTHORS}",
+                answers=[
+                    DeckAnswer(
+                        text=f"answer text {i}.{j}",
+                        author=f"Player {(i + j) % AUTHORS}",
+                        **choices,
+                    )
+                    for j in range(answers)
+                ],
+                **choices,
+            )
+            deck.write(question.model_dump_json().encode() + b"\n")
+    return path.stat().st_size
+
+
+async def read_chunks(path: Path):
+    with path.open("rb") as deck:
+        while chunk := deck.read(CHUNK_SIZE):
+            yield chunk
+
+
+async def run(questions: int, answers: int, memory: bool) -> list[dict]:
+    rows = []
+    with temp_db_path() as db_path:
+        deck_path = db_path.with_name("deck.ndjson")
+        size = write_deck(deck_path, questions, answers)
+        sync_engine(db_path).dispose()
+        engine = async_engine(db_path)
+        session_maker = async_session_maker(engine)
+        services = DeckServices()
+        choices_cache.clear_all()
+
+        async def import_deck():
+            async with session_maker() as session:
+                lines = iter_lines(read_chunks(deck_path))
+                result = await services.import_lines(lines, session)
+            assert result.questions == questions, result
+            return size
+
+        async def export_deck():
+            exported = 0
+            async with session_maker() as session:
+                async for line in services.export(session):
+                    exported += len(line)
+            return exported
+
+        for phase, coro in (("import", import_deck), ("export", export_deck)):
+            if memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            size = await coro()
+            elapsed = time.perf_counter() - start
+            row = {
+                "phase": phase,
+                "questions": questions,
+                "MiB": size / 2**20,
+                "seconds": elapsed,
+                "questions/s": questions / elapsed,
+            }
+            if memory:
+                row["peak MiB"] = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+            rows.append(row)
+
+        await engine.dispose()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100_000)
+    parser.add_argument("--answers", type=int, default=2, help="per question")
+    parser.add_argument("--memory", action="store_true", help="trace peak memory")
+    args = parser.parse_args()
+
+    print_table(asyncio.run(run(args.questions, args.answers, args.memory)))
+
+
+if __name__ == "__main__":
+    main()
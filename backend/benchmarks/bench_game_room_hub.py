@@ -0,0 +1,232 @@
+"""Broadcast latency of the game room hub with many rooms playing at once.
+
+Every player is a WebSocket client driven straight through the ASGI app, with
+no network in between. In every round one player of each room asks for the
+next round, all rooms at the same moment, latency is the time until each
+player of the room receives it. Rounds are ``--pause`` seconds apart, like
+players taking their time to answer. With ``--slow``, that many players of every
+room take ``--slow-delay`` seconds to receive each message, the rest of the
+room should not notice.
+
+    python -m benchmarks.bench_game_room_hub --rooms 50 --players 12
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import Callable
+
+from fastapi import FastAPI
+from sqlmodel import Session
+from starlette.types import Message
+
+from benchmarks.common import (
+    api_client,
+    async_engine,
+    async_session_maker,
+    percentiles,
+    print_table,
+    seed,
+    sync_engine,
+    temp_db_path,
+)
+from domuwa.models.game_category import GameCategory, GameCategoryChoices
+from domuwa.services.game_room_hub import hub
+
+
+class Client:
+    def __init__(
+        self, app: FastAPI, game_room_id: int, player_id: int, delay: float
+    ) -> None:
+        self.delay = delay
+        self.slow = delay > 0
+        self._incoming: asyncio.Queue[Message] = asyncio.Queue()
+        self._messages: asyncio.Queue[tuple[float, Message]] = asyncio.Queue()
+        path = f"/api/game-rooms/{game_room_id}/ws"
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "http_version": "1.1",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": f"player_id={player_id}".encode(),
+            "headers": [(b"host", b"bench")],
+            "client": ("127.0.0.1", player_id),
+            "server": ("bench", 80),
+            "subprotocols": [],
+            "state": {},
+        }
+        self._incoming.put_nowait({"type": "websocket.connect"})
+        self.task = asyncio.create_task(app(scope, self._incoming.get, self._send))
+
+    async def _send(self, message: Message) -> None:
+        if self.delay and message["type"] == "websocket.send":
+            await asyncio.sleep(self.delay)
+        self._messages.put_nowait((time.perf_counter(), message))
+
+    def send(self, data: dict) -> None:
+        self._incoming.put_nowait(
+            {"type": "websocket.receive", "text": json.dumps(data)}
+        )
+
+    async def receive(self, matches: Callable[[dict], bool]) -> float:
+        """Time at which the first message ``matches`` was received."""
+        while True:
+            received_at, message = await self._messages.get()
+            if message["type"] == "websocket.close":
+                raise RuntimeError(f"disconnected: {message}")
+            if message["type"] == "websocket.send" and matches(
+                json.loads(message["text"])
+            ):
+                return received_at
+
+    async def close(self) -> None:
+        self._incoming.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        await self.task
+
+
+async def play(
+    app: FastAPI,
+    game_room_ids: list[int],
+    player_ids: list[int],
+    rounds: int,
+    pause: float,
+    slow: int,
+    slow_delay: float,
+) -> dict[str, list[float]]:
+    players = len(player_ids) // len(game_room_ids)
+    tables = [
+        [
+            Client(app, game_room_id, player_id, slow_delay if i < slow else 0)
+            for i, player_id in enumerate(player_ids[n * players : (n + 1) * players])
+        ]
+        for n, game_room_id in enumerate(game_room_ids)
+    ]
+    clients = [client for table in tables for client in table]
+
+    def everyone_joined(data: dict) -> bool:
+        return len(data.get("player_ids", [])) == players
+
+    await asyncio.gather(*(client.receive(everyone_joined) for client in clients))
+
+    samples: dict[str, list[float]] = {"fast": [], "slow": []}
+    for game_round in range(1, rounds + 1):
+        await asyncio.sleep(pause)
+
+        def is_round(data: dict) -> bool:
+            return data["type"] == "round" and data["round"] == game_round  # noqa: B023
+
+        start = time.perf_counter()
+        for table in tables:
+            table[-1].send({"type": "next_round"})
+        received = await asyncio.gather(
+            *(client.receive(is_round) for client in clients)
+        )
+        for client, received_at in zip(clients, received):
+            samples["slow" if client.slow else "fast"].append(received_at - start)
+
+    await asyncio.gather(*(client.close() for client in clients))
+    return samples
+
+
+async def run(
+    rooms: int,
+    players: int,
+    rounds: int,
+    pause: float,
+    slow: int,
+    slow_delay: float,
+) -> list[dict]:
+    from main import app
+
+    rows = []
+    with temp_db_path() as db_path:
+        engine = sync_engine(db_path)
+        ids = seed(engine, questions=rounds * 4, players=rooms * players)
+        with Session(engine) as session:
+            game_category = GameCategory(name=GameCategoryChoices.SFW)
+            session.add(game_category)
+            session.commit()
+            game_category_id = game_category.id
+        engine.dispose()
+
+        aengine = async_engine(db_path)
+        session_maker = async_session_maker(aengine)
+        player_ids = list(range(ids["author_id"], ids["author_id"] + rooms * players))
+        async with api_client(session_maker) as client:
+            for slow_players in sorted({0, slow}):
+                game_room_ids = []
+                for _ in range(rooms):
+                    response = await client.post(
+                        "/api/game-rooms/",
+                        json={
+                            "game_type_id": ids["game_type_id"],
+                            "game_category_id": game_category_id,
+                            "rounds": rounds,
+                        },
+                    )
+                    response.raise_for_status()
+                    game_room_ids.append(response.json()["id"])
+
+                start = time.perf_counter()
+                samples = await play(
+                    app,
+                    game_room_ids,
+                    player_ids,
+                    rounds,
+                    pause,
+                    slow_players,
+                    slow_delay,
+                )
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{rooms} rooms x {players} players, {slow_players} slow: "
+                    f"{rounds} rounds in {elapsed:.2f} s"
+                )
+                for kind, kind_samples in samples.items():
+                    if kind_samples:
+                        row = {"slow_per_room": slow_players, "players": kind}
+                        rows.append(row | percentiles(kind_samples))
+        await hub.close_all()
+        await aengine.dispose()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--players", type=int, default=12, help="per room")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument(
+        "--pause",
+        type=float,
+        default=0.5,
+        help="seconds between rounds",
+    )
+    parser.add_argument("--slow", type=int, default=2, help="slow players per room")
+    parser.add_argument(
+        "--slow-delay",
+        type=float,
+        default=0.05,
+        help="seconds a slow player takes to receive a message",
+    )
+    args = parser.parse_args()
+
+    rows = asyncio.run(
+        run(
+            args.rooms,
+            args.players,
+            args.rounds,
+            args.pause,
+            args.slow,
+            args.slow_delay,
+        )
+    )
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
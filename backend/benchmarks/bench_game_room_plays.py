@@ -0,0 +1,203 @@
+"""Votes per second taken by the game room hub, against a commit per vote.
+
+Every player of every room votes in each round at the same moment, through
+the WebSocket of the room. The hub tallies the votes in memory, acknowledges
+each one right away and writes them together with the points of the round
+once everyone voted. Throughput is the number of votes over the time from
+sending them until every room got its points. The baseline writes the same
+votes one by one, each in its own transaction, ``--concurrency`` at a time,
+the way one HTTP request per vote would.
+
+    python -m benchmarks.bench_game_room_plays --rooms 20 --players 8
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from sqlalchemy import func, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from benchmarks.bench_game_room_hub import Client
+from benchmarks.common import (
+    api_client,
+    async_engine,
+    async_session_maker,
+    percentiles,
+    print_table,
+    seed,
+    sync_engine,
+    temp_db_path,
+)
+from domuwa.models.game_category import GameCategory, GameCategoryChoices
+from domuwa.models.play import Play
+from domuwa.services.game_room_hub import hub
+
+
+async def play(
+    app: FastAPI,
+    game_room_ids: list[int],
+    player_ids: list[int],
+    rounds: int,
+) -> tuple[float, list[float]]:
+    """Time spent voting and the latencies of the acknowledgements."""
+    players = len(player_ids) // len(game_room_ids)
+    tables = [
+        [
+            (game_room_id, player_id, Client(app, game_room_id, player_id, 0))
+            for player_id in player_ids[n * players : (n + 1) * players]
+        ]
+        for n, game_room_id in enumerate(game_room_ids)
+    ]
+    clients = [client for table in tables for *_, client in table]
+
+    def everyone_joined(data: dict) -> bool:
+        return len(data.get("player_ids", [])) == players
+
+    await asyncio.gather(*(client.receive(everyone_joined) for client in clients))
+
+    voting = 0.0
+    acks: list[float] = []
+    for game_round in range(1, rounds + 1):
+
+        def is_round(data: dict) -> bool:
+            return data["type"] == "round" and data["round"] == game_round  # noqa: B023
+
+        for table in tables:
+            table[-1][-1].send({"type": "next_round"})
+        await asyncio.gather(*(client.receive(is_round) for client in clients))
+
+        async def vote(game_room_id: int, player_id: int, client: Client) -> float:
+            # everyone picks the first answer, the choice costs the same
+            round_data = hub.rooms[game_room_id].round
+            answer_id = round_data["question"]["answers"][0]["id"]  # type: ignore
+            client.send({"type": "play", "choice": answer_id})
+            sent = time.perf_counter()
+
+            def is_ack(data: dict) -> bool:
+                return data["type"] == "played" and data["player_id"] == player_id
+
+            acked = await client.receive(is_ack)
+            await client.receive(lambda data: data["type"] == "scores")
+            return acked - sent
+
+        start = time.perf_counter()
+        acks += await asyncio.gather(
+            *(vote(*player) for table in tables for player in table)
+        )
+        voting += time.perf_counter() - start
+
+    await asyncio.gather(*(client.close() for client in clients))
+    return voting, acks
+
+
+async def commit_each(
+    session_maker: async_sessionmaker[AsyncSession],
+    rows: list[dict],
+    concurrency: int,
+) -> tuple[float, list[float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def vote(row: dict) -> float:
+        sent = time.perf_counter()
+        async with semaphore, session_maker() as session:
+            await session.exec(insert(Play).values(**row))  # type: ignore
+            await session.commit()
+        return time.perf_counter() - sent
+
+    start = time.perf_counter()
+    acks = await asyncio.gather(*(vote(row) for row in rows))
+    return time.perf_counter() - start, list(acks)
+
+
+async def run(rooms: int, players: int, rounds: int, concurrency: int) -> list[dict]:
+    from main import app
+
+    rows = []
+    with temp_db_path() as db_path:
+        engine = sync_engine(db_path)
+        ids = seed(
+            engine,
+            questions=rounds,
+            answers_per_question=4,
+            players=rooms * players,
+        )
+        with Session(engine) as session:
+            game_category = GameCategory(name=GameCategoryChoices.SFW)
+            session.add(game_category)
+            session.commit()
+            game_category_id = game_category.id
+        engine.dispose()
+
+        aengine = async_engine(db_path)
+        session_maker = async_session_maker(aengine)
+        player_ids = list(range(ids["author_id"], ids["author_id"] + rooms * players))
+        votes = rooms * players * rounds
+        async with api_client(session_maker) as client:
+            game_room_ids = []
+            for _ in range(rooms):
+                response = await client.post(
+                    "/api/game-rooms/",
+                    json={
+                        "game_type_id": ids["game_type_id"],
+                        "game_category_id": game_category_id,
+                        "rounds": rounds,
+                    },
+                )
+                response.raise_for_status()
+                game_room_ids.append(response.json()["id"])
+
+            elapsed, acks = await play(app, game_room_ids, player_ids, rounds)
+            await hub.flush()
+            rows.append(
+                {"mode": "hub", "votes_per_s": votes / elapsed} | percentiles(acks)
+            )
+
+        # the baseline writes the same votes again, a round further each time
+        baseline = [
+            {
+                "game_room_id": game_room_id,
+                "round": rounds + game_round,
+                "player_id": player_id,
+                "choice": 1,
+            }
+            for game_round in range(1, rounds + 1)
+            for n, game_room_id in enumerate(game_room_ids)
+            for player_id in player_ids[n * players : (n + 1) * players]
+        ]
+        elapsed, acks = await commit_each(session_maker, baseline, concurrency)
+        rows.append(
+            {"mode": "commit_each", "votes_per_s": votes / elapsed} | percentiles(acks)
+        )
+
+        async with session_maker() as session:
+            written = (await session.exec(select(func.count()).select_from(Play))).one()
+        assert written == 2 * votes, f"{written} plays written, expected {2 * votes}"
+        print(f"{rooms} rooms x {players} players, {rounds} rounds: {votes} votes")
+        await hub.close_all()
+        await aengine.dispose()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--players", type=int, default=8, help="per room")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="votes written at once by the baseline",
+    )
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args.rooms, args.players, args.rounds, args.concurrency))
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Requests per second of question lists, with and without fast list responses.
+
+``plain`` lets FastAPI validate the rows and encode them, ``fast`` serializes
+them with the router's ``TypeAdapter`` (``fast_lists``). For every list size
+the whole list is read page by page through ``/api/questions/`` for
+``--seconds``. ``serialize_ms`` is the best of three times one mode takes to
+turn the whole list, already loaded, into a JSON body.
+
+    python -m benchmarks.bench_list_json --rows 1000 10000 --answers 3
+"""
+
+import argparse
+import asyncio
+import math
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from starlette.responses import Response
+
+from benchmarks.common import (
+    api_client,
+    async_engine,
+    async_session_maker,
+    print_table,
+    seed,
+    sync_engine,
+    temp_db_path,
+)
+from domuwa.routers.common_router import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from domuwa.routers.questions_router import QuestionRouter
+from domuwa.services.common_services import GetAllFilters
+
+PATH = "/api/questions/"
+
+
+def get_list_route() -> APIRoute:
+    from main import app
+
+    return next(
+        route
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        and route.name == "get_all"
+        and isinstance(getattr(route.endpoint, "__self__", None), QuestionRouter)
+    )
+
+
+async def serialize(route: APIRoute, models: list, fast: bool) -> bytes:
+    router: QuestionRouter = route.endpoint.__self__  # type: ignore
+    if fast:
+        return bytes(router.fast_list_response(models, Response()).body)
+    content = await serialize_response(
+        field=route.response_field,
+        response_content=models,
+        is_coroutine=True,
+    )
+    return bytes(JSONResponse(content).body)
+
+
+async def run(row_counts: list[int], answers: int, seconds: float) -> list[dict]:
+    route = get_list_route()
+    router: QuestionRouter = route.endpoint.__self__  # type: ignore
+    fast_lists = router.fast_lists
+    rows = []
+    try:
+        for row_count in row_counts:
+            with temp_db_path() as db_path:
+                engine = sync_engine(db_path)
+                seed(engine, questions=row_count, answers_per_question=answers)
+                engine.dispose()
+                aengine = async_engine(db_path)
+                session_maker = async_session_maker(aengine)
+
+                async with session_maker() as session:
+                    models = await router.services.get_all(
+                        session, GetAllFilters(), None, row_count
+                    )
+
+                async with api_client(session_maker) as client:
+
+                    async def read_list() -> tuple[int, bytes]:
+                        pages, body, params = 0, b"", {"limit": MAX_PAGE_SIZE}
+                        while True:
+                            response = await client.get(PATH, params=params)
+                            response.raise_for_status()
+                            pages += 1
+                            body += response.content
+                            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+                            if cursor is None:
+                                return pages, body
+                            params["cursor"] = cursor
+
+                    bodies = {}
+                    for mode in ("plain", "fast"):
+                        router.fast_lists = mode == "fast"
+                        serialize_s = math.inf
+                        for _ in range(3):
+                            start = time.perf_counter()
+                            body = await serialize(route, models, router.fast_lists)
+                            serialize_s = min(serialize_s, time.perf_counter() - start)
+
+                        lists = requests = 0
+                        start = time.perf_counter()
+                        while time.perf_counter() - start < seconds:
+                            pages, bodies[mode] = await read_list()
+                            lists += 1
+                            requests += pages
+                        elapsed = time.perf_counter() - start
+                        rows.append(
+                            {
+                                "rows": row_count,
+                                "mode": mode,
+                                "serialize_ms": serialize_s * 1000,
+                                "body_kb": len(body) / 1024,
+                                "lists_per_s": lists / elapsed,
+                                "requests_per_s": requests / elapsed,
+                                "rows_per_s": lists * row_count / elapsed,
+                            }
+                        )
+                    assert bodies["plain"] == bodies["fast"], "bodies differ"
+                await aengine.dispose()
+    finally:
+        router.fast_lists = fast_lists
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--answers", type=int, default=3, help="per question")
+    parser.add_argument("--seconds", type=float, default=5, help="per mode")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args.rows, args.answers, args.seconds))
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
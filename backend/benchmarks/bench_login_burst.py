@@ -0,0 +1,121 @@
+"""How long other requests stall while a burst of logins checks passwords.
+
+A steady stream of cheap reads hits the API while ``--logins`` users log in at
+once. ``inline`` checks every password with bcrypt on the event loop, as
+logins used to, so the reads wait for each check in turn. ``pool`` goes
+through ``authenticate_user``, which checks them on the hashing threads.
+Read latencies are measured from when each read was due, so a stalled event
+loop shows up in them.
+
+    python -m benchmarks.bench_login_burst --logins 50 --rounds 12
+"""
+
+import argparse
+import asyncio
+import time
+
+from passlib.hash import bcrypt  # type: ignore
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from benchmarks.common import (
+    api_client,
+    async_engine,
+    async_session_maker,
+    open_loop_reads,
+    percentiles,
+    print_table,
+    seed,
+    sync_engine,
+    temp_db_path,
+)
+from domuwa.auth import authenticate_user, hasher, services, verify_password
+from domuwa.auth.models import UserDb
+
+PASSWORD = "correct horse battery staple"
+
+
+async def authenticate_inline(username: str, password: str, session: AsyncSession):
+    user = await services.get_user(username, session)
+    if user is None or not verify_password(password, user.hashed_password):
+        return False
+    return user
+
+
+async def login_burst(
+    session_maker: async_sessionmaker[AsyncSession],
+    logins: int,
+    offload: bool,
+) -> float:
+    authenticate = authenticate_user if offload else authenticate_inline
+
+    async def login(i: int) -> None:
+        async with session_maker() as session:
+            user = await authenticate(f"user{i}", PASSWORD, session)
+        assert user, f"user{i} could not log in"
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login(i) for i in range(logins)))
+    return time.perf_counter() - start
+
+
+async def run(logins: int, rate: float, workers: int, rounds: int) -> list[dict]:
+    rows = []
+    with temp_db_path() as db_path:
+        engine = sync_engine(db_path)
+        ids = seed(engine, questions=1)
+        # the cost of a check is set by the hash, every user gets the same one
+        hashed_password = bcrypt.using(rounds=rounds).hash(PASSWORD)
+        with Session(engine) as session:
+            session.add_all(
+                UserDb(login=f"user{i}", hashed_password=hashed_password)
+                for i in range(logins)
+            )
+            session.commit()
+        engine.dispose()
+
+        hasher.workers = workers
+        hasher.max_pending = workers + logins
+        aengine = async_engine(db_path)
+        session_maker = async_session_maker(aengine)
+        async with api_client(session_maker) as client:
+
+            async def read():
+                response = await client.get(f"/api/players/{ids['author_id']}")
+                response.raise_for_status()
+
+            for mode in ("inline", "pool"):
+                samples: list[float] = []
+                stop = asyncio.Event()
+                reads = asyncio.create_task(open_loop_reads(read, rate, stop, samples))
+                await asyncio.sleep(0.5)
+                elapsed = await login_burst(session_maker, logins, mode == "pool")
+                await asyncio.sleep(0.5)
+                stop.set()
+                await reads
+                row: dict[str, object] = {
+                    "mode": mode,
+                    "burst_s": elapsed,
+                    "logins_per_s": logins / elapsed,
+                }
+                rows.append(row | percentiles(samples))
+        hasher.shutdown()
+        await aengine.dispose()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=100, help="reads per second")
+    parser.add_argument("--workers", type=int, default=2, help="hashing threads")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args.logins, args.rate, args.workers, args.rounds))
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Latency of drawing random playable questions for a game room.
+
+``sql`` runs the ``ORDER BY RANDOM()`` query a draw would need without the
+pools, ``pool`` runs ``QuestionDrawServices.draw``, reading only the ids the
+room already used from the database. Loading a pool happens once per game
+type and category, its time and traced memory are reported separately.
+
+    python -m benchmarks.bench_question_draw --questions 1000000 --count 15 100
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from sqlalchemy import Engine, false, func, insert
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from benchmarks.common import (
+    async_engine,
+    async_session_maker,
+    percentiles,
+    print_table,
+    seed,
+    sync_engine,
+    temp_db_path,
+)
+from domuwa.models.links import GameRoomQuestionsLink
+from domuwa.models.question import Question
+from domuwa.services import question_draw_services
+from domuwa.services.question_draw_services import QuestionDrawServices
+
+INSERT_BATCH_SIZE = 50_000
+GAME_ROOM_ID = 1
+
+
+def seed_questions(engine: Engine, questions: int, used: int) -> dict[str, int]:
+    ids = seed(engine, questions=0)
+    with Session(engine) as session:
+        for start in range(0, questions, INSERT_BATCH_SIZE):
+            rows = [
+                {"text": f"question text {i}", **ids}
+                for i in range(start, min(start + INSERT_BATCH_SIZE, questions))
+            ]
+            session.execute(insert(Question), rows)
+        # every tenth question is not playable
+        session.execute(
+            Question.__table__.update()  # type: ignore
+            .where(Question.id % 10 == 0)  # type: ignore
+            .values(excluded=True)
+        )
+        used_ids = range(1, questions + 1, max(1, questions // max(used, 1)))
+        session.execute(
+            insert(GameRoomQuestionsLink),
+            [
+                {
+                    "game_room_id": GAME_ROOM_ID,
+                    "question_id": question_id,
+                    "position": i,
+                }
+                for i, question_id in enumerate(list(used_ids)[:used], start=1)
+            ],
+        )
+        session.commit()
+    return ids
+
+
+async def sql_draw(
+    session: AsyncSession, game_type_id: int, game_category_id: int, count: int
+):
+    used_ids = select(GameRoomQuestionsLink.question_id).where(
+        GameRoomQuestionsLink.game_room_id == GAME_ROOM_ID
+    )
+    statement = (
+        select(Question.id)
+        .where(
+            Question.game_type_id == game_type_id,
+            Question.game_category_id == game_category_id,
+            Question.deleted == false(),
+            Question.excluded == false(),
+            Question.head_id.is_(None),  # type: ignore
+            Question.id.not_in(used_ids),  # type: ignore
+        )
+        .order_by(func.random())
+        .limit(count)
+    )
+    return (await session.exec(statement)).all()
+
+
+async def pool_draw(
+    session: AsyncSession, game_type_id: int, game_category_id: int, count: int
+):
+    return await QuestionDrawServices().draw(
+        game_type_id,
+        game_category_id,
+        count,
+        session,
+        game_room_id=GAME_ROOM_ID,
+    )
+
+
+DRAWS = {"sql": sql_draw, "pool": pool_draw}
+
+
+async def run(questions: int, used: int, counts: list[int], draws: int) -> list[dict]:
+    rows = []
+    with temp_db_path() as db_path:
+        engine = sync_engine(db_path)
+        ids = seed_questions(engine, questions, used)
+        engine.dispose()
+        aengine = async_engine(db_path)
+        session_maker = async_session_maker(aengine)
+        key = (ids["game_type_id"], ids["game_category_id"])
+
+        for traced in (False, True):
+            question_draw_services.clear()
+            if traced:
+                tracemalloc.start()
+            start = time.perf_counter()
+            async with session_maker() as session:
+                pool = await QuestionDrawServices().get_pool(*key, session)
+            elapsed = time.perf_counter() - start
+            if traced:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"peak {peak / 2**20:.1f} MiB traced while loading the pool")
+            else:
+                print(f"pool of {len(pool)} questions loaded in {elapsed:.2f} s")
+
+        for count in counts:
+            for mode, draw in DRAWS.items():
+                samples = []
+                for _ in range(draws):
+                    async with session_maker() as session:
+                        start = time.perf_counter()
+                        drawn = await draw(session, *key, count)
+                        samples.append(time.perf_counter() - start)
+                    assert len(drawn) == count, (mode, len(drawn))
+                row = {"mode": mode, "questions": questions, "used": used}
+                rows.append(row | {"count": count} | percentiles(samples))
+
+        await aengine.dispose()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=1_000_000)
+    parser.add_argument("--used", type=int, default=500, help="by the game room")
+    parser.add_argument(
+        "--count",
+        type=int,
+        nargs="+",
+        default=[15, 100, 1000],
+        help="questions per draw",
+    )
+    parser.add_argument("--draws", type=int, default=20, help="per count and mode")
+    args = parser.parse_args()
+
+    print_table(asyncio.run(run(args.questions, args.used, args.count, args.draws)))
+
+
+if __name__ == "__main__":
+    main()
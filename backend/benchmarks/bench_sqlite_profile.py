@@ -0,0 +1,116 @@
+"""Write throughput and read latency under a burst of concurrent writers.
+
+``default`` uses SQLite defaults (rollback journal, ``synchronous=FULL``),
+``tuned`` applies the connection profile from ``domuwa.database``.
+
+    python -m benchmarks.bench_sqlite_profile --writers 20 --rate 100 --duration 5
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from benchmarks.common import (
+    async_engine,
+    async_session_maker,
+    open_loop_reads,
+    percentiles,
+    print_table,
+    seed,
+    sync_engine,
+    temp_db_path,
+)
+from domuwa.models.answer import AnswerCreate
+from domuwa.models.player import PlayerCreate
+from domuwa.services.answers_services import AnswerServices
+from domuwa.services.players_services import PlayerServices
+from domuwa.services.questions_services import QuestionServices
+
+
+async def phone(
+    session_maker: async_sessionmaker[AsyncSession],
+    phone_id: int,
+    ids: dict,
+    stop: asyncio.Event,
+    errors: list,
+) -> int:
+    """Join as a new player, then keep adding answers."""
+    writes = 0
+    async with session_maker() as session:
+        player = PlayerCreate(name=f"Phone {phone_id}")
+        await PlayerServices().create(player, session)
+    while not stop.is_set():
+        try:
+            async with session_maker() as session:
+                answer = AnswerCreate(text=f"answer {phone_id}.{writes}", **ids)
+                await AnswerServices().create(answer, session)
+        except OperationalError as exc:
+            errors.append(exc)
+            continue
+        writes += 1
+    return writes
+
+
+async def run(profile: str, writers: int, rate: float, duration: float):
+    tuned = profile == "tuned"
+    with temp_db_path() as db_path:
+        engine = sync_engine(db_path, pragmas=tuned)
+        ids = seed(engine, questions=200, answers_per_question=5)
+        engine.dispose()
+        aengine = async_engine(db_path, pragmas=tuned)
+        session_maker = async_session_maker(aengine)
+
+        async def read():
+            async with session_maker() as session:
+                await QuestionServices().get_by_id(1, session)
+
+        stop = asyncio.Event()
+        samples: list[float] = []
+        errors: list[Exception] = []
+        reader_task = asyncio.create_task(open_loop_reads(read, rate, stop, samples))
+        writer_tasks = [
+            asyncio.create_task(phone(session_maker, i, ids, stop, errors))
+            for i in range(writers)
+        ]
+
+        start = time.perf_counter()
+        await asyncio.sleep(duration)
+        stop.set()
+        writes = sum(await asyncio.gather(*writer_tasks))
+        elapsed = time.perf_counter() - start
+        await reader_task
+        await aengine.dispose()
+
+    return {
+        "profile": profile,
+        "writes/s": writes / elapsed,
+        "locked": len(errors),
+    } | percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=100, help="reads per second")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument(
+        "--profile",
+        choices=["default", "tuned", "both"],
+        default="both",
+    )
+    args = parser.parse_args()
+
+    profiles = ["default", "tuned"] if args.profile == "both" else [args.profile]
+    rows = [
+        asyncio.run(run(profile, args.writers, args.rate, args.duration))
+        for profile in profiles
+    ]
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""How long the server takes to start, on a new database and on an existing one.
+
+Every start is a new interpreter, so imports are paid in full each time.
+``import`` is the time to import ``main``, ``schema`` the time spent in
+``create_db_and_tables`` and ``startup`` the whole lifespan startup around it.
+``first`` is the time the first requests for ``/openapi.json`` and every list
+endpoint take together, and ``ready`` the time from the start of the imports
+until they are all answered.
+
+``cold`` starts on a new database file, ``warm`` on one the previous start
+left behind, and ``reflect`` on one with its schema fingerprint cleared, so the
+schema of every table is read as it was on every start before. ``warmup``
+starts warm with ``STARTUP_WARMUP`` and no OpenAPI schema cached yet,
+``warmup-cached`` with the schema the previous start cached.
+
+Every time is the median of ``--runs`` starts. With ``--max-import-ms`` or
+``--max-warm-ms`` it exits with status 1 when the warm one is over the budget,
+to catch startup regressions.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.common import print_table, temp_db_path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+START = """
+import asyncio, json, time
+
+import httpx
+from fastapi.routing import APIRoute
+
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+from domuwa.database import engine
+
+schema = 0.0
+create_db_and_tables = main.create_db_and_tables
+
+
+async def timed_create_db_and_tables():
+    global schema
+    schema_start = time.perf_counter()
+    await create_db_and_tables()
+    schema = time.perf_counter() - schema_start
+
+
+main.create_db_and_tables = timed_create_db_and_tables
+
+
+async def first_requests():
+    paths = ["/openapi.json"] + [
+        route.path
+        for route in main.app.routes
+        if isinstance(route, APIRoute) and route.name == "get_all"
+    ]
+    transport = httpx.ASGITransport(main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in paths:
+            response = await client.get(path)
+            response.raise_for_status()
+
+
+async def start_app():
+    lifespan = main.lifespan(main.app)
+    lifespan_start = time.perf_counter()
+    await lifespan.__aenter__()
+    started = time.perf_counter()
+    await first_requests()
+    answered = time.perf_counter()
+    await lifespan.__aexit__(None, None, None)
+    await engine.dispose()
+    return started - lifespan_start, answered - started, answered - start
+
+
+startup, first, ready = asyncio.run(start_app())
+print(
+    json.dumps(
+        {
+            "import": imported - start,
+            "schema": schema,
+            "startup": startup,
+            "first": first,
+            "ready": ready,
+        }
+    )
+)
+"""
+
+
+def start(db_path: Path, warmup: bool = False) -> dict[str, float]:
+    env = os.environ | {
+        "DATABASE_URL": f"sqlite+aiosqlite:///{db_path}",
+        # no bcrypt calibration holding up the exit
+        "PASSWORD_HASH_TARGET_MS": "0",
+        "STARTUP_WARMUP": str(warmup),
+        "OPENAPI_CACHE_DIR": str(db_path.parent / "openapi"),
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", START],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def clear_fingerprint(db_path: Path) -> None:
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("PRAGMA user_version=0")
+    conn.close()
+
+
+def run(runs: int) -> list[dict]:
+    samples: dict[str, list[dict[str, float]]] = {
+        "cold": [],
+        "warm": [],
+        "reflect": [],
+        "warmup": [],
+        "warmup-cached": [],
+    }
+    for _ in range(runs):
+        with temp_db_path() as db_path:
+            samples["cold"].append(start(db_path))
+            samples["warm"].append(start(db_path))
+            clear_fingerprint(db_path)
+            samples["reflect"].append(start(db_path))
+            samples["warmup"].append(start(db_path, warmup=True))
+            samples["warmup-cached"].append(start(db_path, warmup=True))
+
+    rows = []
+    for mode, starts in samples.items():
+        row: dict[str, object] = {"mode": mode, "runs": len(starts)}
+        for step in ("import", "schema", "startup", "first", "ready"):
+            times = [sample[step] * 1000 for sample in starts]
+            row[f"{step}_ms"] = statistics.median(times)
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="starts of each kind")
+    parser.add_argument("--max-import-ms", type=float, help="budget for imports")
+    parser.add_argument("--max-warm-ms", type=float, help="budget for warm startup")
+    args = parser.parse_args()
+
+    rows = run(args.runs)
+    print_table(rows)
+
+    warm = next(row for row in rows if row["mode"] == "warm")
+    over_budget = []
+    if args.max_import_ms is not None and warm["import_ms"] > args.max_import_ms:
+        over_budget.append(f"import {warm['import_ms']:.0f} ms")
+    if args.max_warm_ms is not None and warm["startup_ms"] > args.max_warm_ms:
+        over_budget.append(f"warm startup {warm['startup_ms']:.0f} ms")
+    if over_budget:
+        sys.exit(f"over budget: {', '.join(over_budget)}")
+
+
+if __name__ == "__main__":
+    main()
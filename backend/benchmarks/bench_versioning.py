@@ -0,0 +1,175 @@
+"""Edit latency of a question, and of one of its answers, by number of answers.
+
+``orm`` reproduces the old versioning writes, which loaded every answer of
+the question and moved each of them to the new version. ``sql`` runs the
+current services, which write a fixed number of statements and leave the
+answers on the version they were added to. Latency is
+measured from loading the edited row until the commit, the reload of the
+response is left out.
+
+    python -m benchmarks.bench_versioning --answers 0 100 1000 5000 --edits 20
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import selectinload
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from benchmarks.common import (
+    async_engine,
+    async_session_maker,
+    percentiles,
+    print_table,
+    seed,
+    sync_engine,
+    temp_db_path,
+)
+from domuwa.models.answer import Answer, AnswerUpdate
+from domuwa.models.question import Question, QuestionUpdate
+from domuwa.services.answers_services import AnswerServices
+from domuwa.services.questions_services import QuestionServices
+
+
+async def orm_question_edit(session: AsyncSession, question_id: int, text: str) -> int:
+    model = await session.get_one(
+        Question,
+        question_id,
+        options=(selectinload(Question.answers),),  # type: ignore
+    )
+    data = model.model_dump(exclude={"id", "head_id", "text"})
+    updated_model = Question(**data, text=text)
+    updated_model.prev_version = model
+    for answer in model.answers:
+        answer.question = updated_model
+    session.add(updated_model)
+    session.add(model)
+    await session.commit()
+    return updated_model.id  # type: ignore
+
+
+async def orm_answer_edit(session: AsyncSession, answer_id: int, text: str) -> int:
+    model = await session.get_one(Answer, answer_id)
+    data = model.model_dump(exclude={"id", "head_id", "text"})
+    updated_model = Answer(**data, text=text)
+    updated_model.prev_version = model
+    session.add(updated_model)
+    question = await session.get_one(
+        Question,
+        model.question_id,
+        options=(selectinload(Question.answers),),  # type: ignore
+    )
+    model.question = None
+    updated_model.question = question
+    session.add(model)
+    await session.commit()
+    return updated_model.id  # type: ignore
+
+
+async def sql_question_edit(session: AsyncSession, question_id: int, text: str) -> int:
+    model = await session.get_one(Question, question_id)
+    updated_model = await QuestionServices().update(
+        model,  # type: ignore
+        QuestionUpdate(text=text),
+        session,
+    )
+    return updated_model.id  # type: ignore
+
+
+async def sql_answer_edit(session: AsyncSession, answer_id: int, text: str) -> int:
+    model = await session.get_one(Answer, answer_id)
+    updated_model = await AnswerServices().update(
+        model,  # type: ignore
+        AnswerUpdate(text=text),
+        session,
+    )
+    return updated_model.id  # type: ignore
+
+
+EDITS = {
+    "orm": (orm_question_edit, orm_answer_edit),
+    "sql": (sql_question_edit, sql_answer_edit),
+}
+
+
+async def timed_edits(
+    session_maker: async_sessionmaker[AsyncSession],
+    edit: Callable[[AsyncSession, int, str], Awaitable[int]],
+    model_id: int,
+    edits: int,
+) -> list[float]:
+    samples = []
+    for i in range(edits):
+        async with session_maker() as session:
+            committed_at: list[float] = []
+            event.listen(
+                session.sync_session,
+                "after_commit",
+                lambda _, committed_at=committed_at: committed_at.append(
+                    time.perf_counter()
+                ),
+            )
+            start = time.perf_counter()
+            model_id = await edit(session, model_id, f"edited text {i}")
+            samples.append(committed_at[0] - start)
+    return samples
+
+
+async def run(mode: str, answers: int, edits: int) -> list[dict]:
+    question_edit, answer_edit = EDITS[mode]
+    with temp_db_path() as db_path:
+        engine = sync_engine(db_path)
+        seed(engine, questions=1, answers_per_question=answers)
+        engine.dispose()
+        aengine = async_engine(db_path)
+        session_maker = async_session_maker(aengine)
+
+        rows = []
+        question_id = 1
+        samples = await timed_edits(session_maker, question_edit, question_id, edits)
+        rows.append({"mode": mode, "edit": "question", "answers": answers})
+        rows[-1] |= percentiles(samples)
+
+        if answers:
+            async with session_maker() as session:
+                statement = select(Answer.id).where(
+                    col(Answer.question_id).is_not(None)
+                )
+                answer_id = (await session.exec(statement)).first()
+            assert answer_id is not None
+            samples = await timed_edits(session_maker, answer_edit, answer_id, edits)
+            rows.append({"mode": mode, "edit": "answer", "answers": answers})
+            rows[-1] |= percentiles(samples)
+
+        await aengine.dispose()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--answers",
+        type=int,
+        nargs="+",
+        default=[0, 10, 100, 1000, 5000],
+        help="answers of the edited question",
+    )
+    parser.add_argument("--edits", type=int, default=20, help="per question size")
+    parser.add_argument("--mode", choices=["orm", "sql", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = ["orm", "sql"] if args.mode == "both" else [args.mode]
+    rows = []
+    for answers in args.answers:
+        for mode in modes:
+            rows.extend(asyncio.run(run(mode, answers, args.edits)))
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import asyncio
+import statistics
+import tempfile
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+
+import httpx
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa import database as db
+from domuwa.models.answer import Answer
+from domuwa.models.game_type import GameType, GameTypeChoices
+from domuwa.models.player import Player
+from domuwa.models.qna_category import QnACategory, QnACategoryChoices
+from domuwa.models.question import Question
+
+
+@contextmanager
+def temp_db_path() -> Iterator[Path]:
+    with tempfile.TemporaryDirectory(prefix="domuwa-bench-") as tmp_dir:
+        yield Path(tmp_dir) / "bench.sqlite3"
+
+
+def sync_engine(db_path: Path, pragmas: bool = True) -> Engine:
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"check_same_thread": False},
+    )
+    if pragmas:
+        event.listen(engine, "connect", db.set_sqlite_pragmas)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def async_engine(db_path: Path, pragmas: bool = True) -> AsyncEngine:
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}",
+        connect_args={"check_same_thread": False},
+    )
+    if pragmas:
+        event.listen(engine.sync_engine, "connect", db.set_sqlite_pragmas)
+    return engine
+
+
+def async_session_maker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def seed(
+    engine: Engine,
+    questions: int = 100,
+    answers_per_question: int = 0,
+    players: int = 1,
+) -> dict[str, int]:
+    """Insert a deck and return the ids of the shared lookup rows."""
+    with Session(engine) as session:
+        authors = [Player(name=f"Player {i}") for i in range(players)]
+        game_type = GameType(name=GameTypeChoices.EGO)
+        category = QnACategory(name=QnACategoryChoices.SFW)
+        session.add_all([*authors, game_type, category])
+        session.commit()
+
+        ids = {
+            "author_id": authors[0].id,
+            "game_type_id": game_type.id,
+            "game_category_id": category.id,
+        }
+        for i in range(questions):
+            question = Question(text=f"question text {i}", **ids)  # type: ignore
+            session.add(question)
+            session.add_all(
+                Answer(text=f"answer text {i}.{j}", question=question, **ids)  # type: ignore
+                for j in range(answers_per_question)
+            )
+        session.commit()
+    return ids  # type: ignore
+
+
+@asynccontextmanager
+async def api_client(session_maker: async_sessionmaker[AsyncSession]):
+    from main import app
+
+    async def override_get_db_session():
+        async with session_maker() as db_sess:
+            yield db_sess
+
+    app.dependency_overrides[db.get_db_session] = override_get_db_session
+    app.dependency_overrides[db.get_db_session_maker] = lambda: session_maker
+    transport = httpx.ASGITransport(app=app)  # type: ignore
+    try:
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+        ) as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+async def _timed(read: Callable[[], Awaitable[object]], due: float, samples: list):
+    await read()
+    samples.append(time.perf_counter() - due)
+
+
+async def open_loop_reads(
+    read: Callable[[], Awaitable[object]],
+    rate: float,
+    stop: asyncio.Event,
+    samples: list,
+):
+    """Issue reads on a fixed schedule, so time spent waiting for a blocked
+    event loop counts towards the latency, like it does for a real client."""
+    tasks = []
+    interval = 1 / rate
+    due = time.perf_counter()
+    while not stop.is_set():
+        tasks.append(asyncio.create_task(_timed(read, due, samples)))
+        due += interval
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+    await asyncio.gather(*tasks)
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """Summarize latencies given in seconds as milliseconds."""
+    if len(samples) < 2:
+        samples = samples * 2 or [0.0, 0.0]
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "n": len(samples),
+        "p50": cuts[49] * 1000,
+        "p95": cuts[94] * 1000,
+        "p99": cuts[98] * 1000,
+        "max": max(samples) * 1000,
+    }
+
+
+def print_table(rows: list[dict[str, object]]) -> None:
+    if not rows:
+        return
+    headers = list(rows[0])
+    cells = [
+        [f"{row[h]:.2f}" if isinstance(row[h], float) else str(row[h]) for h in headers]
+        for row in rows
+    ]
+    widths = [max(len(h), *(len(c[i]) for c in cells)) for i, h in enumerate(headers)]
+    print("  ".join(h.rjust(w) for h, w in zip(headers, widths)))
+    for c in cells:
+        print("  ".join(v.rjust(w) for v, w in zip(c, widths)))
@@ -0,0 +1,47 @@
+"""Move retired questions and answers to the archive tables right away.
+
+python -m domuwa.archive --retention-days 30
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from domuwa.config import settings
+from domuwa.database import create_db_and_tables, engine, session_maker
+from domuwa.services.archive_services import ArchiveServices
+
+
+async def archive(retention: float, batch_size: int) -> dict[str, int]:
+    await create_db_and_tables()
+    try:
+        async with session_maker() as session:
+            older_than = datetime.now() - timedelta(seconds=retention)
+            return await ArchiveServices().archive(older_than, session, batch_size)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--retention-days",
+        type=float,
+        default=settings.ARCHIVE_RETENTION / (24 * 3600),
+        help="days for which retired rows stay in the hot tables",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.ARCHIVE_BATCH_SIZE,
+        help="rows moved per transaction",
+    )
+    args = parser.parse_args()
+
+    archived = asyncio.run(archive(args.retention_days * 24 * 3600, args.batch_size))
+    for table, count in archived.items():
+        print(f"{table}: {count} rows archived")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,14 +7,17 @@ import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from domuwa.auth import services
+from domuwa.auth.hashing import PasswordHasher
 from domuwa.auth.models import TokenData, User
+from domuwa.auth.token_cache import token_cache
 from domuwa.config import settings
 from domuwa.database import get_db_session
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+hasher = PasswordHasher(pwd_context)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -33,11 +36,17 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def authenticate_user(username: str, password: str, session: Session):
-    user = services.get_user(username, session)
+async def hash_password(password: str) -> str:
+    return await hasher.hash(password)
+
+
+async def authenticate_user(username: str, password: str, session: AsyncSession):
+    """The user with these credentials or False, raises ``HashingBusyError``
+    when too many logins are waiting already."""
+    user = await services.get_user(username, session)
     if user is None:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await hasher.verify(password, user.hashed_password):
         return False
     return user
 
@@ -54,8 +63,14 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
-    session: Annotated[Session, Depends(get_db_session)],
-):
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+) -> User:
+    """User of the token, the database is only read the first time a token
+    is seen, see ``domuwa.auth.token_cache``."""
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached.user
+
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.HASH_ALGORITHM]
@@ -68,9 +83,12 @@ async def get_current_user(
         raise CredentialsException
 
     token_data = TokenData(username=username)
-    user = services.get_user(token_data.username, session)
-    if user is None:
+    user_db = await services.get_user(token_data.username, session)
+    if user_db is None:
         raise CredentialsException
+    # detached from the session, the same object serves later requests
+    user = User.model_validate(user_db)
+    token_cache.put(token, payload, user)
     return user
 
 
@@ -79,3 +97,4 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
         )
+    return current_user
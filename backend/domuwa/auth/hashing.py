@@ -0,0 +1,127 @@
+"""Password hashing off the event loop.
+
+bcrypt is slow on purpose, a single hash or check takes a good part of a
+second of CPU. Run on the event loop, every login would stall all the other
+requests for that long. ``PasswordHasher`` runs it on a few threads instead,
+bcrypt releases the GIL while it works. Only so many logins may wait for a
+thread, any more are turned away with ``HashingBusyError`` rather than queue
+up without a bound.
+
+The cost of new hashes is picked once at startup, so a hash takes about
+``PASSWORD_HASH_TARGET_MS`` on the machine the server runs on. Existing hashes
+keep the cost they were made with.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import suppress
+from functools import partial
+from typing import TypeVar
+
+from passlib.context import CryptContext  # type: ignore
+from passlib.hash import bcrypt  # type: ignore
+
+from domuwa.config import settings
+
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class HashingBusyError(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        context: CryptContext,
+        workers: int = settings.PASSWORD_HASH_WORKERS,
+        queue_size: int = settings.PASSWORD_HASH_QUEUE_SIZE,
+    ) -> None:
+        self.context = context
+        self.workers = workers
+        # jobs running or waiting for a thread
+        self.max_pending = workers + queue_size
+        self.pending = 0
+        self.calibrated = False
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def run(self, func: Callable[..., T], *args: object) -> T:
+        """Run ``func`` on a hashing thread, raises ``HashingBusyError`` when
+        too many jobs are waiting already."""
+        if self.pending >= self.max_pending:
+            raise HashingBusyError(f"{self.pending} password hashing jobs pending")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.workers,
+                thread_name_prefix="password-hash",
+            )
+        loop = asyncio.get_running_loop()
+        future = self._executor.submit(func, *args)
+        self.pending += 1
+        # a job keeps its place until its thread is done, even if the
+        # request waiting for it is gone
+        future.add_done_callback(partial(self._done, loop))
+        return await asyncio.wrap_future(future)
+
+    def _done(self, loop: asyncio.AbstractEventLoop, _: Future) -> None:
+        # the loop may be closed by the time a cancelled job is done
+        with suppress(RuntimeError):
+            loop.call_soon_threadsafe(self._release)
+
+    def _release(self) -> None:
+        self.pending -= 1
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self.run(self.context.verify, password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(self.context.hash, password)
+
+    async def calibrate(
+        self,
+        target_ms: float = settings.PASSWORD_HASH_TARGET_MS,
+    ) -> None:
+        """Pick the bcrypt cost of new hashes, once per process."""
+        if self.calibrated or target_ms <= 0:
+            return
+        self.calibrated = True
+        await self.run(self.set_rounds, target_ms / 1000)
+
+    def set_rounds(self, target_seconds: float) -> None:
+        # applied on the hashing thread, a shutdown does not stop it halfway
+        rounds = self.find_rounds(target_seconds)
+        self.context.update(bcrypt__rounds=rounds)
+        logger.info("bcrypt cost set to %d rounds", rounds)
+
+    @staticmethod
+    def find_rounds(target_seconds: float) -> int:
+        """Highest cost with a hash taking no longer than ``target_seconds``,
+        every extra round doubles the time."""
+        hasher = bcrypt.using(rounds=MIN_ROUNDS)
+        seconds = math.inf
+        for _ in range(3):
+            start = time.perf_counter()
+            hasher.hash("calibration")
+            seconds = min(seconds, time.perf_counter() - start)
+        extra_rounds = math.floor(math.log2(target_seconds / seconds))
+        return max(MIN_ROUNDS, min(MAX_ROUNDS, MIN_ROUNDS + extra_rounds))
+
+    async def calibrate_in_background(self) -> None:
+        try:
+            await self.calibrate()
+        except Exception:
+            logger.exception("calibrating bcrypt failed, keeping the default cost")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -3,22 +3,31 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from domuwa.auth import authenticate_user, create_access_token, get_current_user
+from domuwa.auth.hashing import HashingBusyError
 from domuwa.auth.models import Token, User
+from domuwa.auth.token_cache import token_cache
 from domuwa.config import settings
 from domuwa.database import get_db_session
 
-router = APIRouter(prefix="auth")
+router = APIRouter(prefix="/auth")
 
 
 @router.post("/login")
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    session: Session = Depends(get_db_session),
+    session: Annotated[AsyncSession, Depends(get_db_session)],
 ):
-    user = authenticate_user(form_data.username, form_data.password, session)
+    try:
+        user = await authenticate_user(form_data.username, form_data.password, session)
+    except HashingBusyError:
+        raise HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many logins at once, try again",
+            headers={"Retry-After": "1"},
+        )
     if not user:
         raise HTTPException(
             status.HTTP_401_UNAUTHORIZED,
@@ -27,7 +36,7 @@ async def login_for_access_token(
         )
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        {"sub": user.username}, expires_delta=access_token_expires
+        {"sub": user.login}, expires_delta=access_token_expires
     )
     return Token(access_token=access_token, token_type="bearer")
 
@@ -35,3 +44,8 @@ async def login_for_access_token(
 @router.get("/")
 async def read_user(current_user: Annotated[User, Depends(get_current_user)]):
     return current_user
+
+
+@router.get("/token-cache")
+async def read_token_cache_stats(_: Annotated[User, Depends(get_current_user)]):
+    return token_cache.stats()
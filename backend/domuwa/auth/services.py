@@ -1,7 +1,9 @@
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from domuwa.auth.models import UserDb
 
 
-def get_user(username: str, session: Session):
-    return session.exec(select(UserDb).where(UserDb.login == username)).first()  # type: ignore
+async def get_user(username: str, session: AsyncSession):
+    statement = select(UserDb).where(UserDb.login == username)  # type: ignore
+    return (await session.exec(statement)).first()
@@ -0,0 +1,131 @@
+"""Tokens already verified, with the user they belong to.
+
+Checking the signature of a token and reading its user from the database is
+done once per token, later requests with the same token are answered from
+memory. Entries are kept by the SHA-256 digest of the token, never the token
+itself. An entry lives no longer than ``TOKEN_CACHE_TTL`` seconds and never
+past the expiry of its token, the least recently used ones are dropped once
+there are ``TOKEN_CACHE_SIZE`` of them.
+
+Every entry of a user is dropped as soon as the user is changed or deleted
+through the ORM, and again once the change is committed, so a deactivated
+user cannot go on with a cached token.
+Changes made with Core statements or by another process are only seen once
+the entries expire.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from sqlalchemy import Connection, event, inspect
+from sqlalchemy.orm import InstanceState, Mapper, Session
+
+from domuwa.auth.models import User, UserDb
+from domuwa.config import settings
+
+
+class CachedToken(NamedTuple):
+    claims: dict
+    user: User
+    expires_at: float
+
+
+class TokenCache:
+    def __init__(
+        self,
+        maxsize: int = settings.TOKEN_CACHE_SIZE,
+        ttl: float = settings.TOKEN_CACHE_TTL,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, CachedToken] = OrderedDict()
+        # login -> digests of the tokens cached for the user
+        self._digests: dict[str, set[bytes]] = {}
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> CachedToken | None:
+        digest = self.digest(token)
+        entry = self._entries.get(digest)
+        if entry is not None and entry.expires_at <= time.time():
+            self._remove(digest)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return entry
+
+    def put(self, token: str, claims: dict, user: User) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if isinstance(claims.get("exp"), int | float):
+            expires_at = min(expires_at, claims["exp"])
+        digest = self.digest(token)
+        self._remove(digest)
+        self._entries[digest] = CachedToken(claims, user, expires_at)
+        self._digests.setdefault(user.login, set()).add(digest)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, login: str) -> None:
+        for digest in self._digests.pop(login, set()):
+            self._entries.pop(digest, None)
+
+    def _remove(self, digest: bytes) -> None:
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+        digests = self._digests.get(entry.user.login)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._digests[entry.user.login]
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._digests.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+token_cache = TokenCache()
+
+
+# logins of the users changed in a session, dropped again once it commits
+PENDING_LOGINS = "token_cache_logins"
+
+
+@event.listens_for(UserDb, "after_update")
+@event.listens_for(UserDb, "after_delete")
+def invalidate_user(mapper: Mapper, connection: Connection, target: UserDb) -> None:
+    state: InstanceState[UserDb] = inspect(target, raiseerr=True)
+    # and under the login it had, if that changed
+    logins = {target.login, *(state.attrs.login.history.deleted or ())}
+    for login in logins:
+        token_cache.invalidate_user(login)
+    # a request reading the user before the commit caches it as it was
+    if state.session is not None:
+        state.session.info.setdefault(PENDING_LOGINS, set()).update(logins)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_users(session: Session) -> None:
+    for login in session.info.pop(PENDING_LOGINS, ()):
+        token_cache.invalidate_user(login)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_rolled_back_users(session: Session) -> None:
+    session.info.pop(PENDING_LOGINS, None)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -5,11 +7,71 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     SESSION_MIDDLEWARE_KEY: str = Field(default="gucci", frozen=True)
     API_PORT: int = Field(default=8080, frozen=True)
-    DATABASE_URL: str = Field(default="sqlite:///db.sqlite3", frozen=True)
+    DATABASE_URL: str = Field(default="sqlite+aiosqlite:///db.sqlite3", frozen=True)
     ALLOWED_ORIGINS: list[str] = Field(default=["*"], frozen=True)
     SECRET_KEY: str = Field(default="secret", frozen=True)
     HASH_ALGORITHM: str = Field(default="HS256", frozen=True)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=60, frozen=True)
+    # verified tokens kept with their user, 0 disables the cache
+    TOKEN_CACHE_SIZE: int = Field(default=1024, ge=0, frozen=True)
+    # seconds a verified token is trusted without reading its user again
+    TOKEN_CACHE_TTL: float = Field(default=60, gt=0, frozen=True)
+
+    # applied on every new SQLite connection, see domuwa.database
+    SQLITE_JOURNAL_MODE: Literal["DELETE", "TRUNCATE", "PERSIST", "WAL"] = Field(
+        default="WAL", frozen=True
+    )
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = Field(
+        default="NORMAL", frozen=True
+    )
+    SQLITE_BUSY_TIMEOUT_MS: int = Field(default=5000, ge=0, frozen=True)
+    # negative values are KiB, positive are pages
+    SQLITE_CACHE_SIZE: int = Field(default=-64_000, frozen=True)
+    SQLITE_MMAP_SIZE: int = Field(default=256 * 1024 * 1024, ge=0, frozen=True)
+    SQLITE_TEMP_STORE: Literal["DEFAULT", "FILE", "MEMORY"] = Field(
+        default="MEMORY", frozen=True
+    )
+    # only applies to a new database file, INCREMENTAL lets the archive job
+    # give freed pages back to the file system
+    SQLITE_AUTO_VACUUM: Literal["NONE", "FULL", "INCREMENTAL"] = Field(
+        default="INCREMENTAL", frozen=True
+    )
+    # seconds between passive WAL checkpoints, 0 disables the task
+    SQLITE_WAL_CHECKPOINT_INTERVAL: float = Field(default=300, ge=0, frozen=True)
+
+    # seconds between change log compactions, 0 disables the task
+    CHANGE_LOG_COMPACTION_INTERVAL: float = Field(default=3600, ge=0, frozen=True)
+    # seconds for which every change is kept, older ones are folded
+    CHANGE_LOG_RETENTION: float = Field(default=7 * 24 * 3600, ge=0, frozen=True)
+
+    # seconds between moves of retired questions and answers to the archive
+    # tables, 0 disables the task
+    ARCHIVE_INTERVAL: float = Field(default=24 * 3600, ge=0, frozen=True)
+    # seconds for which deleted and superseded rows stay in the hot tables
+    ARCHIVE_RETENTION: float = Field(default=30 * 24 * 3600, ge=0, frozen=True)
+    # rows moved per transaction, bounds how long the write lock is held
+    ARCHIVE_BATCH_SIZE: int = Field(default=500, ge=1, frozen=True)
+
+    # messages waiting to be sent to a player, one who falls further behind is
+    # disconnected and gets the whole game room state again on reconnect
+    GAME_ROOM_SEND_QUEUE_SIZE: int = Field(default=64, ge=1, frozen=True)
+    # seconds between writes of live game rooms to the database, the plays
+    # acknowledged since the last write are lost if the server crashes
+    GAME_ROOM_FLUSH_INTERVAL: float = Field(default=1, gt=0, frozen=True)
+
+    # threads hashing and checking passwords, off the event loop
+    PASSWORD_HASH_WORKERS: int = Field(default=2, ge=1, frozen=True)
+    # logins that may wait for a thread, any more get 503
+    PASSWORD_HASH_QUEUE_SIZE: int = Field(default=16, ge=0, frozen=True)
+    # milliseconds a new password hash should take, the bcrypt cost is picked
+    # at startup to match, 0 keeps the default cost
+    PASSWORD_HASH_TARGET_MS: float = Field(default=250, ge=0, frozen=True)
+
+    # build the OpenAPI schema, the list validators and the database
+    # connections at startup instead of on the first requests
+    STARTUP_WARMUP: bool = Field(default=False, frozen=True)
+    # directory the OpenAPI schema is kept in between starts, empty disables it
+    OPENAPI_CACHE_DIR: str = Field(default=".cache", frozen=True)
 
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
@@ -1,17 +1,143 @@
-from sqlmodel import SQLModel, Session, create_engine
+import asyncio
+import hashlib
+import logging
+from functools import cache
 
+from sqlalchemy import event, text
+from sqlalchemy.engine.interfaces import DBAPIConnection, Dialect
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import ConnectionPoolEntry
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa import migrations
 from domuwa.config import settings
 
-engine = create_engine(
+logger = logging.getLogger(__name__)
+
+engine = create_async_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False},
 )
 
+session_maker = async_sessionmaker(
+    engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
+
+def set_sqlite_pragmas(
+    dbapi_connection: DBAPIConnection,
+    _: ConnectionPoolEntry | None = None,
+) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA auto_vacuum={settings.SQLITE_AUTO_VACUUM}")
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS:d}")
+    cursor.execute(f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE:d}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE:d}")
+    cursor.execute(f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}")
+    cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine.sync_engine, "connect", set_sqlite_pragmas)
+
+
+@cache
+def schema_fingerprint(dialect: Dialect) -> int:
+    """Hash of the DDL of every table and index, as a positive 31-bit int so
+    that it fits SQLite's ``user_version``."""
+    digest = hashlib.sha256()
+    for table in SQLModel.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    # 0 is the user_version of a new database
+    return int.from_bytes(digest.digest()[:4]) & 0x7FFFFFFF or 1
+
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+async def create_db_and_tables(db_engine: AsyncEngine = engine) -> bool:
+    """Create the tables and indexes missing from the database, returns False
+    if it was skipped.
 
+    ``create_all`` reads the schema of every table to find what is missing.
+    An SQLite database keeps the fingerprint of the schema it was last created
+    with in ``PRAGMA user_version``, and while the models still match it
+    nothing has to be read. Tables dropped by hand are not noticed then, set
+    ``user_version`` to 0 to have them created again.
 
-def get_db_session():
-    with Session(engine) as db_sess:
+    On a new fingerprint the migrations run first, and the fingerprint is only
+    written once every table has all the columns of its model, otherwise
+    ``SchemaMismatchError`` is raised and nothing is changed.
+    """
+    async with db_engine.begin() as conn:
+        if conn.dialect.name != "sqlite":
+            await conn.run_sync(SQLModel.metadata.create_all)
+            return True
+        fingerprint = schema_fingerprint(conn.dialect)
+        if await get_user_version(conn) == fingerprint:
+            logger.debug("schema fingerprint %d matches", fingerprint)
+            return False
+        # the driver leaves DDL outside of transactions, this one holds all of
+        # it, and the write lock keeps a second server from migrating as well
+        await conn.exec_driver_sql("BEGIN IMMEDIATE")
+        await conn.run_sync(migrations.migrate)
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(migrations.check_columns)
+        await conn.run_sync(migrations.create_indexes)
+        await conn.execute(text(f"PRAGMA user_version={fingerprint:d}"))
+        logger.info("created the schema, fingerprint %d", fingerprint)
+    return True
+
+
+async def get_user_version(conn: AsyncConnection) -> int:
+    return (await conn.execute(text("PRAGMA user_version"))).scalar_one()
+
+
+async def get_db_session():
+    async with session_maker() as db_sess:
         yield db_sess
+
+
+# sessions from get_db_session are closed before a streaming response is sent,
+# streaming endpoints open their own
+def get_db_session_maker() -> async_sessionmaker[AsyncSession]:
+    return session_maker
+
+
+async def checkpoint_wal(
+    interval: float = settings.SQLITE_WAL_CHECKPOINT_INTERVAL,
+) -> None:
+    """Periodically move WAL pages back into the database file.
+
+    SQLite checkpoints on its own once the WAL reaches 1000 pages, but only on
+    commit, so after a burst of writes the WAL (and every reader scanning it)
+    stays large until the next write. PASSIVE never waits for readers or writers.
+    """
+    if interval <= 0 or settings.SQLITE_JOURNAL_MODE != "WAL":
+        return
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with engine.connect() as conn:
+                result = await conn.execute(text("PRAGMA wal_checkpoint(PASSIVE)"))
+                busy, wal_pages, checkpointed = result.one()
+        except Exception:
+            logger.exception("WAL checkpoint failed")
+            continue
+        logger.debug(
+            "WAL checkpoint: busy=%d, wal_pages=%d, checkpointed=%d",
+            busy,
+            wal_pages,
+            checkpointed,
+        )
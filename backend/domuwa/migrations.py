@@ -0,0 +1,226 @@
+"""Schema changes ``create_all`` cannot make on an existing database.
+
+``create_all`` only creates missing tables, with their indexes. Columns added
+to a model, and indexes added to an existing table, are left out, and an
+old database would be stamped with the new schema fingerprint without them.
+Every migration checks the schema itself and does nothing once it is
+applied, they run in order whenever the fingerprint does not match.
+"""
+
+import logging
+from collections.abc import Callable
+from datetime import datetime
+
+from sqlalchemy import Connection, DateTime, bindparam, inspect, text
+from sqlalchemy.schema import CreateIndex
+from sqlmodel import SQLModel
+
+logger = logging.getLogger(__name__)
+
+Migration = Callable[[Connection], None]
+
+
+class SchemaMismatchError(RuntimeError):
+    pass
+
+
+def get_columns(conn: Connection, table_name: str) -> set[str] | None:
+    """Names of the columns of a table, None if it does not exist yet."""
+    inspector = inspect(conn)
+    if not inspector.has_table(table_name):
+        return None
+    return {column["name"] for column in inspector.get_columns(table_name)}
+
+
+def get_index_names(conn: Connection, table_name: str) -> set[str]:
+    return {str(index["name"]) for index in inspect(conn).get_indexes(table_name)}
+
+
+def add_head_ids(conn: Connection) -> None:
+    """Add ``head_id`` to questions and answers, pointing every older version
+    at the latest one of its chain."""
+    for table_name in ("question", "answer"):
+        columns = get_columns(conn, table_name)
+        if columns is None or "head_id" in columns:
+            continue
+        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN head_id INTEGER"))
+        # walks every chain back from its latest version, the one no other
+        # version was made from
+        result = conn.execute(
+            text(
+                f"""
+                UPDATE {table_name} SET head_id = chain.head_id
+                FROM (
+                    WITH RECURSIVE chain(id, head_id) AS (
+                        SELECT id, id FROM {table_name} AS latest
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM {table_name} AS next
+                            WHERE next.prev_version_id = latest.id
+                        )
+                        UNION ALL
+                        SELECT version.prev_version_id, chain.head_id
+                        FROM chain
+                        JOIN {table_name} AS version ON version.id = chain.id
+                        WHERE version.prev_version_id IS NOT NULL
+                    )
+                    SELECT id, head_id FROM chain WHERE id != head_id
+                ) AS chain
+                WHERE chain.id = {table_name}.id
+                """
+            )
+        )
+        logger.info("added %s.head_id to %d versions", table_name, result.rowcount)
+
+
+def add_retired_at(conn: Connection) -> None:
+    """Add ``retired_at`` to questions and answers, set on deleted and
+    superseded versions."""
+    for table_name in ("question", "answer"):
+        columns = get_columns(conn, table_name)
+        if columns is None or "retired_at" in columns:
+            continue
+        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN retired_at DATETIME"))
+        # when they were retired is not known, their retention starts now
+        result = conn.execute(
+            text(
+                f"UPDATE {table_name} SET retired_at = :now "
+                "WHERE deleted = 1 OR head_id IS NOT NULL"
+            ).bindparams(bindparam("now", datetime.now(), type_=DateTime))
+        )
+        logger.info("added %s.retired_at to %d versions", table_name, result.rowcount)
+
+
+def add_round_positions(conn: Connection) -> None:
+    """Add ``position`` to the questions of game rooms, numbering them in the
+    order they were added."""
+    columns = get_columns(conn, "gameroomquestionslink")
+    if columns is None or "position" in columns:
+        return
+    # SQLite only adds NOT NULL columns with a default, every row is set below
+    conn.execute(
+        text(
+            "ALTER TABLE gameroomquestionslink "
+            "ADD COLUMN position INTEGER NOT NULL DEFAULT 0"
+        )
+    )
+    result = conn.execute(
+        text(
+            """
+            UPDATE gameroomquestionslink SET position = numbered.position
+            FROM (
+                SELECT rowid AS link_rowid, row_number() OVER (
+                    PARTITION BY game_room_id ORDER BY rowid
+                ) AS position
+                FROM gameroomquestionslink
+            ) AS numbered
+            WHERE numbered.link_rowid = gameroomquestionslink.rowid
+            """
+        )
+    )
+    logger.info("numbered %d questions of game rooms", result.rowcount)
+
+
+def merge_duplicate_scores(conn: Connection) -> None:
+    """Add ``score`` to player scores and merge the rankings of a game room,
+    and the scores of a player in a ranking, before their unique indexes."""
+    columns = get_columns(conn, "player_score")
+    if columns is None or get_columns(conn, "ranking") is None:
+        return
+    if "score" not in columns:
+        conn.execute(
+            text("ALTER TABLE player_score ADD COLUMN score INTEGER NOT NULL DEFAULT 0")
+        )
+
+    if "ix_ranking_game_room_id" not in get_index_names(conn, "ranking"):
+        conn.execute(
+            text(
+                """
+                UPDATE player_score SET ranking_id = kept.id
+                FROM ranking AS duplicate, (
+                    SELECT min(id) AS id, game_room_id FROM ranking
+                    WHERE game_room_id IS NOT NULL GROUP BY game_room_id
+                ) AS kept
+                WHERE duplicate.id = player_score.ranking_id
+                AND duplicate.game_room_id = kept.game_room_id
+                AND duplicate.id != kept.id
+                """
+            )
+        )
+        result = conn.execute(
+            text(
+                """
+                DELETE FROM ranking WHERE game_room_id IS NOT NULL AND id NOT IN (
+                    SELECT min(id) FROM ranking
+                    WHERE game_room_id IS NOT NULL GROUP BY game_room_id
+                )
+                """
+            )
+        )
+        logger.info("merged %d duplicate rankings", result.rowcount)
+
+    if "ix_player_score_ranking_player" not in get_index_names(conn, "player_score"):
+        # the first row of a player in a ranking keeps the sum of them all
+        conn.execute(
+            text(
+                """
+                UPDATE player_score SET score = merged.score
+                FROM (
+                    SELECT min(id) AS id, sum(score) AS score FROM player_score
+                    WHERE ranking_id IS NOT NULL AND player_id IS NOT NULL
+                    GROUP BY ranking_id, player_id HAVING count(*) > 1
+                ) AS merged
+                WHERE merged.id = player_score.id
+                """
+            )
+        )
+        result = conn.execute(
+            text(
+                """
+                DELETE FROM player_score
+                WHERE ranking_id IS NOT NULL AND player_id IS NOT NULL
+                AND id NOT IN (
+                    SELECT min(id) FROM player_score
+                    WHERE ranking_id IS NOT NULL AND player_id IS NOT NULL
+                    GROUP BY ranking_id, player_id
+                )
+                """
+            )
+        )
+        logger.info("merged %d duplicate player scores", result.rowcount)
+
+
+MIGRATIONS: list[Migration] = [
+    add_head_ids,
+    add_retired_at,
+    add_round_positions,
+    merge_duplicate_scores,
+]
+
+
+def migrate(conn: Connection) -> None:
+    for migration in MIGRATIONS:
+        migration(conn)
+
+
+def create_indexes(conn: Connection) -> None:
+    """Create the indexes missing from tables that already existed."""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def check_columns(conn: Connection) -> None:
+    """Raise if a table still lacks a column of its model."""
+    missing = []
+    for table in SQLModel.metadata.sorted_tables:
+        columns = get_columns(conn, table.name) or set()
+        missing += [
+            f"{table.name}.{column.name}"
+            for column in table.c
+            if column.name not in columns
+        ]
+    if missing:
+        raise SchemaMismatchError(
+            f"columns missing from the database: {', '.join(sorted(missing))}, "
+            "add a migration for them"
+        )
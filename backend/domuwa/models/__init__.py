@@ -1,10 +1,14 @@
 from sqlmodel import SQLModel
 
 from domuwa.models.answer import *  # noqa: F403
+from domuwa.models.archive import *  # noqa: F403
+from domuwa.models.change import *  # noqa: F403
+from domuwa.models.deck import *  # noqa: F403
 from domuwa.models.game_category import *  # noqa: F403
 from domuwa.models.game_room import *  # noqa: F403
 from domuwa.models.game_type import *  # noqa: F403
 from domuwa.models.links import *  # noqa: F403
+from domuwa.models.play import *  # noqa: F403
 from domuwa.models.player import *  # noqa: F403
 from domuwa.models.player_score import *  # noqa: F403
 from domuwa.models.qna_category import *  # noqa: F403
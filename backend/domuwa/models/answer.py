@@ -1,5 +1,8 @@
+from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
+from pydantic import model_validator
+from sqlalchemy import Index, text
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -24,34 +27,65 @@ class AnswerBase(SQLModel):
 
 class Answer(SQLModel, table=True):
     __tablename__ = "answer"  # type: ignore
+    __table_args__ = (
+        # rows a game draws from, queries have to repeat the WHERE to use it
+        Index(
+            "ix_answer_playable",
+            "game_type_id",
+            "game_category_id",
+            sqlite_where=text("deleted = 0 AND excluded = 0"),
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     text: str = Field(min_length=TEXT_MIN_LEN, max_length=TEXT_MAX_LEN)
     excluded: bool = Field(default=False, index=True)
     deleted: bool = Field(False, index=True)
 
-    author_id: Optional[int] = Field(default=None, foreign_key="player.id")
+    author_id: Optional[int] = Field(
+        default=None,
+        foreign_key="player.id",
+        index=True,
+    )
     author: Optional["Player"] = Relationship(back_populates="answers")
 
-    game_type_id: Optional[int] = Field(default=None, foreign_key="game_type.id")
+    game_type_id: Optional[int] = Field(
+        default=None,
+        foreign_key="game_type.id",
+        index=True,
+    )
     game_type: Optional["GameType"] = Relationship(back_populates="answers")
 
-    game_category_id: Optional[int] = Field(default=None, foreign_key="qna_category.id")
+    game_category_id: Optional[int] = Field(
+        default=None,
+        foreign_key="qna_category.id",
+        index=True,
+    )
     game_category: Optional["QnACategory"] = Relationship(back_populates="answers")
 
-    prev_version_id: Optional[int] = Field(None, foreign_key="answer.id")
+    prev_version_id: Optional[int] = Field(
+        None,
+        foreign_key="answer.id",
+        index=True,
+    )
     prev_version: Optional["Answer"] = Relationship(
         back_populates="next_versions",
         sa_relationship_kwargs={"remote_side": "Answer.id"},
     )
     next_versions: list["Answer"] = Relationship(back_populates="prev_version")
+    # latest version of the chain, null on the latest version itself
+    head_id: Optional[int] = Field(None, index=True)
+    # when the row was deleted or superseded, null while it is live
+    retired_at: Optional[datetime] = Field(None, index=True)
 
     question_id: Optional[int] = Field(
         default=None,
         foreign_key="question.id",
         nullable=True,
+        index=True,
     )
-    question: Optional["Question"] = Relationship(back_populates="answers")
+    # the version the answer was added to, not always the latest one
+    question: Optional["Question"] = Relationship()
 
 
 class AnswerCreate(AnswerBase):
@@ -78,3 +112,10 @@ class AnswerRead(SQLModel):
     author: "PlayerRead"
     game_type: "GameTypeRead"
     game_category: "QnACategoryRead"
+
+    @model_validator(mode="before")
+    @classmethod
+    def use_cached_choices(cls, data: object) -> object:
+        from domuwa.services.choices_cache import with_cached_choices
+
+        return with_cached_choices(data)
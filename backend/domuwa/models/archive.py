@@ -0,0 +1,30 @@
+from sqlalchemy import Column, DateTime, Integer, Table
+from sqlmodel import SQLModel
+
+from domuwa.models.answer import Answer
+from domuwa.models.question import Question
+
+
+def archive_table(model_type: type[SQLModel]) -> Table:
+    """Table with the columns of ``model_type`` for rows moved out of it.
+
+    Foreign keys and indexes are left out, archived rows are only read back
+    by id and may point at rows that were archived before them.
+    """
+    table = model_type.__table__  # type: ignore
+    columns = [
+        Column(column.name, column.type, nullable=column.nullable)
+        for column in table.columns
+        if column.name != "id"
+    ]
+    return Table(
+        f"{table.name}_archive",
+        SQLModel.metadata,
+        Column("id", Integer, primary_key=True, autoincrement=False),
+        *columns,
+        Column("archived_at", DateTime, nullable=False, index=True),
+    )
+
+
+answer_archive = archive_table(Answer)
+question_archive = archive_table(Question)
@@ -0,0 +1,43 @@
+from datetime import datetime
+from enum import StrEnum
+from typing import Optional
+
+from sqlalchemy import JSON, Column, Index
+from sqlmodel import Field, SQLModel
+
+
+class ChangeOperation(StrEnum):
+    UPSERT = "upsert"
+    DELETE = "delete"
+
+
+class Change(SQLModel, table=True):
+    __tablename__ = "change"  # type: ignore
+    __table_args__ = (
+        Index("ix_change_table_name_row_id", "table_name", "row_id"),
+        # latest change of a table, for conditional GETs
+        Index("ix_change_table_name_seq", "table_name", "seq"),
+    )
+
+    seq: Optional[int] = Field(default=None, primary_key=True)
+    table_name: str
+    row_id: int
+    operation: ChangeOperation
+    # column values after the write, none for deletes
+    payload: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    created_at: datetime = Field(default_factory=datetime.now, index=True)
+
+
+class ChangeRead(SQLModel):
+    seq: int
+    table_name: str
+    row_id: int
+    payload: Optional[dict] = None
+
+
+class ChangesRead(SQLModel):
+    # pass as ``since`` to get the next changes
+    seq: int
+    upserted: list[ChangeRead]
+    deleted: list[ChangeRead]
+    has_more: bool
@@ -0,0 +1,52 @@
+from sqlmodel import Field, SQLModel
+
+from domuwa.models import answer, player, question
+from domuwa.models.game_type import GameTypeChoices
+from domuwa.models.qna_category import QnACategoryChoices
+
+# One NDJSON line of an exported deck. Rows reference each other by name,
+# not by id, so a deck can be imported into another database.
+
+
+class DeckAnswer(SQLModel):
+    text: str = Field(
+        min_length=answer.TEXT_MIN_LEN,
+        max_length=answer.TEXT_MAX_LEN,
+    )
+    excluded: bool = False
+    author: str | None = Field(
+        default=None,
+        min_length=player.NAME_MIN_LEN,
+        max_length=player.NAME_MAX_LEN,
+    )
+    game_type: GameTypeChoices
+    game_category: QnACategoryChoices
+
+
+class DeckQuestion(SQLModel):
+    text: str = Field(
+        min_length=question.TEXT_MIN_LEN,
+        max_length=question.TEXT_MAX_LEN,
+    )
+    excluded: bool = False
+    author: str | None = Field(
+        default=None,
+        min_length=player.NAME_MIN_LEN,
+        max_length=player.NAME_MAX_LEN,
+    )
+    game_type: GameTypeChoices
+    game_category: QnACategoryChoices
+    answers: list[DeckAnswer] = []
+
+
+class DeckImportError(SQLModel):
+    line: int
+    error: str
+
+
+class DeckImportResult(SQLModel):
+    questions: int = 0
+    answers: int = 0
+    skipped: int = 0
+    # only the first few, a broken file would otherwise echo itself back
+    errors: list[DeckImportError] = []
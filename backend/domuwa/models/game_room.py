@@ -1,17 +1,21 @@
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
+from pydantic import model_validator
 from sqlmodel import Field, Relationship, SQLModel
 
 from domuwa.models.links import GameRoomQuestionsLink
 
 if TYPE_CHECKING:
-    from domuwa.models.game_category import GameCategory
-    from domuwa.models.game_type import GameType
+    from domuwa.models.game_category import GameCategory, GameCategoryRead
+    from domuwa.models.game_type import GameType, GameTypeRead
     from domuwa.models.player import Player
-    from domuwa.models.question import Question
+    from domuwa.models.question import Question, QuestionWithAnswersRead
     from domuwa.models.ranking import Ranking
 
+ROUNDS_MIN = 1
+ROUNDS_MAX = 100
+
 
 class GameRoom(SQLModel, table=True):
     __tablename__ = "game_room"  # type: ignore
@@ -39,3 +43,34 @@ class GameRoom(SQLModel, table=True):
     players: list["Player"] = Relationship(back_populates="game_room")
 
     ranking: Optional["Ranking"] = Relationship(back_populates="game_room")
+
+
+class GameRoomCreate(SQLModel):
+    game_type_id: int
+    game_category_id: int
+    rounds: int = Field(15, ge=ROUNDS_MIN, le=ROUNDS_MAX)
+
+
+class GameRoomUpdate(SQLModel):
+    websocket: Optional[str] = None
+
+
+class GameRoomRead(SQLModel):
+    id: int
+    created_at: datetime
+    rounds: int
+    cur_round: int
+    game_type: "GameTypeRead"
+    game_category: "GameCategoryRead"
+
+    @model_validator(mode="before")
+    @classmethod
+    def use_cached_choices(cls, data: object) -> object:
+        from domuwa.services.choices_cache import with_cached_choices
+
+        return with_cached_choices(data)
+
+
+class GameRoundRead(SQLModel):
+    round: int
+    question: "QuestionWithAnswersRead"
@@ -1,9 +1,22 @@
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
 class GameRoomQuestionsLink(SQLModel, table=True):
+    __tablename__ = "gameroomquestionslink"  # type: ignore
+    # a round reads the question at its position, the next rounds come along
+    # from the same range of the index
+    __table_args__ = (
+        Index(
+            "ix_gameroomquestionslink_position",
+            "game_room_id",
+            "position",
+            unique=True,
+        ),
+    )
+
     game_room_id: Optional[int] = Field(
         None,
         foreign_key="game_room.id",
@@ -13,4 +26,8 @@ class GameRoomQuestionsLink(SQLModel, table=True):
         None,
         foreign_key="question.id",
         primary_key=True,
+        # the primary key only serves lookups by game room
+        index=True,
     )
+    # 1-based round the question is played in
+    position: int
@@ -0,0 +1,23 @@
+from typing import Optional
+
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+class Play(SQLModel, table=True):
+    """A vote or answer of a player in a round of a game room.
+
+    Written by the game room hub in batches, see ``domuwa.services.game_room_hub``.
+    """
+
+    __tablename__ = "play"  # type: ignore
+    __table_args__ = (
+        Index("ix_play_round", "game_room_id", "round", "player_id", unique=True),
+    )
+
+    id: Optional[int] = Field(None, primary_key=True)
+    game_room_id: Optional[int] = Field(None, foreign_key="game_room.id")
+    round: int
+    player_id: Optional[int] = Field(None, foreign_key="player.id")
+    # answer id, player id, or 1 and 0 for true and false, by game type
+    choice: int
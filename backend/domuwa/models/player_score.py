@@ -1,5 +1,6 @@
 from typing import TYPE_CHECKING, Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -9,8 +10,13 @@ if TYPE_CHECKING:
 
 class PlayerScore(SQLModel, table=True):
     __tablename__ = "player_score"  # type: ignore
+    __table_args__ = (
+        # a player has one score per ranking, written with a single UPSERT
+        Index("ix_player_score_ranking_player", "ranking_id", "player_id", unique=True),
+    )
 
     id: Optional[int] = Field(None, primary_key=True)
+    score: int = 0
 
     player_id: Optional[int] = Field(None, foreign_key="player.id")
     player: Optional["Player"] = Relationship(back_populates="player_scores")
@@ -1,11 +1,14 @@
+from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlmodel import Field, Relationship, SQLModel
+from pydantic import model_validator
+from sqlalchemy import Alias, ColumnElement, Index, and_, or_, text
+from sqlmodel import Field, Relationship, SQLModel, col
 
 from domuwa.models.links import GameRoomQuestionsLink
 
 if TYPE_CHECKING:
-    from domuwa.models.answer import Answer, AnswerRead
+    from domuwa.models.answer import Answer, AnswerCreate, AnswerRead
     from domuwa.models.game_room import GameRoom
     from domuwa.models.game_type import GameType, GameTypeRead
     from domuwa.models.player import Player, PlayerRead
@@ -25,29 +28,72 @@ class QuestionBase(SQLModel):
 
 class Question(SQLModel, table=True):
     __tablename__ = "question"  # type: ignore
+    __table_args__ = (
+        # rows a game draws from, queries have to repeat the WHERE to use it
+        Index(
+            "ix_question_playable",
+            "game_type_id",
+            "game_category_id",
+            sqlite_where=text("deleted = 0 AND excluded = 0"),
+        ),
+    )
 
     id: Optional[int] = Field(None, primary_key=True)
     text: str = Field(min_length=TEXT_MIN_LEN, max_length=TEXT_MAX_LEN)
     excluded: bool = Field(False, index=True)
     deleted: bool = Field(False, index=True)
 
-    author_id: Optional[int] = Field(None, foreign_key="player.id")
+    author_id: Optional[int] = Field(
+        None,
+        foreign_key="player.id",
+        index=True,
+    )
     author: Optional["Player"] = Relationship(back_populates="questions")
 
-    game_type_id: Optional[int] = Field(None, foreign_key="game_type.id")
+    game_type_id: Optional[int] = Field(
+        None,
+        foreign_key="game_type.id",
+        index=True,
+    )
     game_type: Optional["GameType"] = Relationship(back_populates="questions")
 
-    game_category_id: Optional[int] = Field(None, foreign_key="qna_category.id")
+    game_category_id: Optional[int] = Field(
+        None,
+        foreign_key="qna_category.id",
+        index=True,
+    )
     game_category: Optional["QnACategory"] = Relationship(back_populates="questions")
 
-    prev_version_id: Optional[int] = Field(None, foreign_key="question.id")
+    prev_version_id: Optional[int] = Field(
+        None,
+        foreign_key="question.id",
+        index=True,
+    )
     prev_version: Optional["Question"] = Relationship(
         back_populates="next_versions",
         sa_relationship_kwargs={"remote_side": "Question.id"},
     )
     next_versions: list["Question"] = Relationship(back_populates="prev_version")
-
-    answers: list["Answer"] = Relationship(back_populates="question")
+    # latest version of the chain, null on the latest version itself
+    head_id: Optional[int] = Field(None, index=True)
+    # when the row was deleted or superseded, null while it is live
+    retired_at: Optional[datetime] = Field(None, index=True)
+
+    # answers stay on the version they were added to, a question lists the
+    # latest versions of the answers of every version of it, so an edit moves
+    # none of them
+    answers: list["Answer"] = Relationship(
+        sa_relationship_kwargs={
+            "secondary": lambda: question_versions,
+            "primaryjoin": lambda: or_(
+                question_versions.c.id == Question.id,
+                question_versions.c.head_id == Question.id,
+            ),
+            "secondaryjoin": lambda: answers_secondaryjoin(),
+            "order_by": "Answer.id",
+            "viewonly": True,
+        },
+    )
 
     game_rooms: list["GameRoom"] = Relationship(
         back_populates="questions",
@@ -55,10 +101,27 @@ class Question(SQLModel, table=True):
     )
 
 
+question_versions: Alias = Question.__table__.alias("question_version")  # type: ignore
+
+
+def answers_secondaryjoin() -> ColumnElement[bool]:
+    from domuwa.models.answer import Answer
+
+    return and_(
+        question_versions.c.id == Answer.question_id,
+        col(Answer.head_id).is_(None),
+    )
+
+
 class QuestionCreate(QuestionBase):
     pass
 
 
+class QuestionWithAnswersCreate(QuestionCreate):
+    # question_id of the answers is ignored, they belong to this question
+    answers: list["AnswerCreate"] = []
+
+
 class QuestionUpdate(SQLModel):
     text: Optional[str] = Field(None, min_length=TEXT_MIN_LEN, max_length=TEXT_MAX_LEN)
     excluded: Optional[bool] = None
@@ -74,6 +137,13 @@ class QuestionRead(SQLModel):
     game_type: "GameTypeRead"
     game_category: "QnACategoryRead"
 
+    @model_validator(mode="before")
+    @classmethod
+    def use_cached_choices(cls, data: object) -> object:
+        from domuwa.services.choices_cache import with_cached_choices
+
+        return with_cached_choices(data)
+
 
 class QuestionWithAnswersRead(QuestionRead):
     answers: list["AnswerRead"]
@@ -12,7 +12,20 @@ class Ranking(SQLModel, table=True):
 
     id: Optional[int] = Field(None, primary_key=True)
 
-    game_room_id: Optional[int] = Field(None, foreign_key="game_room.id")
+    game_room_id: Optional[int] = Field(
+        None,
+        foreign_key="game_room.id",
+        index=True,
+        unique=True,
+    )
     game_room: Optional["GameRoom"] = Relationship(back_populates="ranking")
 
     player_scores: list["PlayerScore"] = Relationship(back_populates="ranking")
+
+
+class PlayerRankRead(SQLModel):
+    rank: int
+    player_id: int
+    name: str
+    # points in a game room, games won otherwise
+    score: int
@@ -1,16 +1,18 @@
 import logging
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing_extensions import override
 
 from domuwa.database import get_db_session
 from domuwa.models.answer import Answer, AnswerCreate, AnswerRead, AnswerUpdate
-from domuwa.routers.common_router import CommonRouter
+from domuwa.routers.common_router import MAX_BULK_SIZE, VersionedRouter
 from domuwa.services.answers_services import AnswerServices
+from domuwa.services.common_services import BulkCreateResult, BulkUpdateResult
 
 
-class AnswerRouter(CommonRouter[AnswerCreate, AnswerUpdate, Answer]):
+class AnswerRouter(VersionedRouter[AnswerCreate, AnswerUpdate, Answer]):
     prefix = "/answers"
     tags = ["Answer"]
     response_model = AnswerRead
@@ -18,6 +20,7 @@ class AnswerRouter(CommonRouter[AnswerCreate, AnswerUpdate, Answer]):
     services = AnswerServices()
     logger = logging.getLogger(__name__)
     db_model_type_name = Answer.__name__
+    fast_lists = True
 
     def __init__(self) -> None:
         super().__init__()
@@ -32,12 +35,30 @@ class AnswerRouter(CommonRouter[AnswerCreate, AnswerUpdate, Answer]):
             methods=["POST"],
             response_model=AnswerRead,
         )
+        self.router.add_api_route(
+            "/bulk",
+            self.create_bulk,
+            methods=["POST"],
+            response_model=list[BulkCreateResult],
+        )
+        self.router.add_api_route(
+            "/bulk-exclude",
+            self.exclude_many,
+            methods=["POST"],
+            response_model=BulkUpdateResult,
+        )
+        self.router.add_api_route(
+            "/bulk-delete",
+            self.delete_many,
+            methods=["POST"],
+            response_model=BulkUpdateResult,
+        )
 
     @override
     async def get_by_id(
         self,
         model_id: int,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         model = await super().get_by_id(model_id, session)
         if not model.deleted:
@@ -51,16 +72,23 @@ class AnswerRouter(CommonRouter[AnswerCreate, AnswerUpdate, Answer]):
     async def create(
         self,
         model: AnswerCreate,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         return await super().create(model, session)
 
+    async def create_bulk(
+        self,
+        models: Annotated[list[AnswerCreate], Body(max_length=MAX_BULK_SIZE)],
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        return await self.services.create_bulk(models, session)
+
     @override
     async def update(
         self,
         model_id: int,
         model_update: AnswerUpdate,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         return await super().update(model_id, model_update, session)
 
@@ -0,0 +1,44 @@
+import logging
+from enum import Enum
+from typing import Annotated, ClassVar
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.database import get_db_session
+from domuwa.models.change import ChangesRead
+from domuwa.services.changes_services import ChangeServices
+
+DEFAULT_CHANGES_LIMIT = 1000
+MAX_CHANGES_LIMIT = 10_000
+
+
+class ChangeRouter:
+    prefix = "/changes"
+    tags: ClassVar[list[str | Enum]] = ["Change"]
+    router = APIRouter(prefix=prefix, tags=tags)
+    services = ChangeServices()
+    logger = logging.getLogger(__name__)
+
+    def __init__(self) -> None:
+        self.router.add_api_route(
+            "/",
+            self.get_since,
+            methods=["GET"],
+            response_model=ChangesRead,
+        )
+
+    async def get_since(
+        self,
+        since: Annotated[int, Query(ge=0)] = 0,
+        limit: Annotated[
+            int,
+            Query(ge=1, le=MAX_CHANGES_LIMIT),
+        ] = DEFAULT_CHANGES_LIMIT,
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        return await self.services.get_since(since, limit, session)
+
+
+def get_changes_router():
+    return ChangeRouter().router
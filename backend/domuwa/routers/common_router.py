@@ -1,19 +1,62 @@
+import base64
+import binascii
 import logging
 from abc import ABC, abstractmethod
-from typing import Generic, final
+from email.utils import formatdate, parsedate_to_datetime
+from functools import cached_property
+from typing import Annotated, Generic, final
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import SQLModel, Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import TypeAdapter
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.responses import Response
 
 from domuwa.database import get_db_session
+from domuwa.services import change_counters, changes_services
 from domuwa.services.common_services import (
+    BulkSelection,
+    BulkUpdateResult,
     CommonServices,
     CreateModelT,
     DbModelT,
+    GetAllFilters,
     UpdateModelT,
+    VersionedServices,
 )
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+MAX_BULK_SIZE = 5000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # weak comparison, If-None-Match never needs the strong one
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def modified_since(if_modified_since: str, last_modified: float) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return True
+    # HTTP dates have a resolution of one second
+    return int(last_modified) > since
+
+
+def encode_cursor(model_id: int) -> str:
+    return base64.urlsafe_b64encode(str(model_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    padding = "=" * (-len(cursor) % 4)
+    try:
+        return int(base64.urlsafe_b64decode(cursor + padding).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError(f"invalid cursor: {cursor!r}") from exc
+
 
 class CommonRouter(ABC, Generic[CreateModelT, UpdateModelT, DbModelT]):
     prefix: str
@@ -23,6 +66,8 @@ class CommonRouter(ABC, Generic[CreateModelT, UpdateModelT, DbModelT]):
     services: CommonServices[CreateModelT, UpdateModelT, DbModelT]
     logger: logging.Logger
     db_model_type_name: str
+    # list pages skip FastAPI's response handling, see fast_list_response
+    fast_lists: bool = False
     __lookup = "{model_id}"
 
     def __init__(self) -> None:
@@ -40,12 +85,14 @@ class CommonRouter(ABC, Generic[CreateModelT, UpdateModelT, DbModelT]):
             self.get_all,
             methods=["GET"],
             response_model=list[self.response_model],  # type: ignore
+            dependencies=[Depends(self.check_not_modified)],
         )
         self.router.add_api_route(
             f"/{self.__lookup}",
             self.get_by_id,
             methods=["GET"],
             response_model=self.response_model,
+            dependencies=[Depends(self.check_not_modified)],
         )
         self.router.add_api_route(
             f"/{self.__lookup}",
@@ -61,11 +108,58 @@ class CommonRouter(ABC, Generic[CreateModelT, UpdateModelT, DbModelT]):
             response_class=Response,
         )
 
+    @cached_property
+    def list_adapter(self) -> TypeAdapter[list[SQLModel]]:
+        return TypeAdapter(list[self.response_model])  # type: ignore
+
+    @final
+    async def warm_up(self, session: AsyncSession) -> None:
+        """Read and serialize one page of rows, so the first request finds the
+        statement compiled and the validators built."""
+        models = await self.services.get_all(session, GetAllFilters(), None, 1)
+        self.list_adapter.dump_json(
+            self.list_adapter.validate_python(models, from_attributes=True)
+        )
+
+    @final
+    async def check_not_modified(
+        self,
+        request: Request,
+        response: Response,
+        session: AsyncSession = Depends(get_db_session),
+    ) -> None:
+        """Answer conditional GETs with 304 before any row is read, only the
+        latest changes of the tables are looked up in the change log."""
+        tables = self.services.read_tables
+        change_counters.observe(await changes_services.get_latest_seqs(tables, session))
+        headers = {
+            "ETag": change_counters.etag(tables),
+            "Last-Modified": formatdate(
+                change_counters.last_modified(tables),
+                usegmt=True,
+            ),
+        }
+        if_none_match = request.headers.get("If-None-Match")
+        if_modified_since = request.headers.get("If-Modified-Since")
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, headers["ETag"])
+        elif if_modified_since is not None:
+            not_modified = not modified_since(
+                if_modified_since,
+                change_counters.last_modified(tables),
+            )
+        else:
+            not_modified = False
+
+        if not_modified:
+            raise HTTPException(status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
     @final
     async def get_instance(
         self,
         model_id: int,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ) -> DbModelT:
         instance = await self.services.get_by_id(model_id, session)
         if instance is None:
@@ -77,18 +171,70 @@ class CommonRouter(ABC, Generic[CreateModelT, UpdateModelT, DbModelT]):
     async def get_by_id(
         self,
         model_id: int,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         return await self.get_instance(model_id, session)
 
-    async def get_all(self, session: Session = Depends(get_db_session)):
-        return await self.services.get_all(session)
+    async def get_all(
+        self,
+        response: Response,
+        filters: Annotated[GetAllFilters, Depends()],
+        after_id: Annotated[int | None, Query(ge=0)] = None,
+        cursor: str | None = None,
+        limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        unsupported = [
+            field
+            for field in filters.model_dump(exclude_none=True)
+            if field not in self.services.filter_fields
+        ]
+        if unsupported:
+            err_msg = f"{self.db_model_type_name} cannot be filtered by {unsupported}"
+            self.logger.warning(err_msg)
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, err_msg)
+
+        if cursor is not None:
+            try:
+                after_id = decode_cursor(cursor)
+            except ValueError as exc:
+                self.logger.warning(str(exc))
+                raise HTTPException(status.HTTP_400_BAD_REQUEST, str(exc))
+
+        # one extra row tells if there is a next page
+        models = await self.services.get_all(session, filters, after_id, limit + 1)
+        if len(models) > limit:
+            models = models[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(models[-1].id)  # type: ignore
+        if self.fast_lists:
+            return self.fast_list_response(models, response)
+        return models
+
+    @final
+    def fast_list_response(
+        self, models: list[DbModelT], response: Response
+    ) -> Response:
+        """Serialize a list page straight to JSON bytes.
+
+        FastAPI walks the rows in Python, validates them, dumps them to dicts and
+        encodes those with ``json``. Here pydantic validates the rows and writes
+        the JSON in one pass each, the body is the same. The headers set by the
+        dependencies are copied over, FastAPI leaves them out of a returned
+        response.
+        """
+        content = self.list_adapter.dump_json(
+            self.list_adapter.validate_python(models, from_attributes=True),
+            by_alias=True,
+        )
+        return Response(
+            content, media_type="application/json", headers=response.headers
+        )
 
     @abstractmethod
     async def create(
         self,
         model: CreateModelT,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         self.logger.debug(
             "got %s(%s) to create",
@@ -102,7 +248,7 @@ class CommonRouter(ABC, Generic[CreateModelT, UpdateModelT, DbModelT]):
         self,
         model_id: int,
         model_update: UpdateModelT,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         self.logger.debug(
             "got %s(%s) to update %s(id=%d)",
@@ -114,7 +260,9 @@ class CommonRouter(ABC, Generic[CreateModelT, UpdateModelT, DbModelT]):
         model = await self.get_instance(model_id, session)
         return await self.services.update(model, model_update, session)
 
-    async def delete(self, model_id: int, session: Session = Depends(get_db_session)):
+    async def delete(
+        self, model_id: int, session: AsyncSession = Depends(get_db_session)
+    ):
         self.logger.debug(
             "got %s(id=%d) to delete",
             self.db_model_type_name,
@@ -123,13 +271,31 @@ class CommonRouter(ABC, Generic[CreateModelT, UpdateModelT, DbModelT]):
         model = await self.get_instance(model_id, session)
         return await self.services.delete(model, session)
 
+    async def exclude_many(
+        self,
+        selection: BulkSelection,
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        self.logger.debug("got %s to exclude", selection)
+        count = await self.services.exclude_many(selection, session)
+        return BulkUpdateResult(count=count)
+
+    async def delete_many(
+        self,
+        selection: BulkSelection,
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        self.logger.debug("got %s to delete", selection)
+        count = await self.services.delete_many(selection, session)
+        return BulkUpdateResult(count=count)
+
 
 class CommonRouter400OnSaveError(CommonRouter[CreateModelT, UpdateModelT, DbModelT]):
     @abstractmethod
     async def create(
         self,
         model: CreateModelT,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         db_model = await super().create(model, session)
         if db_model is None:
@@ -143,7 +309,7 @@ class CommonRouter400OnSaveError(CommonRouter[CreateModelT, UpdateModelT, DbMode
         self,
         model_id: int,
         model_update: UpdateModelT,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         db_model = await self.get_instance(model_id, session)
         model_updated = await self.services.update(db_model, model_update, session)
@@ -152,3 +318,76 @@ class CommonRouter400OnSaveError(CommonRouter[CreateModelT, UpdateModelT, DbMode
             self.logger.warning(err_msg)
             raise HTTPException(status.HTTP_400_BAD_REQUEST, err_msg)
         return model_updated
+
+
+class VersionedRouter(CommonRouter[CreateModelT, UpdateModelT, DbModelT]):
+    services: VersionedServices[CreateModelT, UpdateModelT, DbModelT]
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.router.add_api_route(
+            "/{model_id}/history",
+            self.get_history,
+            methods=["GET"],
+            response_model=list[self.response_model],  # type: ignore
+            dependencies=[Depends(self.check_not_modified)],
+        )
+        self.router.add_api_route(
+            "/{model_id}/latest",
+            self.get_latest,
+            methods=["GET"],
+            response_model=self.response_model,
+            dependencies=[Depends(self.check_not_modified)],
+        )
+
+    @abstractmethod
+    async def update(
+        self,
+        model_id: int,
+        model_update: UpdateModelT,
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        self.logger.debug(
+            "got %s(%s) to update %s(id=%d)",
+            self.db_model_type_name,
+            model_update,
+            self.db_model_type_name,
+            model_id,  # type: ignore
+        )
+        model = await self.get_instance(model_id, session)
+        # a new version of a superseded one would fork the chain
+        head_id = model.head_id  # type: ignore
+        if head_id is not None:
+            err_msg = (
+                f"{self.db_model_type_name}(id={model_id}) was replaced by "
+                f"{self.db_model_type_name}(id={head_id}), "
+                "only the latest version can be updated"
+            )
+            self.logger.warning(err_msg)
+            raise HTTPException(status.HTTP_409_CONFLICT, err_msg)
+        return await self.services.update(model, model_update, session)
+
+    async def get_history(
+        self,
+        model_id: int,
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        history = await self.services.get_history(model_id, session)
+        if not history:
+            err_msg = f"{self.db_model_type_name}(id={model_id}) not found"
+            self.logger.warning(err_msg)
+            raise HTTPException(status.HTTP_404_NOT_FOUND, err_msg)
+        return history
+
+    async def get_latest(
+        self,
+        model_id: int,
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        model = await self.services.get_latest(model_id, session)
+        if model is None:
+            err_msg = f"{self.db_model_type_name}(id={model_id}) not found"
+            self.logger.warning(err_msg)
+            raise HTTPException(status.HTTP_404_NOT_FOUND, err_msg)
+        return model
@@ -0,0 +1,58 @@
+import logging
+from enum import Enum
+from typing import ClassVar
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.database import get_db_session, get_db_session_maker
+from domuwa.models.deck import DeckImportResult
+from domuwa.services.decks_services import DeckServices, iter_lines
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class DeckRouter:
+    prefix = "/decks"
+    tags: ClassVar[list[str | Enum]] = ["Deck"]
+    router = APIRouter(prefix=prefix, tags=tags)
+    services = DeckServices()
+    logger = logging.getLogger(__name__)
+
+    def __init__(self) -> None:
+        self.router.add_api_route(
+            "/export",
+            self.export,
+            methods=["GET"],
+            response_class=StreamingResponse,
+        )
+        self.router.add_api_route(
+            "/import",
+            self.import_deck,
+            methods=["POST"],
+            response_model=DeckImportResult,
+        )
+
+    async def export(
+        self,
+        session_maker: async_sessionmaker[AsyncSession] = Depends(get_db_session_maker),
+    ):
+        async def stream_deck():
+            async with session_maker() as session:
+                async for line in self.services.export(session):
+                    yield line
+
+        return StreamingResponse(stream_deck(), media_type=NDJSON_MEDIA_TYPE)
+
+    async def import_deck(
+        self,
+        request: Request,
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        return await self.services.import_lines(iter_lines(request.stream()), session)
+
+
+def get_decks_router():
+    return DeckRouter().router
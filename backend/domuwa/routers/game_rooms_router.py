@@ -1,88 +1,133 @@
-from fastapi import APIRouter
+import logging
 
-router = APIRouter(prefix="/game_room", tags=["Game Room"])
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, status
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.websockets import WebSocketDisconnect, WebSocketState
+from typing_extensions import override
 
+from domuwa.database import get_db_session, get_db_session_maker
+from domuwa.models.game_room import (
+    GameRoom,
+    GameRoomCreate,
+    GameRoomRead,
+    GameRoomUpdate,
+    GameRoundRead,
+)
+from domuwa.routers.common_router import CommonRouter400OnSaveError
+from domuwa.services.game_room_hub import hub
+from domuwa.services.game_rooms_services import GameRoomServices
+from domuwa.services.players_services import PlayerServices
 
-# @router.post("/", status_code=status.HTTP_201_CREATED, response_model=None)
-# def create_game_room(
-#     request: Request,
-#     name: str,
-#     category: str,
-#     db_sess: Session = Depends(db.get_db_session),
-# ) -> schemas.GameRoomSchema:
-#     game = schemas.GameRoomCreateSchema(game_name=name, game_category=category)
-#     db_game_room = services.create_game_room(game, db_sess)
-#     return create_game_room_view(db_game_room)
-#
-#
-# @router.get("/{game_room_id}", response_model=None)
-# def get_game_room_by_id(
-#     request: Request,
-#     game_room_id: int,
-#     db_sess: Session = Depends(db.get_db_session),
-# ) -> schemas.GameRoomSchema:
-#     game_room = db.get_obj_of_type_by_id(
-#         game_room_id,
-#         DbGameRoom,
-#         "GameRoom",
-#         db_sess,
-#     )
-#     return create_game_room_view(game_room)
-#
-#
-# @router.get("/", response_model=None)
-# def get_all_game_rooms(
-#     request: Request,
-#     db_sess: Session = Depends(db.get_db_session),
-# ) -> list[schemas.GameRoomSchema]:
-#     game_rooms = db.get_all_objs_of_type(DbGameRoom, db_sess)
-#     return [create_game_room_view(game) for game in game_rooms]
-#
-#
-# @router.put("/add_player", response_model=None)
-# def add_player(
-#     request: Request,
-#     game_room_id: int,
-#     player_id: int,
-#     db_sess: Session = Depends(db.get_db_session),
-# ) -> schemas.GameRoomSchema:
-#     game_room = services.add_player(game_room_id, player_id, db_sess)
-#     return create_game_room_view(game_room)
-#
-#
-# @router.put("/remove_player", response_model=None)
-# def remove_player(
-#     request: Request,
-#     game_room_id: int,
-#     player_id: int,
-#     db_sess: Session = Depends(db.get_db_session),
-# ) -> schemas.GameRoomSchema:
-#     game_room = services.remove_player(game_room_id, player_id, db_sess)
-#     return create_game_room_view(game_room)
-#
-#
-# @router.put("/remove_player", response_model=None)
-# def remove_players(
-#     request: Request,
-#     game_room_id: int,
-#     db_sess: Session = Depends(db.get_db_session),
-# ) -> schemas.GameRoomSchema:
-#     game_room = services.remove_all_players(game_room_id, db_sess)
-#     return create_game_room_view(game_room)
-#
-#
-# @router.delete(
-#     "/",
-#     status_code=status.HTTP_204_NO_CONTENT,
-#     response_class=Response,
-#     response_model=None,
-# )
-# def delete_game_room(
-#     game_room_id: int,
-#     db_sess: Session = Depends(db.get_db_session),
-# ) -> None:
-#     services.delete_game_room(game_room_id, db_sess)
-#
-#
-# def create_game_room_view(game: DbGameRoom) -> schemas.GameRoomSchema:
-#     return schemas.GameRoomSchema.model_validate(game)
+
+class GameRoomRouter(
+    CommonRouter400OnSaveError[GameRoomCreate, GameRoomUpdate, GameRoom]
+):
+    prefix = "/game-rooms"
+    tags = ["Game Room"]
+    router = APIRouter(prefix=prefix, tags=tags)  # type: ignore
+    response_model = GameRoomRead
+    services: GameRoomServices = GameRoomServices()
+    logger = logging.getLogger(__name__)
+    db_model_type_name = GameRoom.__name__
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.router.add_api_route(
+            "/{model_id}/round",
+            self.get_round,
+            methods=["GET"],
+            response_model=GameRoundRead,
+        )
+        self.router.add_api_route(
+            "/{model_id}/next-round",
+            self.next_round,
+            methods=["POST"],
+            response_model=GameRoundRead,
+        )
+        self.router.add_api_websocket_route("/{model_id}/ws", self.play)
+
+    @override
+    async def create(
+        self,
+        model: GameRoomCreate,
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        return await super().create(model, session)
+
+    @override
+    async def update(
+        self,
+        model_id: int,
+        model_update: GameRoomUpdate,
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        return await super().update(model_id, model_update, session)
+
+    async def get_round(
+        self,
+        model_id: int,
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        game_room = await self.get_instance(model_id, session)
+        room = hub.rooms.get(model_id)
+        if room is not None:
+            # rounds of a live game room are written to the database later
+            game_round = room.round
+        else:
+            game_round = await hub.get_round_data(game_room, session)
+        if game_round is None:
+            err_msg = f"{self.db_model_type_name}(id={model_id}) has not started"
+            self.logger.warning(err_msg)
+            raise HTTPException(status.HTTP_404_NOT_FOUND, err_msg)
+        return game_round
+
+    async def next_round(
+        self,
+        model_id: int,
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        game_room = await self.get_instance(model_id, session)
+        room = hub.rooms.get(model_id)
+        game_round = None
+        if room is not None:
+            # players are connected, the hub starts the round and tells them
+            game_round = await hub.next_round(room)
+        elif question := await self.services.next_round(game_room, session):
+            game_round = GameRoundRead(round=game_room.cur_round, question=question)  # type: ignore
+        if game_round is None:
+            err_msg = f"{self.db_model_type_name}(id={model_id}) has no rounds left"
+            self.logger.warning(err_msg)
+            raise HTTPException(status.HTTP_409_CONFLICT, err_msg)
+        return game_round
+
+    async def play(
+        self,
+        websocket: WebSocket,
+        model_id: int,
+        player_id: int,
+        session_maker: async_sessionmaker[AsyncSession] = Depends(get_db_session_maker),
+    ):
+        async with session_maker() as session:
+            player = await PlayerServices().get_by_id(player_id, session)
+        room = await hub.get_room(model_id, session_maker) if player else None
+        if room is None:
+            err_msg = f"Player(id={player_id}) cannot join {self.db_model_type_name}(id={model_id})"
+            self.logger.warning(err_msg)
+            await websocket.close(status.WS_1008_POLICY_VIOLATION, err_msg)
+            return
+
+        await websocket.accept()
+        connection = await hub.join(room, player_id, websocket)
+        try:
+            while websocket.application_state == WebSocketState.CONNECTED:
+                await hub.handle(connection, await websocket.receive_text())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            await hub.leave(connection)
+
+
+def get_game_rooms_router():
+    return GameRoomRouter().router
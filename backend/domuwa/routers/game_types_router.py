@@ -1,7 +1,7 @@
 import logging
 
 from fastapi import APIRouter, Depends
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing_extensions import override
 
 from domuwa.database import get_db_session
@@ -36,7 +36,7 @@ class GameTypeRouter(
     async def create(
         self,
         model: GameTypeCreate,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         return await super().create(model, session)
 
@@ -46,13 +46,15 @@ class GameTypeRouter(
         self,
         model_id: int,
         model_update: GameTypeUpdate,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         return await super().update(model_id, model_update, session)
 
     # TODO: add auth user
     @override
-    async def delete(self, model_id: int, session: Session = Depends(get_db_session)):
+    async def delete(
+        self, model_id: int, session: AsyncSession = Depends(get_db_session)
+    ):
         return await super().delete(model_id, session)
 
 
@@ -1,7 +1,7 @@
 import logging
 
 from fastapi import APIRouter, Depends
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing_extensions import override
 
 from domuwa.database import get_db_session
@@ -28,7 +28,7 @@ class PlayerRouter(CommonRouter400OnSaveError[PlayerCreate, PlayerUpdate, Player
     async def create(
         self,
         model: PlayerCreate,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         return await super().create(model, session)
 
@@ -37,7 +37,7 @@ class PlayerRouter(CommonRouter400OnSaveError[PlayerCreate, PlayerUpdate, Player
         self,
         model_id: int,
         model_update: PlayerUpdate,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         return await super().update(model_id, model_update, session)
 
@@ -2,7 +2,7 @@ import logging
 
 from fastapi import Depends
 from fastapi.routing import APIRouter
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing_extensions import override
 
 from domuwa.database import get_db_session
@@ -32,7 +32,7 @@ class QnACategoriesRouter(
     async def create(
         self,
         model: QnACategoryCreate,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         return await super().create(model, session)
 
@@ -42,13 +42,15 @@ class QnACategoriesRouter(
         self,
         model_id: int,
         model_update: QnACategoryUpdate,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         return await super().update(model_id, model_update, session)
 
     # TODO: add admin auth
     @override
-    async def delete(self, model_id: int, session: Session = Depends(get_db_session)):
+    async def delete(
+        self, model_id: int, session: AsyncSession = Depends(get_db_session)
+    ):
         return await super().delete(model_id, session)
 
 
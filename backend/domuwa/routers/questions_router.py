@@ -1,7 +1,8 @@
 import logging
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing_extensions import override
 
 from domuwa.database import get_db_session
@@ -10,13 +11,18 @@ from domuwa.models.question import (
     QuestionCreate,
     QuestionRead,
     QuestionUpdate,
+    QuestionWithAnswersCreate,
     QuestionWithAnswersRead,
 )
-from domuwa.routers.common_router import CommonRouter
-from domuwa.services.questions_services import QuestionServices
+from domuwa.routers.common_router import MAX_BULK_SIZE, VersionedRouter
+from domuwa.services.common_services import BulkUpdateResult
+from domuwa.services.questions_services import (
+    QuestionBulkCreateResult,
+    QuestionServices,
+)
 
 
-class QuestionRouter(CommonRouter[QuestionCreate, QuestionUpdate, Question]):
+class QuestionRouter(VersionedRouter[QuestionCreate, QuestionUpdate, Question]):
     prefix = "/questions"
     tags = ["Question"]
     router = APIRouter(prefix=prefix, tags=tags)  # type: ignore
@@ -24,6 +30,7 @@ class QuestionRouter(CommonRouter[QuestionCreate, QuestionUpdate, Question]):
     services = QuestionServices()
     logger = logging.getLogger(__name__)
     db_model_type_name = Question.__name__
+    fast_lists = True
 
     def __init__(self) -> None:
         super().__init__()
@@ -38,12 +45,30 @@ class QuestionRouter(CommonRouter[QuestionCreate, QuestionUpdate, Question]):
             methods=["POST"],
             response_model=QuestionRead,
         )
+        self.router.add_api_route(
+            "/bulk",
+            self.create_bulk,
+            methods=["POST"],
+            response_model=list[QuestionBulkCreateResult],
+        )
+        self.router.add_api_route(
+            "/bulk-exclude",
+            self.exclude_many,
+            methods=["POST"],
+            response_model=BulkUpdateResult,
+        )
+        self.router.add_api_route(
+            "/bulk-delete",
+            self.delete_many,
+            methods=["POST"],
+            response_model=BulkUpdateResult,
+        )
 
     @override
     async def get_by_id(
         self,
         model_id: int,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         model = await super().get_by_id(model_id, session)
         if not model.deleted:
@@ -57,16 +82,26 @@ class QuestionRouter(CommonRouter[QuestionCreate, QuestionUpdate, Question]):
     async def create(
         self,
         model: QuestionCreate,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         return await super().create(model, session)
 
+    async def create_bulk(
+        self,
+        models: Annotated[
+            list[QuestionWithAnswersCreate],
+            Body(max_length=MAX_BULK_SIZE),
+        ],
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        return await self.services.create_bulk(models, session)  # type: ignore
+
     @override
     async def update(
         self,
         model_id: int,
         model_update: QuestionUpdate,
-        session: Session = Depends(get_db_session),
+        session: AsyncSession = Depends(get_db_session),
     ):
         return await super().update(model_id, model_update, session)
 
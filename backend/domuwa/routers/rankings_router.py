@@ -0,0 +1,113 @@
+import logging
+from enum import Enum
+from typing import Annotated, ClassVar, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.database import get_db_session
+from domuwa.models.ranking import PlayerRankRead
+from domuwa.services import leaderboards
+from domuwa.services.game_room_hub import hub
+from domuwa.services.leaderboards import Leaderboard
+from domuwa.services.players_services import PlayerServices
+from domuwa.services.rankings_services import RankingServices
+
+DEFAULT_TOP = 10
+MAX_TOP = 100
+
+
+class RankingRouter:
+    prefix = "/rankings"
+    tags: ClassVar[list[str | Enum]] = ["Ranking"]
+    router = APIRouter(prefix=prefix, tags=tags)
+    services = RankingServices()
+    logger = logging.getLogger(__name__)
+
+    def __init__(self) -> None:
+        self.router.add_api_route(
+            "/top",
+            self.get_top,
+            methods=["GET"],
+            response_model=list[PlayerRankRead],
+        )
+        self.router.add_api_route(
+            "/players/{player_id}",
+            self.get_rank,
+            methods=["GET"],
+            response_model=PlayerRankRead,
+        )
+
+    async def get_leaderboard(
+        self,
+        game_room_id: Optional[int],
+        session: AsyncSession,
+    ) -> Leaderboard:
+        """The global leaderboard, or the one of a game room."""
+        if game_room_id is None:
+            return await leaderboards.get_global(session)
+        room = hub.rooms.get(game_room_id)
+        if room is not None:
+            return room.leaderboard
+        leaderboard = await self.services.get_room_leaderboard(game_room_id, session)
+        if leaderboard is None:
+            err_msg = f"GameRoom(id={game_room_id}) has no ranking"
+            self.logger.warning(err_msg)
+            raise HTTPException(status.HTTP_404_NOT_FOUND, err_msg)
+        return leaderboard
+
+    async def get_top(
+        self,
+        k: Annotated[int, Query(ge=1, le=MAX_TOP)] = DEFAULT_TOP,
+        game_room_id: Optional[int] = None,
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        leaderboard = await self.get_leaderboard(game_room_id, session)
+        top = leaderboard.top(k)
+        names = await self.services.get_names(
+            [player_id for player_id, _ in top],
+            session,
+        )
+        return [
+            PlayerRankRead(
+                rank=leaderboard.rank_of(score),
+                player_id=player_id,
+                name=names[player_id],
+                score=score,
+            )
+            for player_id, score in top
+            if player_id in names
+        ]
+
+    async def get_rank(
+        self,
+        player_id: int,
+        game_room_id: Optional[int] = None,
+        session: AsyncSession = Depends(get_db_session),
+    ):
+        player = await PlayerServices().get_by_id(player_id, session)
+        if player is None:
+            err_msg = f"Player(id={player_id}) not found"
+            self.logger.warning(err_msg)
+            raise HTTPException(status.HTTP_404_NOT_FOUND, err_msg)
+        leaderboard = await self.get_leaderboard(game_room_id, session)
+        score = leaderboard.score(player_id)
+        if score is None and game_room_id is not None:
+            err_msg = (
+                f"Player(id={player_id}) did not play in GameRoom(id={game_room_id})"
+            )
+            self.logger.warning(err_msg)
+            raise HTTPException(status.HTTP_404_NOT_FOUND, err_msg)
+        if score is None:
+            # has not played a game yet
+            score = 0
+        return PlayerRankRead(
+            rank=leaderboard.rank_of(score),
+            player_id=player_id,
+            name=player.name,
+            score=score,
+        )
+
+
+def get_rankings_router():
+    return RankingRouter().router
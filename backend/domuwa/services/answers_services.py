@@ -1,45 +1,33 @@
 import logging
 
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing_extensions import override
 
-from domuwa.models.answer import Answer, AnswerCreate, AnswerUpdate
-from domuwa.services.common_services import CommonServices
+from domuwa.models.answer import Answer, AnswerCreate, AnswerRead, AnswerUpdate
+from domuwa.services import change_counters, changes_services
+from domuwa.services.common_services import BulkSelection, VersionedServices
 
 
-class AnswerServices(CommonServices[AnswerCreate, AnswerUpdate, Answer]):
+class AnswerServices(VersionedServices[AnswerCreate, AnswerUpdate, Answer]):
     db_model_type = Answer
     logger = logging.getLogger(__name__)
+    read_model_type = AnswerRead
 
     @override
     async def update(
         self,
         model: Answer,
         model_update: AnswerUpdate,
-        session: Session,
+        session: AsyncSession,
     ):
-        update_data = model_update.model_dump(exclude_unset=True)
-        model_data = model.model_dump(exclude={"id"}) | update_data
-        updated_model = Answer(**model_data)
-
-        updated_model.prev_version = model
-        model.next_versions.append(updated_model)
-
-        question = model.question
-        if question is not None:
-            question.answers.remove(model)
-            question.answers.append(updated_model)
-            session.add(question)
-
-        session.add(updated_model)
-        session.add(model)
-        session.commit()
-        session.refresh(updated_model)
-        return updated_model
+        # the new version stays on the question of the old one, which lists
+        # only the latest versions
+        updated_model = await self.insert_version(model, model_update, session)
+        changes_services.record(session, updated_model)
+        await session.commit()
+        change_counters.bump(self.table_name)
+        return await self.get_by_id(updated_model.id, session)  # type: ignore
 
     @override
-    async def delete(self, model: Answer, session: Session):
-        model.deleted = True
-        session.add(model)
-        session.commit()
-        self.logger.debug("marked %s(id=%d) as deleted", Answer.__name__, model.id)  # type: ignore
+    async def delete(self, model: Answer, session: AsyncSession):
+        await self.delete_many(BulkSelection(ids=[model.id]), session)  # type: ignore
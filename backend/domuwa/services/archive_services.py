@@ -0,0 +1,197 @@
+"""Archive of questions and answers retired from the hot tables.
+
+Edits insert a new version and deletes only mark the row, so without this
+the ``question`` and ``answer`` tables grow with every edit. Rows retired,
+deleted or superseded, longer than the retention ago are moved to the
+archive tables in batches of their own transactions, so the write lock is
+never held for long, then freed pages are given back with an incremental
+VACUUM. History of a version only lists the versions still in the hot table.
+"""
+
+import asyncio
+import logging
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    Select,
+    Table,
+    delete,
+    exists,
+    insert,
+    literal,
+    update,
+)
+from sqlmodel import SQLModel, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.config import settings
+from domuwa.database import session_maker
+from domuwa.models.answer import Answer
+from domuwa.models.archive import answer_archive, question_archive
+from domuwa.models.change import ChangeOperation
+from domuwa.models.links import GameRoomQuestionsLink
+from domuwa.models.question import Question
+from domuwa.services import change_counters, changes_services
+
+logger = logging.getLogger(__name__)
+
+# answers first, they point at their questions
+ARCHIVES: list[tuple[type[SQLModel], Table]] = [
+    (Answer, answer_archive),
+    (Question, question_archive),
+]
+
+
+class ArchiveServices:
+    logger = logger
+
+    async def archive(
+        self,
+        older_than: datetime,
+        session: AsyncSession,
+        batch_size: int = settings.ARCHIVE_BATCH_SIZE,
+    ) -> dict[str, int]:
+        """Move rows retired before ``older_than``, returns the number of rows
+        moved per table."""
+        archived = {}
+        for model_type, archive in ARCHIVES:
+            conditions = self.archivable_conditions(model_type, older_than)
+            archived[archive.name] = 0
+            while count := await self.archive_batch(
+                model_type,
+                archive,
+                conditions,
+                batch_size,
+                session,
+            ):
+                archived[archive.name] += count
+            if archived[archive.name]:
+                change_counters.bump(model_type.__tablename__)  # type: ignore
+        self.logger.debug("archived %s", archived)
+
+        if any(archived.values()):
+            await self.vacuum(session)
+        return archived
+
+    @staticmethod
+    def archivable_conditions(
+        model_type: type[SQLModel],
+        older_than: datetime,
+    ) -> list[ColumnElement[bool]]:
+        # game rooms keep the questions they were played with, and their answers
+        question_id = Question.id if model_type is Question else Answer.question_id
+        return [
+            model_type.retired_at < older_than,  # type: ignore
+            ~exists().where(GameRoomQuestionsLink.question_id == question_id),  # type: ignore
+        ]
+
+    async def archive_batch(
+        self,
+        model_type: type[SQLModel],
+        archive: Table,
+        conditions: list[ColumnElement[bool]],
+        batch_size: int,
+        session: AsyncSession,
+    ) -> int:
+        table = model_type.__table__  # type: ignore
+        # no ORDER BY, sorting by id would make SQLite scan the table in rowid
+        # order instead of searching the retired_at index
+        statement = select(table.c.id).where(*conditions).limit(batch_size)
+        ids = (await session.exec(statement)).all()
+        if not ids:
+            return 0
+
+        in_batch = table.c.id.in_(ids)
+        if model_type is Question:
+            await self.move_answers_to_latest(ids, session)
+        rows: Select = Select(*table.c, literal(datetime.now(), DateTime)).where(
+            in_batch
+        )
+        await session.exec(
+            insert(archive).from_select([*table.c.keys(), "archived_at"], rows)  # type: ignore
+        )
+        # deleted rows too, so the tables get a new latest change even when
+        # this runs in another process than the server
+        await changes_services.record_where(
+            session,
+            model_type,
+            in_batch,
+            operation=ChangeOperation.DELETE,
+        )
+        await session.exec(delete(table).where(in_batch))  # type: ignore
+        await session.commit()
+        return len(ids)
+
+    async def move_answers_to_latest(
+        self,
+        question_ids: Sequence[int],
+        session: AsyncSession,
+    ) -> None:
+        """Point answers still on superseded versions of the questions at the
+        latest versions, an edit leaves them where they were added."""
+        latest_id = (
+            select(Question.head_id)
+            .where(Question.id == Answer.question_id)
+            .scalar_subquery()
+        )
+        statement = (
+            update(Answer)
+            .where(
+                col(Answer.question_id).in_(question_ids),
+                latest_id.is_not(None),
+            )
+            .values(question_id=latest_id)
+            .returning(col(Answer.id))
+            .execution_options(synchronize_session=False)
+        )
+        answer_ids = list((await session.exec(statement)).scalars())  # type: ignore
+        await changes_services.record_where(
+            session,
+            Answer,
+            col(Answer.id).in_(answer_ids),
+        )
+
+    async def vacuum(self, session: AsyncSession) -> None:
+        connection = await session.connection()
+        auto_vacuum = (await connection.exec_driver_sql("PRAGMA auto_vacuum")).scalar()
+        # 2 is INCREMENTAL, other modes need a full VACUUM to change
+        if auto_vacuum != 2:
+            self.logger.debug("skipped incremental vacuum, auto_vacuum=%s", auto_vacuum)
+            await session.commit()
+            return
+
+        free_pages = (
+            await connection.exec_driver_sql("PRAGMA freelist_count")
+        ).scalar()
+        # the statement frees a page per step, sqlite3 runs it to the end only
+        # as a script, which commits any open transaction first
+        await session.commit()
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.executescript(  # type: ignore
+            "PRAGMA incremental_vacuum"
+        )
+        await session.commit()
+        self.logger.debug("incremental vacuum freed %d pages", free_pages)
+
+
+async def archive_retired_rows(
+    interval: float = settings.ARCHIVE_INTERVAL,
+    retention: float = settings.ARCHIVE_RETENTION,
+) -> None:
+    """Periodically archive rows retired more than ``retention`` seconds ago."""
+    if interval <= 0:
+        return
+
+    services = ArchiveServices()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_maker() as session:
+                older_than = datetime.now() - timedelta(seconds=retention)
+                await services.archive(older_than, session)
+        except Exception:
+            logger.exception("archiving retired rows failed")
@@ -0,0 +1,59 @@
+"""Per-table change counters backing conditional GETs.
+
+Services bump the counters of every table they wrote to after the commit, so
+a response built from a set of tables stays valid for as long as their
+counters do not move. Counters live in memory and start over with the
+process, which is why every tag also carries the id of the process.
+
+Writes made by another process, such as ``python -m domuwa.archive``, bump
+no counter here. Every tag also carries the seq of the latest change log
+entry of each table, looked up for every conditional GET, and a table whose
+latest entry moved counts as modified when that is noticed.
+
+Tags are strong: a response is serialized only from rows of its tables, so
+while their counters and latest changes stay the same, the same request gets
+the same bytes.
+"""
+
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+
+_process_id = uuid.uuid4().hex[:8]
+_started_at = time.time()
+
+_counters: defaultdict[str, int] = defaultdict(int)
+_modified_at: dict[str, float] = {}
+_latest_seqs: dict[str, int | None] = {}
+
+
+def bump(*tables: str) -> None:
+    now = time.time()
+    for table in tables:
+        _counters[table] += 1
+        _modified_at[table] = now
+
+
+def observe(latest_seqs: Mapping[str, int | None]) -> None:
+    """Note the seq of the latest change of the tables, as read from the
+    change log."""
+    now = time.time()
+    for table, seq in latest_seqs.items():
+        if table in _latest_seqs and _latest_seqs[table] == seq:
+            continue
+        _latest_seqs[table] = seq
+        _modified_at[table] = now
+
+
+def etag(tables: Iterable[str]) -> str:
+    counters = "-".join(
+        f"{_counters[table]}.{_latest_seqs.get(table) or 0}" for table in sorted(tables)
+    )
+    return f'"{_process_id}-{counters}"'
+
+
+def last_modified(tables: Iterable[str]) -> float:
+    return max(
+        (_modified_at.get(table, _started_at) for table in tables), default=_started_at
+    )
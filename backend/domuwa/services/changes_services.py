@@ -0,0 +1,229 @@
+"""Change log for clients keeping a local copy of the database in sync.
+
+Every write through the services adds a ``Change`` row in the same
+transaction, so the log never misses a committed write nor shows one that
+was rolled back. Clients ask for changes after the last ``seq`` they saw.
+"""
+
+import asyncio
+import logging
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from itertools import chain
+
+from sqlalchemy import (
+    Boolean,
+    ColumnElement,
+    Select,
+    case,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+)
+from sqlalchemy.orm import aliased
+from sqlmodel import SQLModel, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.config import settings
+from domuwa.database import session_maker
+from domuwa.models.change import Change, ChangeOperation, ChangeRead, ChangesRead
+
+logger = logging.getLogger(__name__)
+
+
+def record(
+    session: AsyncSession,
+    model: SQLModel,
+    operation: ChangeOperation = ChangeOperation.UPSERT,
+) -> None:
+    """Add a change of a flushed model to the current transaction."""
+    payload = None
+    if operation == ChangeOperation.UPSERT:
+        payload = model.model_dump(mode="json")
+    change = Change(
+        table_name=model.__tablename__,  # type: ignore
+        row_id=model.id,  # type: ignore
+        operation=operation,
+        payload=payload,
+    )
+    session.add(change)
+
+
+async def record_rows(
+    session: AsyncSession,
+    table_name: str,
+    rows: Iterable[dict],
+) -> None:
+    """Same as ``record`` for rows inserted without the ORM, ``id`` included."""
+    now = datetime.now()
+    changes = [
+        {
+            "table_name": table_name,
+            "row_id": row["id"],
+            "operation": ChangeOperation.UPSERT,
+            "payload": row,
+            "created_at": now,
+        }
+        for row in rows
+    ]
+    if changes:
+        connection = await session.connection()
+        await connection.execute(insert(Change), changes)
+
+
+def _json_payload(model_type: type[SQLModel]) -> ColumnElement:
+    columns = model_type.__table__.columns  # type: ignore
+    values = []
+    for column in columns:
+        value = column
+        # SQLite stores booleans as integers
+        if isinstance(column.type, Boolean):
+            value = func.json(
+                case((column.is_(None), None), (column, "true"), else_="false")
+            )
+        values.append(value)
+    return func.json_object(
+        *chain.from_iterable(
+            (literal(column.key), value) for column, value in zip(columns, values)
+        )
+    )
+
+
+async def record_where(
+    session: AsyncSession,
+    model_type: type[SQLModel],
+    *conditions: ColumnElement[bool],
+    operation: ChangeOperation = ChangeOperation.UPSERT,
+) -> None:
+    """Same as ``record`` for every row matching ``conditions``, with one
+    INSERT ... SELECT, so no row has to be loaded."""
+    table = model_type.__table__  # type: ignore
+    change_columns = Change.__table__.columns  # type: ignore
+    payload = _json_payload(model_type)
+    if operation == ChangeOperation.DELETE:
+        payload = literal(None)
+    # sqlmodel's select takes at most four columns
+    rows: Select = Select(
+        literal(table.name),
+        table.c.id,
+        literal(operation, change_columns.operation.type),
+        payload,
+        literal(datetime.now(), change_columns.created_at.type),
+    ).where(*conditions)
+    statement = insert(Change).from_select(
+        ["table_name", "row_id", "operation", "payload", "created_at"],
+        rows,
+    )
+    await session.exec(statement)  # type: ignore
+
+
+async def get_latest_seqs(
+    tables: Iterable[str],
+    session: AsyncSession,
+) -> dict[str, int | None]:
+    """Seq of the latest change of every table, None for a table with no
+    changes, one index lookup per table."""
+    tables = sorted(tables)
+    # sqlmodel's select takes at most four columns
+    statement: Select = Select(
+        *(
+            select(func.max(Change.seq))
+            .where(Change.table_name == table)
+            .scalar_subquery()
+            for table in tables
+        )
+    )
+    seqs = (await session.execute(statement)).one()
+    return dict(zip(tables, seqs))
+
+
+class ChangeServices:
+    logger = logger
+
+    async def get_since(
+        self,
+        since: int,
+        limit: int,
+        session: AsyncSession,
+    ) -> ChangesRead:
+        """Latest change of every row changed after ``since``, at most ``limit``
+        log entries are read at once."""
+        statement = (
+            select(Change)
+            .where(Change.seq > since)  # type: ignore
+            .order_by(Change.seq)  # type: ignore
+            .limit(limit + 1)
+        )
+        changes = list((await session.exec(statement)).all())
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        latest: dict[tuple[str, int], Change] = {}
+        for change in changes:
+            latest[(change.table_name, change.row_id)] = change
+        upserted, deleted = [], []
+        for change in sorted(latest.values(), key=lambda change: change.seq):  # type: ignore
+            if change.operation == ChangeOperation.DELETE:
+                deleted.append(ChangeRead.model_validate(change))
+            else:
+                upserted.append(ChangeRead.model_validate(change))
+
+        return ChangesRead(
+            seq=changes[-1].seq if changes else since,  # type: ignore
+            upserted=upserted,
+            deleted=deleted,
+            has_more=has_more,
+        )
+
+    async def compact(self, older_than: datetime, session: AsyncSession) -> int:
+        """Fold entries older than ``older_than`` into a snapshot.
+
+        Only the latest entry of every row is kept, so the folded part of the
+        log holds each row once, and every ``since`` still gets all the rows
+        changed after it.
+        """
+        cutoff = (
+            await session.exec(
+                select(func.max(Change.seq)).where(Change.created_at < older_than)
+            )
+        ).one()
+        if cutoff is None:
+            return 0
+
+        later = aliased(Change)
+        statement = (
+            delete(Change)
+            .where(Change.seq <= cutoff)  # type: ignore
+            .where(
+                exists().where(
+                    col(later.table_name) == col(Change.table_name),
+                    col(later.row_id) == col(Change.row_id),
+                    col(later.seq) > col(Change.seq),
+                )
+            )
+        )
+        result = await session.exec(statement)  # type: ignore
+        await session.commit()
+        self.logger.debug("compacted %d changes up to seq=%d", result.rowcount, cutoff)
+        return result.rowcount
+
+
+async def compact_change_log(
+    interval: float = settings.CHANGE_LOG_COMPACTION_INTERVAL,
+    retention: float = settings.CHANGE_LOG_RETENTION,
+) -> None:
+    """Periodically compact entries older than ``retention`` seconds."""
+    if interval <= 0:
+        return
+
+    services = ChangeServices()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_maker() as session:
+                older_than = datetime.now() - timedelta(seconds=retention)
+                await services.compact(older_than, session)
+        except Exception:
+            logger.exception("change log compaction failed")
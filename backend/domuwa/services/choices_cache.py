@@ -0,0 +1,166 @@
+"""In-memory cache of the lookup tables keyed by ``StrEnum`` names.
+
+``GameType``, ``QnACategory`` and ``GameCategory`` hold a handful of rows that
+almost never change, so they are kept in memory for the whole process. Read
+models serialize relationships to these tables straight from the cache, so the
+rows referencing them do not have to load the relationship at all.
+"""
+
+from collections import defaultdict
+from collections.abc import Iterable
+from enum import StrEnum
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+from sqlalchemy import inspect
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Mapper
+
+
+class ChoicesCache:
+    def __init__(self, model_type: type[SQLModel]) -> None:
+        self.model_type = model_type
+        self._names_by_id: dict[int, StrEnum] = {}
+        self._ids_by_name: dict[StrEnum, int] = {}
+
+    def get_name(self, model_id: int) -> StrEnum | None:
+        return self._names_by_id.get(model_id)
+
+    def get_id(self, name: StrEnum) -> int | None:
+        return self._ids_by_name.get(name)
+
+    def set(self, model_id: int, name: StrEnum) -> None:
+        self.evict(model_id)
+        self._names_by_id[model_id] = name
+        self._ids_by_name[name] = model_id
+
+    def evict(self, model_id: int) -> None:
+        name = self._names_by_id.pop(model_id, None)
+        if name is not None:
+            self._ids_by_name.pop(name, None)
+
+    def clear(self) -> None:
+        self._names_by_id.clear()
+        self._ids_by_name.clear()
+
+    async def load(
+        self,
+        session: AsyncSession,
+        model_ids: Iterable[int] | None = None,
+    ) -> None:
+        """Read rows from the database, all of them if no ids are given."""
+        statement = select(self.model_type)
+        if model_ids is not None:
+            statement = statement.where(self.model_type.id.in_(model_ids))  # type: ignore
+        for model in (await session.exec(statement)).all():
+            self.set(model.id, model.name)  # type: ignore
+
+
+caches: dict[type[SQLModel], ChoicesCache] = {}
+# model type -> [(relationship key, foreign key attribute, cache)]
+_cached_relationships: dict[type[SQLModel], list[tuple[str, str, ChoicesCache]]] = {}
+
+
+def get_cache(model_type: type[SQLModel]) -> ChoicesCache:
+    if model_type not in caches:
+        caches[model_type] = ChoicesCache(model_type)
+        _cached_relationships.clear()
+    return caches[model_type]
+
+
+def is_cached(model_type: type[SQLModel]) -> bool:
+    return model_type in caches
+
+
+def clear_all() -> None:
+    for cache in caches.values():
+        cache.clear()
+
+
+async def warm_all(session: AsyncSession) -> None:
+    for cache in caches.values():
+        await cache.load(session)
+
+
+def cached_relationships(
+    model_type: type[SQLModel],
+) -> list[tuple[str, str, ChoicesCache]]:
+    """Many-to-one relationships of ``model_type`` pointing to a cached table."""
+    if model_type not in _cached_relationships:
+        mapper: Mapper = inspect(model_type, raiseerr=True)
+        relationships = []
+        for relationship in mapper.relationships:
+            cache = caches.get(relationship.mapper.class_)
+            if cache is None or relationship.uselist:
+                continue
+            (column,) = relationship.local_columns
+            foreign_key = mapper.get_property_by_column(column).key
+            relationships.append((relationship.key, foreign_key, cache))
+        _cached_relationships[model_type] = relationships
+    return _cached_relationships[model_type]
+
+
+async def load_missing(models: Iterable[SQLModel], session: AsyncSession) -> None:
+    """Read-through for the cached relationships of already loaded models,
+    including the ones nested in loaded relationships. Issues one query per
+    lookup table with misses, none once the cache is warm."""
+    missing: dict[ChoicesCache, set[int]] = defaultdict(set)
+    visited: set[int] = set()
+
+    def visit(model: SQLModel) -> None:
+        if id(model) in visited:
+            return
+        visited.add(id(model))
+
+        for _, foreign_key, cache in cached_relationships(type(model)):
+            model_id = getattr(model, foreign_key)
+            if model_id is not None and cache.get_name(model_id) is None:
+                missing[cache].add(model_id)
+
+        mapper: Mapper = inspect(type(model), raiseerr=True)
+        for relationship in mapper.relationships:
+            # only what is already loaded, never trigger a lazy load
+            value = model.__dict__.get(relationship.key)
+            if value is None:
+                continue
+            for related in value if relationship.uselist else [value]:
+                visit(related)
+
+    for model in models:
+        visit(model)
+    for cache, model_ids in missing.items():
+        await cache.load(session, model_ids)
+
+
+class _CachedChoicesView:
+    __slots__ = ("_choices", "_model")
+
+    def __init__(self, model: SQLModel, choices: dict[str, SimpleNamespace]) -> None:
+        self._model = model
+        self._choices = choices
+
+    def __getattr__(self, name: str) -> object:
+        choice = self._choices.get(name)
+        if choice is not None:
+            return choice
+        return getattr(self._model, name)
+
+
+def with_cached_choices(data: object) -> object:
+    """Used by read models before validation: serves cached relationships from
+    memory and leaves everything else to the ORM object."""
+    if not isinstance(data, SQLModel) or inspect(type(data), raiseerr=False) is None:
+        return data
+
+    choices = {}
+    for key, foreign_key, cache in cached_relationships(type(data)):
+        model_id = getattr(data, foreign_key)
+        name = cache.get_name(model_id) if model_id is not None else None
+        if name is not None:
+            choices[key] = SimpleNamespace(id=model_id, name=name)
+    if not choices:
+        return data
+    return _CachedChoicesView(data, choices)
@@ -1,40 +1,383 @@
 import logging
+import typing
 from abc import ABC
-from typing import Generic, TypeVar
+from datetime import datetime
+from enum import StrEnum
+from functools import cached_property
+from typing import TYPE_CHECKING, ClassVar, Generic, TypeVar, cast
 
+from pydantic import model_validator
+from sqlalchemy import (
+    Alias,
+    ColumnElement,
+    false,
+    func,
+    insert,
+    inspect,
+    or_,
+    update,
+)
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import SQLModel, Session, select
+from sqlalchemy.orm import aliased, joinedload, raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import Field, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing_extensions import override
+
+from domuwa.models.change import ChangeOperation
+from domuwa.services import change_counters, changes_services, choices_cache
+
+if TYPE_CHECKING:
+    from sqlalchemy import Table
+    from sqlalchemy.orm import Mapper
+    from sqlalchemy.orm.strategy_options import _AbstractLoad
 
 CreateModelT = TypeVar("CreateModelT", bound=SQLModel)
 UpdateModelT = TypeVar("UpdateModelT", bound=SQLModel)
 DbModelT = TypeVar("DbModelT", bound=SQLModel)
 
 
+class GetAllFilters(SQLModel):
+    game_type_id: int | None = None
+    game_category_id: int | None = None
+    author_id: int | None = None
+    excluded: bool | None = None
+    # soft deleted rows are hidden unless asked for explicitly
+    deleted: bool | None = None
+    # so are versions replaced by an edit, of models with versions
+    include_superseded: bool | None = None
+
+
+# rows per multi-row INSERT, well below SQLite's limit of bound parameters
+BULK_BATCH_SIZE = 500
+
+
+class BulkCreateResult(SQLModel):
+    id: int | None = None
+    error: str | None = None
+
+
+# ids per bulk update, a single IN list must fit in SQLite's bound parameters
+MAX_SELECTION_IDS = 5000
+
+
+class BulkSelection(SQLModel):
+    """Rows of a bulk update, matching all the given ids and filters."""
+
+    ids: list[int] | None = Field(default=None, max_length=MAX_SELECTION_IDS)
+    author_id: int | None = None
+    game_type_id: int | None = None
+    game_category_id: int | None = None
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        # an empty selection would match the whole table
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("selection needs ids or at least one filter")
+        return self
+
+
+class BulkUpdateResult(SQLModel):
+    count: int
+
+
+def _nested_model_type(annotation: object) -> type[SQLModel] | None:
+    if isinstance(annotation, type) and issubclass(annotation, SQLModel):
+        return annotation
+    for arg in typing.get_args(annotation):
+        model_type = _nested_model_type(arg)
+        if model_type is not None:
+            return model_type
+    return None
+
+
+def eager_load_options(
+    db_model_type: type[SQLModel],
+    read_model_type: type[SQLModel],
+    strict: bool = False,
+    parent: "_AbstractLoad | None" = None,
+) -> list["_AbstractLoad"]:
+    """Build loader options for every relationship the read model serializes.
+
+    Collections are loaded with one extra SELECT ... IN per level, many-to-one
+    relationships are joined into the parent query, so the number of queries
+    does not depend on the number of rows. With ``strict``, any relationship
+    left out raises on access instead of being lazy loaded.
+    """
+    mapper: Mapper = inspect(db_model_type, raiseerr=True)
+    relationships = mapper.relationships
+    options: list[_AbstractLoad] = []
+    for name, field in read_model_type.model_fields.items():
+        relationship = relationships.get(name)
+        if relationship is None:
+            continue
+        # serialized from memory by the read model
+        if not relationship.uselist and choices_cache.is_cached(
+            relationship.mapper.class_
+        ):
+            continue
+
+        attr = getattr(db_model_type, name)
+        if parent is None:
+            loader = selectinload(attr) if relationship.uselist else joinedload(attr)
+        elif relationship.uselist:
+            loader = parent.selectinload(attr)
+        else:
+            loader = parent.joinedload(attr)
+
+        nested_read_model_type = _nested_model_type(field.annotation)
+        nested_options = []
+        if nested_read_model_type is not None:
+            nested_options = eager_load_options(
+                relationship.mapper.class_,
+                nested_read_model_type,
+                strict,
+                loader,
+            )
+        options.extend(nested_options or [loader])
+        if strict and not nested_options:
+            options.append(loader.raiseload("*"))
+
+    if strict:
+        options.append(parent.raiseload("*") if parent else raiseload("*"))
+    return options
+
+
+def read_model_tables(
+    db_model_type: type[SQLModel],
+    read_model_type: type[SQLModel],
+) -> set[str]:
+    """Tables whose rows end up serialized by the read model."""
+    mapper: Mapper = inspect(db_model_type, raiseerr=True)
+    tables = {cast("Table", mapper.local_table).name}
+    for name, field in read_model_type.model_fields.items():
+        relationship = mapper.relationships.get(name)
+        if relationship is None:
+            continue
+        secondary = relationship.secondary
+        if isinstance(secondary, Alias):
+            secondary = secondary.element
+        if secondary is not None:
+            tables.add(cast("Table", secondary).name)
+        nested_read_model_type = _nested_model_type(field.annotation)
+        if nested_read_model_type is None:
+            tables.add(cast("Table", relationship.mapper.local_table).name)
+        else:
+            tables |= read_model_tables(
+                relationship.mapper.class_,
+                nested_read_model_type,
+            )
+    return tables
+
+
 class CommonServices(ABC, Generic[CreateModelT, UpdateModelT, DbModelT]):
     db_model_type: type[DbModelT]
+    # relationships serialized by this model are loaded eagerly,
+    # lazy loading is not available with AsyncSession
+    read_model_type: type[SQLModel] | None = None
     logger: logging.Logger
+    # set in tests, makes every relationship missing from read_model_type
+    # raise on access, so N+1 queries cannot sneak back in
+    strict_loading: ClassVar[bool] = False
+
+    @cached_property
+    def load_options(self) -> list["_AbstractLoad"]:
+        if self.read_model_type is None:
+            return [raiseload("*")] if self.strict_loading else []
+        return eager_load_options(
+            self.db_model_type,
+            self.read_model_type,
+            self.strict_loading,
+        )
 
-    async def create(self, model: CreateModelT, session: Session):
+    @cached_property
+    def table_name(self) -> str:
+        return self.db_model_type.__tablename__  # type: ignore
+
+    @cached_property
+    def read_tables(self) -> frozenset[str]:
+        """Tables a change to which makes cached responses of this model stale."""
+        if self.read_model_type is None:
+            return frozenset([self.table_name])
+        return frozenset(read_model_tables(self.db_model_type, self.read_model_type))
+
+    async def create(self, model: CreateModelT, session: AsyncSession):
         return await self.save(model, session)
 
-    async def get_by_id(self, model_id: int, session: Session) -> DbModelT | None:
-        model = session.get(self.db_model_type, model_id)
+    async def create_bulk(
+        self,
+        models: list[CreateModelT],
+        session: AsyncSession,
+    ) -> list[BulkCreateResult]:
+        """Insert all models in one transaction, results are in input order.
+
+        Items referencing missing rows are reported and skipped instead of
+        failing the whole request.
+        """
+        rows = [self.to_row(model.model_dump()) for model in models]
+        results = [
+            BulkCreateResult(error=error)
+            for error in await self.reference_errors(rows, session)
+        ]
+        valid = [i for i, result in enumerate(results) if result.error is None]
+        inserted = await self.insert_rows([rows[i] for i in valid], session)
+        for i, result in zip(valid, inserted):
+            results[i] = result
+        await self.record_inserted([rows[i] for i in valid], inserted, session)
+        await session.commit()
+        change_counters.bump(self.table_name)
+        self.logger.debug(
+            "bulk created %d/%d %s",
+            sum(result.id is not None for result in results),
+            len(results),
+            self.db_model_type.__name__,
+        )
+        return results
+
+    def to_row(self, data: dict) -> dict:
+        """Column values of a new row, with the db model defaults applied."""
+        return self.db_model_type.model_validate(data).model_dump(exclude={"id"})
+
+    async def reference_errors(
+        self,
+        rows: list[dict],
+        session: AsyncSession,
+    ) -> list[str | None]:
+        """Check the foreign keys of ``rows`` with one query per column."""
+        errors: list[str | None] = [None] * len(rows)
+        for column in self.db_model_type.__table__.columns:  # type: ignore
+            for foreign_key in column.foreign_keys:
+                values = {row[column.key] for row in rows} - {None}
+                if not values:
+                    continue
+                target = foreign_key.column
+                statement = select(target).where(target.in_(values))
+                existing = set((await session.exec(statement)).all())
+                for i, row in enumerate(rows):
+                    value = row[column.key]
+                    if (
+                        errors[i] is None
+                        and value is not None
+                        and value not in existing
+                    ):
+                        errors[i] = f"{column.key}={value} does not exist"
+        return errors
+
+    async def insert_rows(
+        self,
+        rows: list[dict],
+        session: AsyncSession,
+    ) -> list[BulkCreateResult]:
+        """Insert rows with multi-row INSERTs in the current transaction.
+
+        A failing INSERT leaves no rows behind, so only then is its batch
+        retried row by row, to report which rows were rejected.
+        """
+        model_id = self.db_model_type.id  # type: ignore
+        statement = insert(self.db_model_type).returning(model_id)
+        connection = await session.connection()
+        results: list[BulkCreateResult] = []
+        for start in range(0, len(rows), BULK_BATCH_SIZE):
+            batch = rows[start : start + BULK_BATCH_SIZE]
+            try:
+                result = await connection.execute(statement, batch)
+            except IntegrityError:
+                for row in batch:
+                    try:
+                        result = await connection.execute(statement, row)
+                    except IntegrityError as exc:
+                        self.logger.error(str(exc))
+                        results.append(BulkCreateResult(error=str(exc.orig)))
+                    else:
+                        results.append(BulkCreateResult(id=result.scalar_one()))
+                continue
+            # RETURNING order is unspecified, but rowids of one INSERT are
+            # handed out in VALUES order
+            ids = sorted(result.scalars().all())
+            results.extend(BulkCreateResult(id=model_id) for model_id in ids)
+        return results
+
+    async def record_inserted(
+        self,
+        rows: list[dict],
+        results: list[BulkCreateResult],
+        session: AsyncSession,
+    ) -> None:
+        """Add the rows ``insert_rows`` managed to insert to the change log."""
+        await changes_services.record_rows(
+            session,
+            self.table_name,
+            [
+                row | {"id": result.id}
+                for row, result in zip(rows, results)
+                if result.id is not None
+            ],
+        )
+
+    async def get_by_id(self, model_id: int, session: AsyncSession) -> DbModelT | None:
+        model = await session.get(
+            self.db_model_type,
+            model_id,
+            options=self.load_options,
+            populate_existing=True,
+        )
         if model is None:
             self.logger.warning(
                 "%s(id=%d) not found",
                 self.db_model_type.__name__,
                 model_id,
             )
+        elif self.read_model_type is not None:
+            await choices_cache.load_missing([model], session)
         return model
 
-    async def get_all(self, session: Session):
-        return session.exec(select(self.db_model_type)).all()
+    async def get_all(
+        self,
+        session: AsyncSession,
+        filters: GetAllFilters | None = None,
+        after_id: int | None = None,
+        limit: int | None = None,
+    ):
+        model_id = self.db_model_type.id  # type: ignore
+        statement = (
+            select(self.db_model_type)
+            .options(*self.load_options)
+            .order_by(model_id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            statement = statement.where(model_id > after_id)
+
+        statement = statement.where(*self.filter_conditions(filters))
+        models = (await session.exec(statement)).all()
+        if self.read_model_type is not None:
+            await choices_cache.load_missing(models, session)
+        return models
+
+    @cached_property
+    def filter_fields(self) -> frozenset[str]:
+        """Fields of ``GetAllFilters`` the rows can be filtered by."""
+        return frozenset(GetAllFilters.model_fields) & frozenset(
+            self.db_model_type.model_fields
+        )
+
+    def filter_conditions(
+        self,
+        filters: GetAllFilters | None,
+    ) -> list[ColumnElement[bool]]:
+        conditions = filters.model_dump(exclude_none=True) if filters else {}
+        if "deleted" in self.db_model_type.model_fields:
+            conditions.setdefault("deleted", False)
+        return [
+            getattr(self.db_model_type, field) == value
+            for field, value in conditions.items()
+        ]
 
     async def update(
         self,
         model: DbModelT,
         model_update: UpdateModelT,
-        session: Session,
+        session: AsyncSession,
     ):
         update_data = model_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
@@ -44,21 +387,285 @@ class CommonServices(ABC, Generic[CreateModelT, UpdateModelT, DbModelT]):
     async def save(
         self,
         model: CreateModelT | DbModelT,
-        session: Session,
+        session: AsyncSession,
     ) -> DbModelT | None:
         if not isinstance(model, self.db_model_type):
             model = self.db_model_type.model_validate(model)
         try:
             session.add(model)
-            session.commit()
+            await session.flush()
+            changes_services.record(session, model)
+            await session.commit()
         except IntegrityError as exc:
+            await session.rollback()
             self.logger.error(str(exc))
             return None
-        session.refresh(model)
+        change_counters.bump(self.table_name)
+        model = await self.get_by_id(model.id, session)  # type: ignore
         self.logger.debug(f"saved {model.__class__.__name__}({model}) to db")
         return model  # type: ignore
 
-    async def delete(self, model: DbModelT, session: Session):
-        session.delete(model)
-        session.commit()
+    async def delete(self, model: DbModelT, session: AsyncSession):
+        changes_services.record(session, model, ChangeOperation.DELETE)
+        await session.delete(model)
+        await session.commit()
+        change_counters.bump(self.table_name)
         self.logger.debug("removed %s(id=%d)", model.__class__.__name__, model.id)  # type: ignore
+
+    def selection_conditions(
+        self,
+        selection: BulkSelection,
+    ) -> list[ColumnElement[bool]]:
+        model_type = self.db_model_type
+        conditions = [model_type.deleted == false()]  # type: ignore
+        if selection.ids is not None:
+            conditions.append(model_type.id.in_(selection.ids))  # type: ignore
+        for field, value in selection.model_dump(
+            exclude={"ids"},
+            exclude_none=True,
+        ).items():
+            conditions.append(getattr(model_type, field) == value)
+        return conditions
+
+    async def exclude_many(
+        self, selection: BulkSelection, session: AsyncSession
+    ) -> int:
+        """Exclude every row of the selection with a single UPDATE."""
+        model_ids = await self.mark_excluded(
+            self.db_model_type,
+            self.selection_conditions(selection),
+            session,
+        )
+        await session.commit()
+        change_counters.bump(self.table_name)
+        self.logger.debug("excluded %d %s", len(model_ids), self.db_model_type.__name__)
+        return len(model_ids)
+
+    async def delete_many(self, selection: BulkSelection, session: AsyncSession) -> int:
+        """Soft delete every row of the selection with a single UPDATE."""
+        model_ids = await self.mark_deleted(
+            self.db_model_type,
+            self.selection_conditions(selection),
+            session,
+        )
+        await session.commit()
+        change_counters.bump(self.table_name)
+        self.logger.debug(
+            "marked %d %s as deleted",
+            len(model_ids),
+            self.db_model_type.__name__,
+        )
+        return len(model_ids)
+
+    @staticmethod
+    async def mark_excluded(
+        model_type: type[SQLModel],
+        conditions: list[ColumnElement[bool]],
+        session: AsyncSession,
+    ) -> list[int]:
+        """Ids of the rows matching ``conditions``, all of them excluded."""
+        statement = (
+            update(model_type)
+            .where(*conditions)
+            .values(excluded=True)
+            .returning(model_type.id)  # type: ignore
+            .execution_options(synchronize_session=False)
+        )
+        model_ids = list((await session.exec(statement)).scalars())  # type: ignore
+        await changes_services.record_where(session, model_type, *conditions)
+        return model_ids
+
+    @staticmethod
+    async def mark_deleted(
+        model_type: type[SQLModel],
+        conditions: list[ColumnElement[bool]],
+        session: AsyncSession,
+    ) -> list[int]:
+        """Ids of the rows matching ``conditions``, all of them soft deleted."""
+        # logged first, the conditions stop matching once rows are deleted
+        await changes_services.record_where(
+            session,
+            model_type,
+            *conditions,
+            operation=ChangeOperation.DELETE,
+        )
+        statement = (
+            update(model_type)
+            .where(*conditions)
+            .values(
+                deleted=True,
+                retired_at=func.coalesce(model_type.retired_at, datetime.now()),  # type: ignore
+            )
+            .returning(model_type.id)  # type: ignore
+            .execution_options(synchronize_session=False)
+        )
+        return list((await session.exec(statement)).scalars())  # type: ignore
+
+
+class CachedChoicesServices(CommonServices[CreateModelT, UpdateModelT, DbModelT]):
+    """Services of a lookup table keyed by a ``StrEnum`` name.
+
+    Ids and names are kept in memory for the whole process, every write
+    through these services updates the cache after it is committed.
+    """
+
+    cache: ClassVar[choices_cache.ChoicesCache]
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if "db_model_type" in cls.__dict__:
+            cls.cache = choices_cache.get_cache(cls.db_model_type)
+
+    async def warm_cache(self, session: AsyncSession) -> None:
+        self.cache.clear()
+        await self.cache.load(session)
+
+    async def get_name(self, model_id: int, session: AsyncSession) -> StrEnum | None:
+        name = self.cache.get_name(model_id)
+        if name is None:
+            await self.cache.load(session, [model_id])
+            name = self.cache.get_name(model_id)
+        return name
+
+    async def get_id(self, name: StrEnum, session: AsyncSession) -> int | None:
+        model_id = self.cache.get_id(name)
+        if model_id is None:
+            statement = select(self.db_model_type.id).where(  # type: ignore
+                self.db_model_type.name == name  # type: ignore
+            )
+            model_id = (await session.exec(statement)).first()
+            if model_id is not None:
+                self.cache.set(model_id, name)
+        return model_id
+
+    @override
+    async def save(
+        self,
+        model: CreateModelT | DbModelT,
+        session: AsyncSession,
+    ) -> DbModelT | None:
+        db_model = await super().save(model, session)
+        if db_model is not None:
+            self.cache.set(db_model.id, db_model.name)  # type: ignore
+        return db_model
+
+    @override
+    async def delete(self, model: DbModelT, session: AsyncSession):
+        model_id = model.id  # type: ignore
+        await super().delete(model, session)
+        self.cache.evict(model_id)
+
+
+class VersionedServices(CommonServices[CreateModelT, UpdateModelT, DbModelT]):
+    """Services of a model edited by inserting a new version of the row.
+
+    ``prev_version_id`` links a version to the one it replaced, ``head_id``
+    links every older version straight to the latest one.
+    """
+
+    @cached_property
+    @override
+    def filter_fields(self) -> frozenset[str]:
+        return super().filter_fields | {"include_superseded"}
+
+    @override
+    def filter_conditions(
+        self,
+        filters: GetAllFilters | None,
+    ) -> list[ColumnElement[bool]]:
+        filters = filters or GetAllFilters()
+        conditions = super().filter_conditions(
+            filters.model_copy(update={"include_superseded": None})
+        )
+        if not filters.include_superseded:
+            conditions.append(self.db_model_type.head_id.is_(None))  # type: ignore
+        return conditions
+
+    async def get_latest(self, model_id: int, session: AsyncSession) -> DbModelT | None:
+        model_type = self.db_model_type
+        statement = select(
+            func.coalesce(model_type.head_id, model_type.id)  # type: ignore
+        ).where(model_type.id == model_id)  # type: ignore
+        head_id = (await session.exec(statement)).first()
+        if head_id is None:
+            self.logger.warning("%s(id=%d) not found", model_type.__name__, model_id)
+            return None
+        return await self.get_by_id(head_id, session)
+
+    async def get_history(
+        self,
+        model_id: int,
+        session: AsyncSession,
+    ) -> list[DbModelT]:
+        """All versions of the model, latest first, read with one query."""
+        model_type = self.db_model_type
+        history = (
+            select(func.coalesce(model_type.head_id, model_type.id).label("id"))  # type: ignore
+            .where(model_type.id == model_id)  # type: ignore
+            .cte("history", recursive=True)
+        )
+        version = aliased(model_type)
+        history = history.union_all(
+            select(version.prev_version_id)  # type: ignore
+            .join(history, version.id == history.c.id)  # type: ignore
+            .where(version.prev_version_id.is_not(None))  # type: ignore
+        )
+        statement = (
+            select(model_type)
+            .join(history, model_type.id == history.c.id)  # type: ignore
+            .options(*self.load_options)
+            .order_by(model_type.id.desc())  # type: ignore
+        )
+        models = list((await session.exec(statement)).all())
+        if self.read_model_type is not None:
+            await choices_cache.load_missing(models, session)
+        return models
+
+    async def insert_version(
+        self,
+        model: DbModelT,
+        model_update: UpdateModelT,
+        session: AsyncSession,
+    ) -> DbModelT:
+        """Flush a new version of ``model`` and make it the head of the chain.
+
+        Only writes, with a fixed number of statements, nothing of the old
+        version beyond its columns is loaded.
+        """
+        update_data = model_update.model_dump(exclude_unset=True)
+        model_data = model.model_dump(exclude={"id", "head_id", "retired_at"})
+        model_data |= update_data
+        model_data["prev_version_id"] = model.id  # type: ignore
+        updated_model = self.db_model_type(**model_data)
+        session.add(updated_model)
+        await session.flush()
+        await self.set_head(model, updated_model, session)
+        return updated_model
+
+    async def set_head(
+        self,
+        model: DbModelT,
+        updated_model: DbModelT,
+        session: AsyncSession,
+    ) -> None:
+        """Point every version of ``model`` at its flushed new version."""
+        model_type = self.db_model_type
+        head_id = model.head_id or model.id  # type: ignore
+        now = datetime.now()
+        statement = (
+            update(model_type)
+            .where(
+                or_(
+                    model_type.id == head_id,  # type: ignore
+                    model_type.head_id == head_id,  # type: ignore
+                )
+            )
+            .values(
+                head_id=updated_model.id,  # type: ignore
+                retired_at=func.coalesce(model_type.retired_at, now),  # type: ignore
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await session.exec(statement)  # type: ignore
+        set_committed_value(model, "head_id", updated_model.id)  # type: ignore
+        set_committed_value(model, "retired_at", model.retired_at or now)  # type: ignore
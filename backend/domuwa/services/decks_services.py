@@ -0,0 +1,314 @@
+import logging
+from collections import defaultdict
+from collections.abc import AsyncIterable, AsyncIterator, Sequence
+
+from pydantic import ValidationError
+from sqlalchemy import Row, Select, false, func, or_
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.models.answer import Answer
+from domuwa.models.deck import (
+    DeckAnswer,
+    DeckImportError,
+    DeckImportResult,
+    DeckQuestion,
+)
+from domuwa.models.game_type import GameType
+from domuwa.models.player import Player
+from domuwa.models.qna_category import QnACategory
+from domuwa.models.question import Question
+from domuwa.services import change_counters, question_draw_services
+from domuwa.services.answers_services import AnswerServices
+from domuwa.services.common_services import CachedChoicesServices
+from domuwa.services.game_type_services import GameTypeServices
+from domuwa.services.players_services import PlayerServices
+from domuwa.services.qna_categories_services import QnACategoryServices
+from domuwa.services.questions_services import QuestionServices
+
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines without reading all of it."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+class DeckServices:
+    """Export and import of all current questions with their answers as NDJSON.
+
+    Both directions work in fixed-size batches of plain rows instead of ORM
+    objects, so memory does not grow with the size of the deck.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self) -> None:
+        self.question_services = QuestionServices()
+        self.answer_services = AnswerServices()
+        self.player_services = PlayerServices()
+        self.game_type_services = GameTypeServices()
+        self.game_category_services = QnACategoryServices()
+
+    async def export(self, session: AsyncSession) -> AsyncIterator[bytes]:
+        statement: Select = (
+            # sqlmodel's select takes at most four columns
+            Select(
+                col(Question.id),
+                col(Question.text),
+                col(Question.excluded),
+                col(Player.name),
+                col(Question.game_type_id),
+                col(Question.game_category_id),
+            )
+            .outerjoin(Player, col(Question.author_id) == col(Player.id))
+            .where(col(Question.deleted) == false())
+            # older versions of edited questions are not part of the deck
+            .where(col(Question.head_id).is_(None))
+            .order_by(col(Question.id))
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        result = await session.stream(statement)
+        exported = 0
+        async for rows in result.partitions():
+            answers = await self._export_answers([row[0] for row in rows], session)
+            await self._load_choices(rows, session)
+            for row in rows:
+                question_id, text, excluded, author, game_type_id, category_id = row
+                deck_question = DeckQuestion(
+                    text=text,
+                    excluded=excluded,
+                    author=author,
+                    game_type=self.game_type_services.cache.get_name(game_type_id),  # type: ignore
+                    game_category=self.game_category_services.cache.get_name(
+                        category_id
+                    ),  # type: ignore
+                    answers=answers[question_id],
+                )
+                yield deck_question.model_dump_json().encode() + b"\n"
+            exported += len(rows)
+        self.logger.debug("exported %d questions", exported)
+
+    async def _export_answers(
+        self,
+        question_ids: list[int],
+        session: AsyncSession,
+    ) -> defaultdict[int, list[DeckAnswer]]:
+        # answers can be on any version of a question, the deck lists their
+        # latest versions under the latest one
+        statement: Select = (
+            # sqlmodel's select takes at most four columns
+            Select(
+                func.coalesce(col(Question.head_id), col(Question.id)),
+                col(Answer.text),
+                col(Answer.excluded),
+                col(Player.name),
+                col(Answer.game_type_id),
+                col(Answer.game_category_id),
+            )
+            .join(Question, col(Answer.question_id) == col(Question.id))
+            .outerjoin(Player, col(Answer.author_id) == col(Player.id))
+            .where(
+                or_(
+                    col(Question.id).in_(question_ids),
+                    col(Question.head_id).in_(question_ids),
+                )
+            )
+            .where(col(Answer.deleted) == false(), col(Answer.head_id).is_(None))
+            .order_by(col(Answer.id))
+        )
+        rows = (await session.execute(statement)).all()
+        await self._load_choices(rows, session)
+
+        answers: defaultdict[int, list[DeckAnswer]] = defaultdict(list)
+        for question_id, text, excluded, author, game_type_id, category_id in rows:
+            answers[question_id].append(  # type: ignore
+                DeckAnswer(
+                    text=text,
+                    excluded=excluded,
+                    author=author,
+                    game_type=self.game_type_services.cache.get_name(game_type_id),  # type: ignore
+                    game_category=self.game_category_services.cache.get_name(
+                        category_id
+                    ),  # type: ignore
+                )
+            )
+        return answers
+
+    async def _load_choices(self, rows: Sequence[Row], session: AsyncSession) -> None:
+        for services, index in (
+            (self.game_type_services, 4),
+            (self.game_category_services, 5),
+        ):
+            missing = {
+                row[index]
+                for row in rows
+                if row[index] is not None
+                and services.cache.get_name(row[index]) is None
+            }
+            if missing:
+                await services.cache.load(session, missing)
+
+    async def import_lines(
+        self,
+        lines: AsyncIterable[bytes],
+        session: AsyncSession,
+    ) -> DeckImportResult:
+        """Import NDJSON lines, committing every ``IMPORT_BATCH_SIZE`` questions.
+
+        Invalid lines are skipped and reported, batches committed before an
+        error stay in the database.
+        """
+        result = DeckImportResult()
+        author_ids: dict[str, int] = {}
+        batch: list[DeckQuestion] = []
+        line_number = 0
+        async for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                batch.append(DeckQuestion.model_validate_json(line))
+            except ValidationError as exc:
+                self._skip(result, line_number, str(exc))
+                continue
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await self._import_batch(batch, author_ids, result, session)
+                batch = []
+        if batch:
+            await self._import_batch(batch, author_ids, result, session)
+        self.logger.debug(
+            "imported %d questions and %d answers, skipped %d lines",
+            result.questions,
+            result.answers,
+            result.skipped,
+        )
+        return result
+
+    def _skip(self, result: DeckImportResult, line_number: int, error: str) -> None:
+        result.skipped += 1
+        if len(result.errors) < MAX_REPORTED_ERRORS:
+            result.errors.append(DeckImportError(line=line_number, error=error))
+
+    async def _import_batch(
+        self,
+        batch: list[DeckQuestion],
+        author_ids: dict[str, int],
+        result: DeckImportResult,
+        session: AsyncSession,
+    ) -> None:
+        models: list[DeckQuestion | DeckAnswer] = [
+            *batch,
+            *(answer for question in batch for answer in question.answers),
+        ]
+        # lookup rows are created, and committed, before the batch itself
+        game_type_ids = {
+            name: await self._get_or_create_choice(
+                self.game_type_services, GameType, name, session
+            )
+            for name in {model.game_type for model in models}
+        }
+        game_category_ids = {
+            name: await self._get_or_create_choice(
+                self.game_category_services, QnACategory, name, session
+            )
+            for name in {model.game_category for model in models}
+        }
+        await self._resolve_authors(
+            {model.author for model in models} - {None},  # type: ignore
+            author_ids,
+            session,
+        )
+
+        def to_row(model: DeckQuestion | DeckAnswer) -> dict:
+            return {
+                "text": model.text,
+                "excluded": model.excluded,
+                "author_id": author_ids.get(model.author),  # type: ignore
+                "game_type_id": game_type_ids[model.game_type],
+                "game_category_id": game_category_ids[model.game_category],
+            }
+
+        question_rows = [
+            self.question_services.to_row(to_row(question)) for question in batch
+        ]
+        question_results = await self.question_services.insert_rows(
+            question_rows,
+            session,
+        )
+        await self.question_services.record_inserted(
+            question_rows,
+            question_results,
+            session,
+        )
+        answer_rows = []
+        for question, question_result in zip(batch, question_results):
+            if question_result.id is None:
+                result.skipped += 1
+                continue
+            result.questions += 1
+            for answer in question.answers:
+                row = to_row(answer) | {"question_id": question_result.id}
+                answer_rows.append(self.answer_services.to_row(row))
+        answer_results = await self.answer_services.insert_rows(answer_rows, session)
+        await self.answer_services.record_inserted(answer_rows, answer_results, session)
+        result.answers += sum(answer.id is not None for answer in answer_results)
+        await session.commit()
+        change_counters.bump(
+            self.question_services.table_name,
+            self.answer_services.table_name,
+            self.player_services.table_name,
+        )
+        question_draw_services.add(
+            row | {"id": question_result.id}
+            for row, question_result in zip(question_rows, question_results)
+            if question_result.id is not None
+        )
+
+    async def _get_or_create_choice(
+        self,
+        services: CachedChoicesServices,
+        db_model_type: type,
+        name: object,
+        session: AsyncSession,
+    ) -> int:
+        model_id = await services.get_id(name, session)  # type: ignore
+        if model_id is None:
+            model = await services.create(db_model_type(name=name), session)
+            model_id = model.id  # type: ignore
+        return model_id  # type: ignore
+
+    async def _resolve_authors(
+        self,
+        names: set[str],
+        author_ids: dict[str, int],
+        session: AsyncSession,
+    ) -> None:
+        missing = names - author_ids.keys()
+        if not missing:
+            return
+        statement = select(Player.id, Player.name).where(Player.name.in_(missing))  # type: ignore
+        for player_id, name in (await session.exec(statement)).all():
+            author_ids[name] = player_id  # type: ignore
+        missing -= author_ids.keys()
+        if not missing:
+            return
+        # authors from another host are created as regular players
+        names_to_create = sorted(missing)
+        player_rows = [
+            self.player_services.to_row({"name": name}) for name in names_to_create
+        ]
+        created = await self.player_services.insert_rows(player_rows, session)
+        await self.player_services.record_inserted(player_rows, created, session)
+        for name, player in zip(names_to_create, created):
+            if player.id is not None:
+                author_ids[name] = player.id
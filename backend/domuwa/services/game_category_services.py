@@ -0,0 +1,15 @@
+import logging
+
+from domuwa.models.game_category import (
+    GameCategory,
+    GameCategoryCreate,
+    GameCategoryUpdate,
+)
+from domuwa.services.common_services import CachedChoicesServices
+
+
+class GameCategoryServices(
+    CachedChoicesServices[GameCategoryCreate, GameCategoryUpdate, GameCategory]
+):
+    db_model_type = GameCategory
+    logger = logging.getLogger(__name__)
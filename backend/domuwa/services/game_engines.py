@@ -0,0 +1,250 @@
+"""Rules of the games, one engine per game type.
+
+An engine keeps the state of a game in memory and never touches the
+database. Every play is checked and recorded with a few dict and set
+operations, whatever the number of players. Points are only worked out when
+a round is closed. Between rounds the hub writes the scores, see
+``RankingServices.save_scores``.
+
+A round goes through ``RoundPhase.PLAYING``, where every player the round
+waits for makes one play. Gentlemen's cards then has ``RoundPhase.JUDGING``,
+where the judge picks the best card. A round is complete once nobody is
+left to play, or to judge.
+"""
+
+from abc import ABC, abstractmethod
+from collections import Counter
+from collections.abc import Collection, Iterable
+from enum import StrEnum
+from typing import ClassVar
+
+from domuwa.models.game_type import GameTypeChoices
+
+
+class RoundPhase(StrEnum):
+    WAITING = "waiting"
+    PLAYING = "playing"
+    JUDGING = "judging"
+    SCORED = "scored"
+
+
+class InvalidPlayError(ValueError):
+    pass
+
+
+class GameEngine(ABC):
+    game_type: ClassVar[GameTypeChoices]
+    engine_types: ClassVar[dict[GameTypeChoices, type["GameEngine"]]] = {}
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if "game_type" in cls.__dict__:
+            GameEngine.engine_types[cls.game_type] = cls
+
+    def __init__(self, player_ids: Iterable[int] = ()) -> None:
+        # dicts keep the order players joined in, rotating roles follow it
+        self.players: dict[int, None] = dict.fromkeys(player_ids)
+        self.scores: dict[int, int] = dict.fromkeys(self.players, 0)
+        self.phase = RoundPhase.WAITING
+        self.round = 0
+        self.answer_ids: frozenset[int] = frozenset()
+        self.waiting_for: set[int] = set()
+
+    def add_player(self, player_id: int) -> None:
+        self.players[player_id] = None
+        self.scores.setdefault(player_id, 0)
+
+    def remove_player(self, player_id: int) -> None:
+        """A player who left is not waited for, the points they won stay."""
+        self.players.pop(player_id, None)
+        self.waiting_for.discard(player_id)
+
+    def start_round(self, game_round: int, answer_ids: Collection[int] = ()) -> None:
+        """Start collecting plays, ``answer_ids`` are the answers of the
+        round's question."""
+        self.round = game_round
+        self.answer_ids = frozenset(answer_ids)
+        self.phase = RoundPhase.PLAYING
+        self.reset_round()
+        self.waiting_for = self.players_to_play()
+
+    @property
+    def round_complete(self) -> bool:
+        return self.phase in (RoundPhase.PLAYING, RoundPhase.JUDGING) and (
+            not self.waiting_for
+        )
+
+    def play(self, player_id: int, choice: object) -> None:
+        """Record a play of the current round, raises ``InvalidPlayError``."""
+        if player_id not in self.waiting_for:
+            raise InvalidPlayError(f"player {player_id} cannot play now")
+        self.accept(player_id, choice)
+        self.waiting_for.discard(player_id)
+
+    def close_round(self) -> dict[int, int]:
+        """Points won in the round, already added to the scores."""
+        points = self.round_points() if self.phase != RoundPhase.SCORED else {}
+        for player_id, player_points in points.items():
+            self.scores[player_id] = self.scores.get(player_id, 0) + player_points
+        self.phase = RoundPhase.SCORED
+        self.waiting_for = set()
+        return points
+
+    def rotating_player(self) -> int | None:
+        """Player whose turn it is in the current round, in order of joining."""
+        if not self.players:
+            return None
+        players = list(self.players)
+        return players[(self.round - 1) % len(players)]
+
+    def check_answer(self, choice: object) -> int:
+        if not isinstance(choice, int) or choice not in self.answer_ids:
+            raise InvalidPlayError(f"{choice!r} is not an answer to this question")
+        return choice
+
+    @abstractmethod
+    def reset_round(self) -> None:
+        pass
+
+    @abstractmethod
+    def players_to_play(self) -> set[int]:
+        pass
+
+    @abstractmethod
+    def accept(self, player_id: int, choice: object) -> None:
+        pass
+
+    @abstractmethod
+    def round_points(self) -> dict[int, int]:
+        pass
+
+
+def get_engine_type(game_type: GameTypeChoices) -> type[GameEngine]:
+    return GameEngine.engine_types[game_type]
+
+
+class EgoEngine(GameEngine):
+    """One player answers about themselves, the others guess the answer,
+    every right guess is a point."""
+
+    game_type = GameTypeChoices.EGO
+
+    def reset_round(self) -> None:
+        self.subject = self.rotating_player()
+        self.subject_answer: int | None = None
+        self.guesses: dict[int, int] = {}
+
+    def players_to_play(self) -> set[int]:
+        return set(self.players)
+
+    def accept(self, player_id: int, choice: object) -> None:
+        answer_id = self.check_answer(choice)
+        if player_id == self.subject:
+            self.subject_answer = answer_id
+        else:
+            self.guesses[player_id] = answer_id
+
+    def round_points(self) -> dict[int, int]:
+        return {
+            player_id: 1
+            for player_id, answer_id in self.guesses.items()
+            if answer_id == self.subject_answer
+        }
+
+
+class WhosMostLikelyEngine(GameEngine):
+    """Everyone votes for a player, the ones with the most votes get a point."""
+
+    game_type = GameTypeChoices.WHOS_MOST_LIKELY
+
+    def reset_round(self) -> None:
+        self.votes: Counter[int] = Counter()
+
+    def players_to_play(self) -> set[int]:
+        return set(self.players)
+
+    def accept(self, player_id: int, choice: object) -> None:
+        if not isinstance(choice, int) or choice not in self.players:
+            raise InvalidPlayError(f"{choice!r} is not a player of this game")
+        self.votes[choice] += 1
+
+    def round_points(self) -> dict[int, int]:
+        if not self.votes:
+            return {}
+        most_votes = max(self.votes.values())
+        return {
+            player_id: 1
+            for player_id, votes in self.votes.items()
+            if votes == most_votes
+        }
+
+
+class GentlemensCardsEngine(GameEngine):
+    """Everyone but the judge plays a card, the judge picks the best one and
+    whoever played it gets a point."""
+
+    game_type = GameTypeChoices.GENTLEMENS_CARDS
+
+    def reset_round(self) -> None:
+        self.judge = self.rotating_player()
+        # answer id -> player who played it
+        self.cards: dict[int, int] = {}
+        self.winner: int | None = None
+
+    def players_to_play(self) -> set[int]:
+        return set(self.players) - {self.judge}  # type: ignore
+
+    def play(self, player_id: int, choice: object) -> None:
+        super().play(player_id, choice)
+        self.start_judging()
+
+    def remove_player(self, player_id: int) -> None:
+        super().remove_player(player_id)
+        if player_id == self.judge:
+            # nobody is left to pick a card
+            self.judge = None
+            self.waiting_for = set()
+        else:
+            self.start_judging()
+
+    def start_judging(self) -> None:
+        if self.phase != RoundPhase.PLAYING or self.waiting_for or not self.cards:
+            return
+        if self.judge is not None:
+            self.phase = RoundPhase.JUDGING
+            self.waiting_for = {self.judge}
+
+    def accept(self, player_id: int, choice: object) -> None:
+        if self.phase == RoundPhase.JUDGING:
+            if not isinstance(choice, int) or choice not in self.cards:
+                raise InvalidPlayError(f"card {choice!r} was not played this round")
+            self.winner = self.cards[choice]
+            return
+        card = self.check_answer(choice)
+        if card in self.cards:
+            raise InvalidPlayError(f"card {card} was already played this round")
+        self.cards[card] = player_id
+
+    def round_points(self) -> dict[int, int]:
+        return {} if self.winner is None else {self.winner: 1}
+
+
+class NeverHaveIEverEngine(GameEngine):
+    """Everyone says whether they have done it, a point for each who has."""
+
+    game_type = GameTypeChoices.NEVER_HAVE_I_EVER
+
+    def reset_round(self) -> None:
+        self.have: set[int] = set()
+
+    def players_to_play(self) -> set[int]:
+        return set(self.players)
+
+    def accept(self, player_id: int, choice: object) -> None:
+        if not isinstance(choice, bool):
+            raise InvalidPlayError(f"{choice!r} is neither true nor false")
+        if choice:
+            self.have.add(player_id)
+
+    def round_points(self) -> dict[int, int]:
+        return dict.fromkeys(self.have, 1)
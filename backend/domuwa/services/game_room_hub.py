@@ -0,0 +1,613 @@
+"""Live game rooms, with one WebSocket connection per player.
+
+While anyone is connected to a game room, its state lives in memory and only
+the hub changes it. That state is the players, the round and its question. A
+message to a room is serialized once and put on the send queue of every
+connection. Each connection sends from its own queue, so a slow client only
+ever delays itself. A client whose queue fills up is disconnected and gets
+the whole state again when it reconnects.
+
+Plays are checked, tallied and scored by the ``GameEngine`` of the room's
+game type, in memory, and acknowledged to everyone right away. They are kept
+in the room until they are written to ``play`` together: with the points of
+the round once it is closed, in the same transaction, or by the next flush.
+
+Rounds are written to ``game_room`` behind the game. Rooms changed since the
+last write are flushed together every ``GAME_ROOM_FLUSH_INTERVAL`` seconds,
+and once their last player leaves. A crash loses the rounds started and the
+plays acknowledged since the last write. The points of a round are either
+written along with all of its plays or not at all, a round cut short by a
+crash is not scored. The deck itself is stored when the room is created.
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from enum import StrEnum
+
+from fastapi import WebSocket, WebSocketDisconnect, status
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.config import settings
+from domuwa.models.game_room import GameRoom, GameRoundRead
+from domuwa.models.play import Play
+from domuwa.services import change_counters, changes_services, game_rooms_services
+from domuwa.services.game_engines import (
+    GameEngine,
+    InvalidPlayError,
+    RoundPhase,
+    get_engine_type,
+)
+from domuwa.services.game_rooms_services import GameRoomServices
+from domuwa.services.game_type_services import GameTypeServices
+from domuwa.services.leaderboards import Leaderboard
+from domuwa.services.rankings_services import RankingServices
+
+logger = logging.getLogger(__name__)
+
+
+class MessageType(StrEnum):
+    STATE = "state"
+    PLAYERS = "players"
+    ROUND = "round"
+    PLAYED = "played"
+    SCORES = "scores"
+    ERROR = "error"
+    # sent by players
+    NEXT_ROUND = "next_round"
+    PLAY = "play"
+
+
+def encode(message_type: MessageType, **data: object) -> str:
+    return json.dumps({"type": message_type, **data})
+
+
+class PlayerConnection:
+    __slots__ = ("game_room_id", "player_id", "queue", "sender", "websocket")
+
+    def __init__(
+        self,
+        player_id: int,
+        game_room_id: int,
+        websocket: WebSocket,
+        queue_size: int = settings.GAME_ROOM_SEND_QUEUE_SIZE,
+    ) -> None:
+        self.player_id = player_id
+        self.game_room_id = game_room_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(queue_size)
+        self.sender = asyncio.create_task(self.send_queued())
+
+    def send(self, message: str) -> bool:
+        """Queue a message without waiting, False if the queue is full."""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def send_queued(self) -> None:
+        while True:
+            message = await self.queue.get()
+            try:
+                await self.websocket.send_text(message)
+            except (WebSocketDisconnect, RuntimeError):
+                # the receiving side notices the disconnect and cleans up
+                logger.debug("stopped sending to player %d", self.player_id)
+                return
+
+    async def close(self, code: int, reason: str) -> None:
+        self.sender.cancel()
+        with suppress(Exception):
+            await self.websocket.close(code, reason)
+
+
+class RoomState:
+    __slots__ = (
+        "connections",
+        "cur_round",
+        "engine",
+        "game_room_id",
+        "leaderboard",
+        "lock",
+        "plays",
+        "round",
+        "rounds",
+        "upcoming",
+    )
+
+    def __init__(
+        self,
+        game_room: GameRoom,
+        round_data: dict | None,
+        engine: GameEngine | None = None,
+        leaderboard: Leaderboard | None = None,
+    ) -> None:
+        self.game_room_id: int = game_room.id  # type: ignore
+        self.rounds = game_room.rounds
+        self.cur_round = game_room.cur_round
+        # GameRoundRead of the current round, already dumped to JSON types
+        self.round = round_data
+        # reads the next round while the current one is played
+        self.upcoming: asyncio.Task[dict | None] | None = None
+        # rules of the game, None if the room has no known game type
+        self.engine = engine
+        # rows of the plays not written yet
+        self.plays: list[dict] = []
+        # points of the players in the game so far
+        self.leaderboard = leaderboard or Leaderboard()
+        self.connections: dict[int, PlayerConnection] = {}
+        # rounds are started one at a time
+        self.lock = asyncio.Lock()
+
+    def take_plays(self) -> list[dict]:
+        plays, self.plays = self.plays, []
+        return plays
+
+    def restore_plays(self, plays: list[dict]) -> None:
+        self.plays[:0] = plays
+
+    def state_message(self) -> str:
+        return encode(
+            MessageType.STATE,
+            id=self.game_room_id,
+            rounds=self.rounds,
+            cur_round=self.cur_round,
+            player_ids=list(self.connections),
+            round=self.round,
+            phase=self.engine.phase if self.engine else None,
+            scores=self.scores(),
+        )
+
+    def scores(self) -> dict[int, int]:
+        """Points of every player, best first."""
+        return dict(self.leaderboard.top(len(self.leaderboard)))
+
+
+# handles a message of a player, given the room, the connection and the data
+MessageHandler = Callable[
+    ["GameRoomHub", RoomState, PlayerConnection, dict],
+    Awaitable[None],
+]
+
+
+class GameRoomHub:
+    services = GameRoomServices()
+    game_type_services = GameTypeServices()
+    ranking_services = RankingServices()
+    logger = logger
+
+    def __init__(self) -> None:
+        self.rooms: dict[int, RoomState] = {}
+        # player id -> the only connection of the player
+        self.connections: dict[int, PlayerConnection] = {}
+        self.handlers: dict[str, MessageHandler] = {
+            MessageType.NEXT_ROUND: GameRoomHub.handle_next_round,
+            MessageType.PLAY: GameRoomHub.handle_play,
+        }
+        self.session_maker: async_sessionmaker[AsyncSession] | None = None
+        # rooms with rounds not written yet
+        self._dirty: dict[int, RoomState] = {}
+        # flushes run one at a time
+        self._flush_lock = asyncio.Lock()
+        self._flusher: asyncio.Task | None = None
+        self._closing: set[asyncio.Task] = set()
+
+    async def get_room(
+        self,
+        game_room_id: int,
+        session_maker: async_sessionmaker[AsyncSession],
+    ) -> RoomState | None:
+        """State of a live game room, read from the database if nobody is
+        connected to it yet."""
+        room = self.rooms.get(game_room_id)
+        if room is not None:
+            return room
+
+        # a room left by its last player is read back only once it is written,
+        # or straight from memory if writing it failed
+        async with self._flush_lock:
+            room = self.rooms.get(game_room_id) or self._dirty.get(game_room_id)
+            if room is None:
+                async with session_maker() as session:
+                    game_room = await self.services.get_by_id(game_room_id, session)
+                    if game_room is None:
+                        return None
+                    round_data = await self.get_round_data(game_room, session)
+                    engine = await self.get_engine(game_room, session)
+                    leaderboard = await self.ranking_services.get_room_leaderboard(
+                        game_room_id,
+                        session,
+                    )
+                room = RoomState(game_room, round_data, engine, leaderboard)
+            self.rooms[game_room_id] = room
+        self.start(session_maker)
+        if room.upcoming is None:
+            self.read_ahead(room)
+        return room
+
+    async def get_engine(
+        self,
+        game_room: GameRoom,
+        session: AsyncSession,
+    ) -> GameEngine | None:
+        game_type = await self.game_type_services.get_name(
+            game_room.game_type_id,  # type: ignore
+            session,
+        )
+        if game_type is None:
+            return None
+        return get_engine_type(game_type)()  # type: ignore
+
+    async def read_round(self, room: RoomState, position: int) -> dict | None:
+        if self.session_maker is None:
+            return None
+        game_room = GameRoom(
+            id=room.game_room_id,
+            rounds=room.rounds,
+            cur_round=position,
+        )
+        async with self.session_maker() as session:
+            return await self.get_round_data(game_room, session)
+
+    def read_ahead(self, room: RoomState) -> None:
+        if room.cur_round < room.rounds:
+            room.upcoming = asyncio.create_task(
+                self.read_round(room, room.cur_round + 1)
+            )
+
+    async def get_round_data(
+        self,
+        game_room: GameRoom,
+        session: AsyncSession,
+    ) -> dict | None:
+        question = await self.services.get_round_question(game_room, session)
+        if question is None:
+            return None
+        return GameRoundRead(
+            round=game_room.cur_round,
+            question=question,  # type: ignore
+        ).model_dump(mode="json")
+
+    async def join(
+        self,
+        room: RoomState,
+        player_id: int,
+        websocket: WebSocket,
+    ) -> PlayerConnection:
+        previous = self.connections.get(player_id)
+        if previous is not None:
+            await self.leave(previous)
+            self.close(previous, status.WS_1000_NORMAL_CLOSURE, "connected again")
+        # the last player may have left the room since it was loaded
+        room = self.rooms.setdefault(room.game_room_id, room)
+
+        connection = PlayerConnection(player_id, room.game_room_id, websocket)
+        self.connections[player_id] = connection
+        room.connections[player_id] = connection
+        if room.engine is not None:
+            room.engine.add_player(player_id)
+        room.leaderboard.add(player_id)
+        connection.send(room.state_message())
+        self.broadcast_players(room)
+        self.logger.debug("player %d joined %d", player_id, room.game_room_id)
+        return connection
+
+    async def leave(self, connection: PlayerConnection) -> None:
+        connection.sender.cancel()
+        if self.connections.get(connection.player_id) is connection:
+            del self.connections[connection.player_id]
+        room = self.remove(connection)
+        if room is None:
+            return
+        self.broadcast_players(room)
+        self.logger.debug(
+            "player %d left %d",
+            connection.player_id,
+            connection.game_room_id,
+        )
+        if not room.connections:
+            del self.rooms[room.game_room_id]
+            game_rooms_services.evict(room.game_room_id)
+            if room.upcoming is not None:
+                room.upcoming.cancel()
+                room.upcoming = None
+        # not cancelled along with the connection, the room is written anyway
+        await asyncio.shield(self.write_left(room))
+
+    async def write_left(self, room: RoomState) -> None:
+        if room.engine is not None and room.engine.round_complete:
+            # nobody else is waited for
+            await self.close_round(room)
+        if not room.connections:
+            await self.flush()
+
+    def remove(self, connection: PlayerConnection) -> RoomState | None:
+        room = self.rooms.get(connection.game_room_id)
+        if room is None or room.connections.get(connection.player_id) is not connection:
+            return None
+        del room.connections[connection.player_id]
+        if room.engine is not None:
+            room.engine.remove_player(connection.player_id)
+        return room
+
+    def close(self, connection: PlayerConnection, code: int, reason: str) -> None:
+        task = asyncio.create_task(connection.close(code, reason))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def broadcast(self, room: RoomState, message: str) -> None:
+        for connection in list(room.connections.values()):
+            if not connection.send(message):
+                self.logger.warning(
+                    "player %d fell behind in %d, disconnecting",
+                    connection.player_id,
+                    room.game_room_id,
+                )
+                self.remove(connection)
+                self.close(
+                    connection,
+                    status.WS_1013_TRY_AGAIN_LATER,
+                    "too many messages waiting",
+                )
+
+    def broadcast_players(self, room: RoomState) -> None:
+        self.broadcast(
+            room,
+            encode(MessageType.PLAYERS, player_ids=list(room.connections)),
+        )
+
+    async def handle(self, connection: PlayerConnection, message: str) -> None:
+        room = self.rooms.get(connection.game_room_id)
+        if room is None or room.connections.get(connection.player_id) is not connection:
+            return
+        try:
+            data = json.loads(message)
+            handler = self.handlers[data["type"]]
+        except (ValueError, TypeError, KeyError):
+            connection.send(encode(MessageType.ERROR, detail="unknown message"))
+            return
+        await handler(self, room, connection, data)
+
+    async def handle_next_round(
+        self,
+        room: RoomState,
+        connection: PlayerConnection,
+        data: dict,
+    ) -> None:
+        if await self.next_round(room) is None:
+            connection.send(encode(MessageType.ERROR, detail="no rounds left"))
+
+    async def handle_play(
+        self,
+        room: RoomState,
+        connection: PlayerConnection,
+        data: dict,
+    ) -> None:
+        engine = room.engine
+        if engine is None:
+            connection.send(encode(MessageType.ERROR, detail="unknown game type"))
+            return
+        choice = data.get("choice")
+        try:
+            engine.play(connection.player_id, choice)
+        except InvalidPlayError as exc:
+            connection.send(encode(MessageType.ERROR, detail=str(exc)))
+            return
+        room.plays.append(
+            {
+                "game_room_id": room.game_room_id,
+                "round": engine.round,
+                "player_id": connection.player_id,
+                "choice": int(choice),  # type: ignore
+            }
+        )
+        self._dirty[room.game_room_id] = room
+        # the acknowledgement, the play is written later
+        self.broadcast(
+            room,
+            encode(
+                MessageType.PLAYED,
+                round=engine.round,
+                player_id=connection.player_id,
+                phase=engine.phase,
+            ),
+        )
+        if engine.round_complete:
+            await self.close_round(room)
+
+    async def close_round(self, room: RoomState) -> None:
+        """Score the round being played, send the points to every player and
+        write them."""
+        engine = room.engine
+        if engine is None or engine.phase not in (
+            RoundPhase.PLAYING,
+            RoundPhase.JUDGING,
+        ):
+            return
+        points = engine.close_round()
+        for player_id, player_points in points.items():
+            room.leaderboard.add(player_id, player_points)
+        game_over = engine.round == room.rounds
+        scores = room.scores()
+        self.broadcast(
+            room,
+            encode(
+                MessageType.SCORES,
+                round=engine.round,
+                points=points,
+                scores=scores,
+                game_over=game_over,
+            ),
+        )
+        # every player of the round gets a score, even with no points
+        round_points = dict.fromkeys(engine.players, 0) | points
+        # not cancelled along with the connection of the last player
+        await asyncio.shield(
+            self.save_scores(room, round_points, scores if game_over else None)
+        )
+
+    async def save_scores(
+        self,
+        room: RoomState,
+        points: dict[int, int],
+        final_scores: dict[int, int] | None = None,
+    ) -> None:
+        """Write the points of a round along with the plays not written yet,
+        and the end of the game with ``final_scores``."""
+        if self.session_maker is None:
+            return
+        plays = room.take_plays()
+        try:
+            async with self.session_maker() as session:
+                await self.insert_plays(session, plays)
+                await self.ranking_services.save_scores(
+                    room.game_room_id,
+                    points,
+                    session,
+                    final_scores,
+                )
+                # a round without points commits nothing there, its plays
+                # still have to be written
+                await session.commit()
+        except BaseException as exc:
+            room.restore_plays(plays)
+            if not isinstance(exc, Exception):
+                raise
+            self.logger.exception("writing scores of %d failed", room.game_room_id)
+
+    @staticmethod
+    async def insert_plays(session: AsyncSession, plays: list[dict]) -> None:
+        if plays:
+            connection = await session.connection()
+            await connection.execute(insert(Play), plays)
+
+    async def next_round(self, room: RoomState) -> dict | None:
+        """Start the next round of a live room and send it to every player,
+        None once every round was played."""
+        async with room.lock:
+            if room.cur_round >= room.rounds:
+                return None
+            upcoming, room.upcoming = room.upcoming, None
+            round_data = None
+            if upcoming is not None:
+                try:
+                    round_data = await upcoming
+                except Exception:
+                    self.logger.exception("reading ahead %d failed", room.game_room_id)
+            if round_data is None:
+                round_data = await self.read_round(room, room.cur_round + 1)
+            if round_data is None:
+                return None
+            # plays still missing are not waited for
+            await self.close_round(room)
+            room.cur_round += 1
+            room.round = round_data
+            if room.engine is not None:
+                room.engine.start_round(
+                    room.cur_round,
+                    [answer["id"] for answer in round_data["question"]["answers"]],
+                )
+            self._dirty[room.game_room_id] = room
+            self.read_ahead(room)
+        self.broadcast(room, encode(MessageType.ROUND, **round_data))
+        return round_data
+
+    def start(self, session_maker: async_sessionmaker[AsyncSession]) -> None:
+        self.session_maker = session_maker
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self.flush_periodically())
+
+    async def flush_periodically(
+        self,
+        interval: float = settings.GAME_ROOM_FLUSH_INTERVAL,
+    ) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write the rounds and plays of the rooms changed since the last flush
+        in one transaction, returns the number of rooms written."""
+        async with self._flush_lock:
+            if not self._dirty or self.session_maker is None:
+                return 0
+            rooms = list(self._dirty.values())
+            self._dirty.clear()
+            plays = [room.take_plays() for room in rooms]
+            try:
+                await self.write_rounds(
+                    rooms,
+                    [play for room_plays in plays for play in room_plays],
+                    self.session_maker,
+                )
+            except BaseException as exc:
+                for room, room_plays in zip(rooms, plays):
+                    room.restore_plays(room_plays)
+                    self._dirty.setdefault(room.game_room_id, room)
+                if not isinstance(exc, Exception):
+                    raise
+                self.logger.exception("writing %d game rooms failed", len(rooms))
+                return 0
+        change_counters.bump(GameRoom.__tablename__)  # type: ignore
+        self.logger.debug("wrote %d game rooms", len(rooms))
+        return len(rooms)
+
+    @classmethod
+    async def write_rounds(
+        cls,
+        rooms: list[RoomState],
+        plays: list[dict],
+        session_maker: async_sessionmaker[AsyncSession],
+    ) -> None:
+        table = GameRoom.__table__  # type: ignore
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("room_id"))
+            .values(cur_round=bindparam("cur_round"))
+        )
+        async with session_maker() as session:
+            connection = await session.connection()
+            await connection.execute(
+                statement,
+                [
+                    {"room_id": room.game_room_id, "cur_round": room.cur_round}
+                    for room in rooms
+                ],
+            )
+            await changes_services.record_where(
+                session,
+                GameRoom,
+                GameRoom.id.in_([room.game_room_id for room in rooms]),  # type: ignore
+            )
+            await cls.insert_plays(session, plays)
+            await session.commit()
+
+    async def close_all(self) -> None:
+        """Stop the flushes, writing what is left, and disconnect everyone."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+        for connection in list(self.connections.values()):
+            await connection.close(status.WS_1001_GOING_AWAY, "server shutdown")
+        self.clear()
+
+    def clear(self) -> None:
+        for room in self.rooms.values():
+            if room.upcoming is not None:
+                room.upcoming.cancel()
+        self.rooms.clear()
+        self.connections.clear()
+        self._dirty.clear()
+        # a lock is bound to the event loop it was first waited on in
+        self._flush_lock = asyncio.Lock()
+        self._flusher = None
+        self.session_maker = None
+
+
+hub = GameRoomHub()
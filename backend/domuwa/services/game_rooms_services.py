@@ -1,83 +1,231 @@
-# def create_game_room(
-#     game: schemas.GameRoomCreateSchema,
-#     db_sess: Session = Depends(db.get_db_session),
-# ) -> models.GameRoom:
-#     db_game_room = models.GameRoom(
-#         game_name=game.game_name,
-#         game_category=game.game_category,
-#         players=[],
-#     )
-#     return db.save_obj(db_game_room, db_sess)
-#
-#
-# def add_player(
-#     game_room_id: int,
-#     player_id: int,
-#     db_sess: Session = Depends(db.get_db_session),
-# ) -> models.GameRoom:
-#     player = db.get_obj_of_type_by_id(player_id, models.Player, "Player", db_sess)
-#     game_room = db.get_obj_of_type_by_id(
-#         game_room_id,
-#         models.GameRoom,
-#         "GameRoom",
-#         db_sess,
-#     )
-#     player.game_room = game_room
-#     player.game_room_id = game_room_id
-#     if player not in game_room.players:
-#         db.save_obj(player, db_sess)
-#         game_room.players.append(player)
-#     return db.save_obj(game_room, db_sess)
-#
-#
-# def remove_player(
-#     game_room_id: int,
-#     player_id: int,
-#     db_sess: Session = Depends(db.get_db_session),
-# ) -> models.GameRoom:
-#     player = db.get_obj_of_type_by_id(player_id, models.Player, "Player", db_sess)
-#     player.game_room = None
-#     player.game_room_id = None
-#     db.save_obj(player, db_sess)
-#     game = db.get_obj_of_type_by_id(
-#         game_room_id,
-#         models.GameRoom,
-#         "GameRoom",
-#         db_sess,
-#     )
-#     game.players.remove(player)
-#     return db.save_obj(game, db_sess)
-#
-#
-# def remove_all_players(
-#     game_room_id: int,
-#     db_sess: Session = Depends(db.get_db_session),
-# ) -> models.GameRoom:
-#     game = db.get_obj_of_type_by_id(
-#         game_room_id,
-#         models.GameRoom,
-#         "GameRoom",
-#         db_sess,
-#     )
-#     players = (
-#         db_sess.query(models.Player)
-#         .filter(models.Player.game_room_id == game_room_id)
-#         .all()
-#     )
-#     for player in players:
-#         players_services.reset_player_game_room(player.id, db_sess)
-#     return db.save_obj(game, db_sess)
-#
-#
-# def delete_game_room(
-#     game_room_id: int,
-#     db_sess: Session = Depends(db.get_db_session),
-# ) -> None:
-#     db.delete_obj(game_room_id, models.GameRoom, "GameRoom", db_sess)
-#     players = (
-#         db_sess.query(models.Player)
-#         .filter(models.Player.game_room_id == game_room_id)
-#         .all()
-#     )
-#     for player in players:
-#         players_services.reset_player_game_room(player.id, db_sess)
+"""Game rooms and the decks of questions they are played with.
+
+A room draws all of its questions when it is created and stores them in the
+order they are played, with their positions, in one multi-row INSERT.
+Starting a round only looks the question up by its position, the questions
+of the next few rounds are read along with it and kept in memory. A deck
+never changes once stored, so what is kept cannot go stale.
+"""
+
+import logging
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing_extensions import override
+
+from domuwa.models.change import ChangeOperation
+from domuwa.models.game_category import GameCategoryChoices
+from domuwa.models.game_room import (
+    GameRoom,
+    GameRoomCreate,
+    GameRoomRead,
+    GameRoomUpdate,
+)
+from domuwa.models.links import GameRoomQuestionsLink
+from domuwa.models.play import Play
+from domuwa.models.player import Player
+from domuwa.models.qna_category import QnACategoryChoices
+from domuwa.models.question import Question
+from domuwa.models.ranking import Ranking
+from domuwa.services import change_counters, changes_services
+from domuwa.services.common_services import CommonServices
+from domuwa.services.game_category_services import GameCategoryServices
+from domuwa.services.game_type_services import GameTypeServices
+from domuwa.services.qna_categories_services import QnACategoryServices
+from domuwa.services.question_draw_services import QuestionDrawServices
+from domuwa.services.questions_services import QuestionServices
+
+# rounds read from the deck with each lookup
+PREFETCH_ROUNDS = 4
+
+# game room id -> question ids of the rounds read ahead, by position
+_prefetched: dict[int, dict[int, int]] = {}
+
+
+def evict(game_room_id: int) -> None:
+    _prefetched.pop(game_room_id, None)
+
+
+def clear() -> None:
+    _prefetched.clear()
+
+
+class GameRoomServices(CommonServices[GameRoomCreate, GameRoomUpdate, GameRoom]):
+    db_model_type = GameRoom
+    read_model_type = GameRoomRead
+    logger = logging.getLogger(__name__)
+
+    @override
+    async def create(
+        self,
+        model: GameRoomCreate,
+        session: AsyncSession,
+    ) -> GameRoom | None:
+        game_type = await GameTypeServices().get_name(model.game_type_id, session)
+        qna_category_ids = await self.get_qna_category_ids(
+            model.game_category_id,
+            session,
+        )
+        if game_type is None or not qna_category_ids:
+            self.logger.warning("%s references missing rows", model)
+            return None
+
+        deck = await QuestionDrawServices().draw_deck(
+            model.game_type_id,
+            qna_category_ids,
+            model.rounds,
+            session,
+        )
+        if not deck:
+            self.logger.warning("no playable questions for %s", model)
+            return None
+
+        game_room = GameRoom.model_validate(model)
+        # with fewer playable questions than asked for, the game ends earlier
+        game_room.rounds = len(deck)
+        session.add(game_room)
+        await session.flush()
+        changes_services.record(session, game_room)
+        await session.exec(
+            insert(GameRoomQuestionsLink).values(  # type: ignore
+                [
+                    {
+                        "game_room_id": game_room.id,
+                        "question_id": question_id,
+                        "position": position,
+                    }
+                    for position, question_id in enumerate(deck, start=1)
+                ]
+            )
+        )
+        await session.commit()
+        change_counters.bump(self.table_name, GameRoomQuestionsLink.__tablename__)
+        self.logger.debug("created %s with %d questions", game_room, len(deck))
+        return await self.get_by_id(game_room.id, session)  # type: ignore
+
+    async def get_qna_category_ids(
+        self,
+        game_category_id: int,
+        session: AsyncSession,
+    ) -> list[int]:
+        """Categories of the questions a game category is played with."""
+        name = await GameCategoryServices().get_name(game_category_id, session)
+        if name is None:
+            return []
+        if name == GameCategoryChoices.MIXED:
+            names = list(QnACategoryChoices)
+        else:
+            names = [QnACategoryChoices(name)]
+
+        qna_category_ids = []
+        for qna_category in names:
+            qna_category_id = await QnACategoryServices().get_id(qna_category, session)
+            if qna_category_id is not None:
+                qna_category_ids.append(qna_category_id)
+        return qna_category_ids
+
+    async def get_question_id(
+        self,
+        game_room_id: int,
+        position: int,
+        session: AsyncSession,
+    ) -> int | None:
+        prefetched = _prefetched.get(game_room_id)
+        if prefetched is None or position not in prefetched:
+            statement = select(
+                GameRoomQuestionsLink.position,
+                GameRoomQuestionsLink.question_id,
+            ).where(
+                GameRoomQuestionsLink.game_room_id == game_room_id,
+                GameRoomQuestionsLink.position >= position,
+                GameRoomQuestionsLink.position < position + PREFETCH_ROUNDS,
+            )
+            prefetched = dict((await session.exec(statement)).all())  # type: ignore
+            _prefetched[game_room_id] = prefetched
+        return prefetched.get(position)
+
+    async def get_round_question(
+        self,
+        game_room: GameRoom,
+        session: AsyncSession,
+    ) -> Question | None:
+        """Question of the current round, None before the first one."""
+        if game_room.cur_round < 1:
+            return None
+        question_id = await self.get_question_id(
+            game_room.id,  # type: ignore
+            game_room.cur_round,
+            session,
+        )
+        if question_id is None:
+            return None
+        return await QuestionServices().get_by_id(question_id, session)
+
+    async def next_round(
+        self,
+        game_room: GameRoom,
+        session: AsyncSession,
+    ) -> Question | None:
+        """Move the game room to its next round and return its question, None
+        once every round was played."""
+        # a single UPDATE, two requests at once never start the same round
+        statement = (
+            update(GameRoom)
+            .where(
+                GameRoom.id == game_room.id,  # type: ignore
+                GameRoom.cur_round < GameRoom.rounds,  # type: ignore
+            )
+            .values(cur_round=GameRoom.cur_round + 1)
+            .returning(GameRoom.cur_round)
+        )
+        cur_round = (await session.exec(statement)).scalar_one_or_none()  # type: ignore
+        if cur_round is None:
+            return None
+        set_committed_value(game_room, "cur_round", cur_round)
+        changes_services.record(session, game_room)
+        await session.commit()
+        change_counters.bump(self.table_name)
+
+        question = await self.get_round_question(game_room, session)
+        if cur_round == game_room.rounds:
+            evict(game_room.id)  # type: ignore
+        return question
+
+    @override
+    async def delete(self, model: GameRoom, session: AsyncSession):
+        game_room_id = model.id
+        changes_services.record(session, model, ChangeOperation.DELETE)
+        model_type: type[Player | Ranking | GameRoomQuestionsLink | Play]
+        # players and rankings outlive the game room
+        for model_type in (Player, Ranking):
+            statement = (
+                update(model_type)
+                .where(model_type.game_room_id == game_room_id)  # type: ignore
+                .values(game_room_id=None)
+                .returning(model_type.id)  # type: ignore
+                .execution_options(synchronize_session=False)
+            )
+            model_ids = list((await session.exec(statement)).scalars())  # type: ignore
+            await changes_services.record_where(
+                session,
+                model_type,
+                model_type.id.in_(model_ids),  # type: ignore
+            )
+        for model_type in (GameRoomQuestionsLink, Play):
+            await session.exec(
+                delete(model_type).where(  # type: ignore
+                    model_type.game_room_id == game_room_id  # type: ignore
+                )
+            )
+        await session.exec(delete(GameRoom).where(GameRoom.id == game_room_id))  # type: ignore
+        await session.commit()
+        evict(game_room_id)  # type: ignore
+        change_counters.bump(
+            self.table_name,
+            GameRoomQuestionsLink.__tablename__,
+            Player.__tablename__,
+            Ranking.__tablename__,
+        )
+        self.logger.debug("removed GameRoom(id=%d)", game_room_id)
@@ -1,9 +1,9 @@
 import logging
 
 from domuwa.models.game_type import GameType, GameTypeCreate, GameTypeUpdate
-from domuwa.services.common_services import CommonServices
+from domuwa.services.common_services import CachedChoicesServices
 
 
-class GameTypeServices(CommonServices[GameTypeCreate, GameTypeUpdate, GameType]):
+class GameTypeServices(CachedChoicesServices[GameTypeCreate, GameTypeUpdate, GameType]):
     db_model_type = GameType
     logger = logging.getLogger(__name__)
@@ -0,0 +1,174 @@
+"""Leaderboards kept in memory and updated one score at a time.
+
+A ``Leaderboard`` counts its players by score in a Fenwick tree, so changing
+a score, finding the rank of a player and walking down to the k-th best
+player all take O(log S) steps, S being the highest score. Nothing is ever
+sorted. Every live game room has a leaderboard of the points of its players,
+see ``domuwa.services.game_room_hub``.
+
+The global leaderboard ranks players by ``Player.games_won``. It is read from
+the database once, on first use, and then kept up to date by the end of
+every game. Only players who have played a game are on it, anyone else has no
+wins and shares the last rank.
+"""
+
+import asyncio
+from bisect import bisect_left, insort
+from collections.abc import Mapping
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.models.player import Player
+
+
+class Leaderboard:
+    """Players ordered by score, highest first. Players with the same score
+    share a rank and are listed by id."""
+
+    def __init__(self, scores: Mapping[int, int] | None = None) -> None:
+        self._scores: dict[int, int] = {}
+        # score -> ids of its players, sorted
+        self._players: dict[int, list[int]] = {}
+        # 1-based Fenwick tree of the number of players by score + 1
+        self._tree = [0] * 17
+        for player_id, score in (scores or {}).items():
+            self.set(player_id, score)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, player_id: int) -> bool:
+        return player_id in self._scores
+
+    def score(self, player_id: int) -> int | None:
+        return self._scores.get(player_id)
+
+    def set(self, player_id: int, score: int) -> None:
+        if score < 0:
+            raise ValueError(f"score cannot be negative, got {score}")
+        old_score = self._scores.get(player_id)
+        if old_score == score:
+            return
+        if old_score is not None:
+            self._remove(player_id, old_score)
+        while score + 1 >= len(self._tree):
+            self._grow()
+        self._scores[player_id] = score
+        insort(self._players.setdefault(score, []), player_id)
+        self._update(score, 1)
+
+    def add(self, player_id: int, points: int = 0) -> int:
+        """Add points to the score of a player, who starts with none."""
+        score = self._scores.get(player_id, 0) + points
+        self.set(player_id, score)
+        return score
+
+    def discard(self, player_id: int) -> None:
+        score = self._scores.pop(player_id, None)
+        if score is not None:
+            self._remove(player_id, score)
+
+    def rank_of(self, score: int) -> int:
+        """Rank a score would have, 1 for the best one."""
+        return len(self._scores) - self._count_up_to(score) + 1
+
+    def rank(self, player_id: int) -> int | None:
+        score = self._scores.get(player_id)
+        return None if score is None else self.rank_of(score)
+
+    def top(self, k: int) -> list[tuple[int, int]]:
+        """``(player id, score)`` of the best ``k`` players."""
+        top: list[tuple[int, int]] = []
+        while len(top) < min(k, len(self._scores)):
+            # the best player not listed yet is the n-th lowest
+            score = self._find(len(self._scores) - len(top))
+            players = self._players[score][: k - len(top)]
+            top.extend((player_id, score) for player_id in players)
+        return top
+
+    def _remove(self, player_id: int, score: int) -> None:
+        players = self._players[score]
+        del players[bisect_left(players, player_id)]
+        if not players:
+            del self._players[score]
+        self._update(score, -1)
+
+    def _update(self, score: int, delta: int) -> None:
+        i = score + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _count_up_to(self, score: int) -> int:
+        i = min(score + 1, len(self._tree) - 1)
+        count = 0
+        while i > 0:
+            count += self._tree[i]
+            i -= i & -i
+        return count
+
+    def _find(self, n: int) -> int:
+        """Lowest score with at least ``n`` players scoring the same or less."""
+        i = 0
+        step = 1 << ((len(self._tree) - 1).bit_length() - 1)
+        while step:
+            if i + step < len(self._tree) and self._tree[i + step] < n:
+                i += step
+                n -= self._tree[i]
+            step >>= 1
+        return i
+
+    def _grow(self) -> None:
+        self._tree = [0] * (2 * len(self._tree) - 1)
+        for score, players in self._players.items():
+            self._update(score, len(players))
+
+
+_global: Leaderboard | None = None
+# games ended since the process started, a load that overlaps one reads again
+_games_ended = 0
+_load_lock = asyncio.Lock()
+
+
+async def get_global(session: AsyncSession) -> Leaderboard:
+    global _global
+    if _global is not None:
+        return _global
+    async with _load_lock:
+        while _global is None:
+            games_ended = _games_ended
+            statement = select(Player.id, Player.games_won).where(
+                Player.games_played > 0
+            )
+            rows = (await session.exec(statement)).all()
+            if games_ended == _games_ended:
+                _global = Leaderboard(dict(rows))  # type: ignore
+            else:
+                # a new read transaction sees the game
+                await session.rollback()
+    return _global
+
+
+def record_game(player_ids: list[int], winner_ids: list[int]) -> None:
+    """Count a game written to the database on the global leaderboard."""
+    global _games_ended
+    _games_ended += 1
+    if _global is None:
+        return
+    for player_id in player_ids:
+        _global.add(player_id)
+    for player_id in winner_ids:
+        _global.add(player_id, 1)
+
+
+def discard(player_id: int) -> None:
+    if _global is not None:
+        _global.discard(player_id)
+
+
+def clear() -> None:
+    global _global, _load_lock
+    _global = None
+    # a lock is bound to the event loop it was first waited on in
+    _load_lock = asyncio.Lock()
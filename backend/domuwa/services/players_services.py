@@ -1,9 +1,19 @@
 import logging
 
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing_extensions import override
+
 from domuwa.models.player import Player, PlayerCreate, PlayerUpdate
+from domuwa.services import leaderboards
 from domuwa.services.common_services import CommonServices
 
 
 class PlayerServices(CommonServices[PlayerCreate, PlayerUpdate, Player]):
     db_model_type = Player
     logger = logging.getLogger(__name__)
+
+    @override
+    async def delete(self, model: Player, session: AsyncSession):
+        player_id = model.id
+        await super().delete(model, session)
+        leaderboards.discard(player_id)  # type: ignore
@@ -1,11 +1,11 @@
 import logging
 
 from domuwa.models.qna_category import QnACategory, QnACategoryCreate, QnACategoryUpdate
-from domuwa.services.common_services import CommonServices
+from domuwa.services.common_services import CachedChoicesServices
 
 
 class QnACategoryServices(
-    CommonServices[QnACategoryCreate, QnACategoryUpdate, QnACategory]
+    CachedChoicesServices[QnACategoryCreate, QnACategoryUpdate, QnACategory]
 ):
     db_model_type = QnACategory
     logger = logging.getLogger(__name__)
@@ -0,0 +1,224 @@
+"""Random draws of playable questions from in-memory id pools.
+
+``ORDER BY RANDOM() LIMIT n`` reads and sorts every candidate row on each
+draw. Instead, ids of the playable questions, the latest versions neither
+deleted nor excluded, are kept per game type and category in sorted arrays
+of 8 bytes per question, loaded on the first draw. ``QuestionServices`` and
+``DeckServices`` update them after every commit, so, just like the change
+counters, they only see the writes of their own process.
+"""
+
+import logging
+import random
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Collection, Iterable, Mapping
+from itertools import accumulate
+
+from sqlalchemy import false
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.models.links import GameRoomQuestionsLink
+from domuwa.models.question import Question
+
+logger = logging.getLogger(__name__)
+
+PoolKey = tuple[int, int]
+# ids read at once while loading a pool
+LOAD_BATCH_SIZE = 10_000
+
+
+class QuestionPool:
+    """Sorted ids, removed ones stay in place until a quarter of them is
+    removed, so a removal never moves the rest of the array."""
+
+    __slots__ = ("_ids", "_removed")
+
+    def __init__(self, ids: Iterable[int] = ()) -> None:
+        # ids come sorted
+        self._ids = array("q", ids)
+        self._removed: set[int] = set()
+
+    def extend(self, ids: Iterable[int]) -> None:
+        """Append ids higher than all the ones already in the pool, sorted."""
+        self._ids.extend(ids)
+
+    def __len__(self) -> int:
+        return len(self._ids) - len(self._removed)
+
+    def __contains__(self, question_id: int) -> bool:
+        return self._find(question_id) is not None and question_id not in self._removed
+
+    def _find(self, question_id: int) -> int | None:
+        position = bisect_left(self._ids, question_id)
+        if position < len(self._ids) and self._ids[position] == question_id:
+            return position
+        return None
+
+    def add(self, question_id: int) -> None:
+        if self._find(question_id) is not None:
+            self._removed.discard(question_id)
+        elif not self._ids or question_id > self._ids[-1]:
+            # new rows get the highest ids, appending keeps the order
+            self._ids.append(question_id)
+        else:
+            insort(self._ids, question_id)
+
+    def remove(self, question_id: int) -> None:
+        if self._find(question_id) is None:
+            return
+        self._removed.add(question_id)
+        if len(self._removed) * 4 > len(self._ids):
+            self._ids = array("q", (i for i in self._ids if i not in self._removed))
+            self._removed.clear()
+
+    def draw(self, count: int, exclude: Collection[int] = ()) -> list[int]:
+        """Up to ``count`` distinct random ids not in ``exclude``.
+
+        Random positions are tried until enough ids are drawn, which takes
+        O(count) tries while at least half of the array can still be drawn,
+        otherwise all drawable ids are shuffled instead.
+        """
+        size = len(self._ids)
+        unavailable = len(self._removed) + len(exclude)
+        if count <= 0 or size == 0:
+            return []
+        if 2 * (count + unavailable) > size:
+            drawable = [
+                i for i in self._ids if i not in self._removed and i not in exclude
+            ]
+            return random.sample(drawable, min(count, len(drawable)))
+
+        drawn: list[int] = []
+        tried: set[int] = set()
+        while len(drawn) < count:
+            position = random.randrange(size)
+            if position in tried:
+                continue
+            tried.add(position)
+            question_id = self._ids[position]
+            if question_id not in self._removed and question_id not in exclude:
+                drawn.append(question_id)
+        return drawn
+
+
+_pools: dict[PoolKey, QuestionPool] = {}
+# bumped by every write, a pool loaded while it moved may have missed it
+_writes = 0
+
+
+def add(questions: Iterable[Question | Mapping]) -> None:
+    """Add committed questions, the ones that cannot be played are skipped."""
+    global _writes
+    _writes += 1
+    for question in questions:
+        if isinstance(question, Mapping):
+            question = Question.model_construct(**question)
+        if question.deleted or question.excluded or question.head_id is not None:
+            continue
+        pool = _pools.get((question.game_type_id, question.game_category_id))  # type: ignore
+        if pool is not None:
+            pool.add(question.id)  # type: ignore
+
+
+def remove(question_ids: Iterable[int]) -> None:
+    """Remove questions no longer playable, from whichever pool holds them."""
+    global _writes
+    _writes += 1
+    for question_id in question_ids:
+        for pool in _pools.values():
+            pool.remove(question_id)
+
+
+def clear() -> None:
+    global _writes
+    _writes += 1
+    _pools.clear()
+
+
+class QuestionDrawServices:
+    logger = logger
+
+    async def get_pool(
+        self,
+        game_type_id: int,
+        game_category_id: int,
+        session: AsyncSession,
+    ) -> QuestionPool:
+        key = (game_type_id, game_category_id)
+        while key not in _pools:
+            writes = _writes
+            # the WHERE repeats the one of ix_question_playable, whose entries
+            # are already sorted by id for a game type and category
+            statement = (
+                select(Question.id)
+                .where(
+                    Question.game_type_id == game_type_id,
+                    Question.game_category_id == game_category_id,
+                    Question.deleted == false(),
+                    Question.excluded == false(),
+                    col(Question.head_id).is_(None),
+                )
+                .order_by(col(Question.id))
+                .execution_options(yield_per=LOAD_BATCH_SIZE)
+            )
+            pool = QuestionPool()
+            result = await session.stream_scalars(statement)
+            async for ids in result.partitions():
+                pool.extend(ids)
+            if writes == _writes:
+                _pools[key] = pool
+                self.logger.debug("loaded %d questions of %s", len(pool), key)
+        return _pools[key]
+
+    async def get_used_ids(self, game_room_id: int, session: AsyncSession) -> set[int]:
+        statement = select(GameRoomQuestionsLink.question_id).where(
+            GameRoomQuestionsLink.game_room_id == game_room_id
+        )
+        return set((await session.exec(statement)).all())  # type: ignore
+
+    async def draw(
+        self,
+        game_type_id: int,
+        game_category_id: int,
+        count: int,
+        session: AsyncSession,
+        game_room_id: int | None = None,
+    ) -> list[int]:
+        """Ids of up to ``count`` random playable questions, leaving out the
+        ones the game room was already given."""
+        pool = await self.get_pool(game_type_id, game_category_id, session)
+        used_ids = set()
+        if game_room_id is not None:
+            used_ids = await self.get_used_ids(game_room_id, session)
+        return pool.draw(count, used_ids)
+
+    async def draw_deck(
+        self,
+        game_type_id: int,
+        game_category_ids: list[int],
+        count: int,
+        session: AsyncSession,
+    ) -> list[int]:
+        """Ids of up to ``count`` random playable questions of any of the
+        categories, shuffled, each question as likely as any other."""
+        pools = [
+            await self.get_pool(game_type_id, game_category_id, session)
+            for game_category_id in game_category_ids
+        ]
+        # a draw of positions in all the pools laid end to end tells how many
+        # questions to draw from each of them
+        bounds = list(accumulate(len(pool) for pool in pools))
+        total = bounds[-1] if bounds else 0
+        counts = [0] * len(pools)
+        for position in random.sample(range(total), min(count, total)):
+            counts[bisect_right(bounds, position)] += 1
+
+        deck = [
+            question_id
+            for pool, pool_count in zip(pools, counts)
+            for question_id in pool.draw(pool_count)
+        ]
+        random.shuffle(deck)
+        return deck
@@ -1,48 +1,209 @@
 import logging
+from itertools import chain
 
-from sqlmodel import Session
+from sqlalchemy import false, or_
+from sqlmodel import Field, col, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing_extensions import override
 
-from domuwa.models.question import Question, QuestionCreate, QuestionUpdate
-from domuwa.services.common_services import CommonServices
+from domuwa.models.answer import Answer
+from domuwa.models.question import (
+    Question,
+    QuestionCreate,
+    QuestionUpdate,
+    QuestionWithAnswersCreate,
+    QuestionWithAnswersRead,
+)
+from domuwa.services import (
+    change_counters,
+    changes_services,
+    question_draw_services,
+)
+from domuwa.services.answers_services import AnswerServices
+from domuwa.services.common_services import (
+    BulkCreateResult,
+    BulkSelection,
+    VersionedServices,
+)
 
 
-class QuestionServices(CommonServices[QuestionCreate, QuestionUpdate, Question]):
+class QuestionBulkCreateResult(BulkCreateResult):
+    answer_ids: list[int] = Field(default_factory=list)
+
+
+class QuestionServices(VersionedServices[QuestionCreate, QuestionUpdate, Question]):
     db_model_type = Question
     logger = logging.getLogger(__name__)
+    read_model_type = QuestionWithAnswersRead
+
+    @override
+    async def create_bulk(  # type: ignore
+        self,
+        models: list[QuestionWithAnswersCreate],
+        session: AsyncSession,
+    ) -> list[QuestionBulkCreateResult]:
+        """Insert questions together with their answers in one transaction.
+
+        A question is skipped, answers included, if any of them is invalid.
+        """
+        answer_services = AnswerServices()
+        question_rows = [
+            self.to_row(model.model_dump(exclude={"answers"})) for model in models
+        ]
+        answer_rows = [
+            [
+                answer_services.to_row(answer.model_dump(exclude={"question_id"}))
+                for answer in model.answers
+            ]
+            for model in models
+        ]
+
+        question_errors = await self.reference_errors(question_rows, session)
+        answer_errors = iter(
+            await answer_services.reference_errors(
+                list(chain.from_iterable(answer_rows)),
+                session,
+            )
+        )
+        results = []
+        for question_error, rows in zip(question_errors, answer_rows):
+            errors = [question_error, *(next(answer_errors) for _ in rows)]
+            error = next((error for error in errors if error is not None), None)
+            results.append(QuestionBulkCreateResult(error=error))
+
+        valid = [i for i, result in enumerate(results) if result.error is None]
+        inserted = await self.insert_rows([question_rows[i] for i in valid], session)
+        for i, result in zip(valid, inserted):
+            results[i].id = result.id
+            results[i].error = result.error
+            for row in answer_rows[i]:
+                row["question_id"] = result.id
+
+        with_answers = [
+            i for i in valid if results[i].id is not None and answer_rows[i]
+        ]
+        inserted_answers = iter(
+            await answer_services.insert_rows(
+                [row for i in with_answers for row in answer_rows[i]],
+                session,
+            )
+        )
+        for i in with_answers:
+            answers = [next(inserted_answers) for _ in answer_rows[i]]
+            for row, answer in zip(answer_rows[i], answers):
+                row["id"] = answer.id
+            results[i].answer_ids = [a.id for a in answers if a.id is not None]
+            results[i].error = next((a.error for a in answers if a.error), None)
+
+        failed = [results[i].id for i in with_answers if results[i].error is not None]
+        if failed:
+            # keep every question all-or-nothing
+            await session.exec(delete(Answer).where(Answer.question_id.in_(failed)))  # type: ignore
+            await session.exec(delete(Question).where(Question.id.in_(failed)))  # type: ignore
+            for i in with_answers:
+                if results[i].error is not None:
+                    results[i].id = None
+                    results[i].answer_ids = []
+
+        created = [i for i, result in enumerate(results) if result.id is not None]
+        await changes_services.record_rows(
+            session,
+            self.table_name,
+            [question_rows[i] | {"id": results[i].id} for i in created],
+        )
+        await changes_services.record_rows(
+            session,
+            answer_services.table_name,
+            [row for i in created for row in answer_rows[i]],
+        )
+        await session.commit()
+        change_counters.bump(self.table_name, Answer.__tablename__)
+        question_draw_services.add(
+            question_rows[i] | {"id": results[i].id} for i in created
+        )
+        self.logger.debug(
+            "bulk created %d/%d %s",
+            sum(result.id is not None for result in results),
+            len(results),
+            Question.__name__,
+        )
+        return results
+
+    @override
+    async def save(
+        self,
+        model: QuestionCreate | Question,
+        session: AsyncSession,
+    ) -> Question | None:
+        db_model = await super().save(model, session)
+        if db_model is not None:
+            question_draw_services.add([db_model])
+        return db_model
 
     @override
     async def update(
         self,
         model: Question,
         model_update: QuestionUpdate,
-        session: Session,
+        session: AsyncSession,
     ):
-        update_data = model_update.model_dump(exclude_unset=True)
-        model_data = model.model_dump(exclude={"id"}) | update_data
-        updated_model = Question(**model_data)
-
-        updated_model.prev_version = model
-        model.next_versions.append(updated_model)
-
-        answers = model.answers
-        if answers:
-            updated_model.answers = answers
-
-        session.add(updated_model)
-        session.add(model)
-        session.commit()
-        session.refresh(updated_model)
-        return updated_model
+        head_id = model.head_id or model.id
+        # answers stay on the versions they were added to, the latest version
+        # lists them through head_id
+        updated_model = await self.insert_version(model, model_update, session)
+        changes_services.record(session, updated_model)
+        await session.commit()
+        change_counters.bump(self.table_name)
+        question_draw_services.remove([head_id])  # type: ignore
+        question_draw_services.add([updated_model])
+        return await self.get_by_id(updated_model.id, session)  # type: ignore
 
     @override
-    async def delete(self, model: Question, session: Session):
-        model.deleted = True
+    async def delete(self, model: Question, session: AsyncSession):
+        await self.delete_many(BulkSelection(ids=[model.id]), session)  # type: ignore
 
-        for answer in model.answers:
-            answer.deleted = True
-            session.add(answer)
+    @override
+    async def delete_many(self, selection: BulkSelection, session: AsyncSession) -> int:
+        """Soft delete the selected questions together with their answers, one
+        UPDATE per table."""
+        conditions = self.selection_conditions(selection)
+        # answers go first, the questions still match the selection then
+        questions = select(Question.id).where(*conditions)
+        # answers can be on any version of a question
+        versions = select(Question.id).where(
+            or_(
+                col(Question.id).in_(questions),
+                col(Question.head_id).in_(questions),
+            )
+        )
+        await self.mark_deleted(
+            Answer,
+            [
+                Answer.question_id.in_(versions),  # type: ignore
+                Answer.deleted == false(),  # type: ignore
+            ],
+            session,
+        )
+        question_ids = await self.mark_deleted(Question, conditions, session)
+        await session.commit()
+        change_counters.bump(self.table_name, Answer.__tablename__)
+        question_draw_services.remove(question_ids)
+        self.logger.debug(
+            "marked %d %s as deleted", len(question_ids), Question.__name__
+        )
+        return len(question_ids)
 
-        session.add(model)
-        session.commit()
-        self.logger.debug("marked %s(id=%d) as deleted", Question.__name__, model.id)
+    @override
+    async def exclude_many(
+        self, selection: BulkSelection, session: AsyncSession
+    ) -> int:
+        question_ids = await self.mark_excluded(
+            Question,
+            self.selection_conditions(selection),
+            session,
+        )
+        await session.commit()
+        change_counters.bump(self.table_name)
+        question_draw_services.remove(question_ids)
+        self.logger.debug("excluded %d %s", len(question_ids), Question.__name__)
+        return len(question_ids)
@@ -0,0 +1,142 @@
+"""Rankings of game rooms, written by the hub between rounds.
+
+The points of a round are added to the scores of the room's ranking, and at
+the end of a game every player's ``games_played`` and the winners'
+``games_won`` go up by one. Both are increments done by the database, with
+one statement per batch, so nothing is read back first and no concurrent
+write is lost.
+"""
+
+import logging
+
+from sqlalchemy import update
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.models.player import Player
+from domuwa.models.player_score import PlayerScore
+from domuwa.models.ranking import Ranking
+from domuwa.services import change_counters, changes_services, leaderboards
+from domuwa.services.leaderboards import Leaderboard
+
+
+class RankingServices:
+    logger = logging.getLogger(__name__)
+
+    async def get_ranking_id(
+        self,
+        game_room_id: int,
+        session: AsyncSession,
+    ) -> int:
+        """Id of the ranking of a game room, created with its first scores."""
+        statement = select(Ranking.id).where(Ranking.game_room_id == game_room_id)
+        ranking_id = (await session.exec(statement)).first()
+        if ranking_id is None:
+            ranking = Ranking(game_room_id=game_room_id)
+            session.add(ranking)
+            await session.flush()
+            changes_services.record(session, ranking)
+            ranking_id = ranking.id
+        return ranking_id  # type: ignore
+
+    async def save_scores(
+        self,
+        game_room_id: int,
+        points: dict[int, int],
+        session: AsyncSession,
+        final_scores: dict[int, int] | None = None,
+    ) -> int | None:
+        """Add the points of a round to the scores of the players of a game
+        room with one UPSERT, returns the id of the ranking. ``final_scores``
+        ends the game, every player in it played and the best ones won."""
+        if not points:
+            return None
+        ranking_id = await self.get_ranking_id(game_room_id, session)
+        statement = insert(PlayerScore).values(
+            [
+                {"ranking_id": ranking_id, "player_id": player_id, "score": score}
+                for player_id, score in points.items()
+            ]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[col(PlayerScore.ranking_id), col(PlayerScore.player_id)],
+            set_={"score": PlayerScore.score + statement.excluded.score},
+        )
+        await session.exec(statement)  # type: ignore
+        await changes_services.record_where(
+            session,
+            PlayerScore,
+            PlayerScore.ranking_id == ranking_id,  # type: ignore
+            PlayerScore.player_id.in_(points),  # type: ignore
+        )
+        tables = [Ranking.__tablename__, PlayerScore.__tablename__]
+        winner_ids = []
+        if final_scores:
+            winner_ids = self.get_winner_ids(final_scores)
+            await self.count_game(list(final_scores), winner_ids, session)
+            tables.append(Player.__tablename__)
+        await session.commit()
+        change_counters.bump(*tables)  # type: ignore
+        if final_scores:
+            leaderboards.record_game(list(final_scores), winner_ids)
+        self.logger.debug(
+            "saved %d scores of GameRoom(id=%d)",
+            len(points),
+            game_room_id,
+        )
+        return ranking_id
+
+    @staticmethod
+    def get_winner_ids(scores: dict[int, int]) -> list[int]:
+        best_score = max(scores.values())
+        if best_score <= 0:
+            return []
+        return [player_id for player_id, score in scores.items() if score == best_score]
+
+    @staticmethod
+    async def count_game(
+        player_ids: list[int],
+        winner_ids: list[int],
+        session: AsyncSession,
+    ) -> None:
+        for column, counted_ids in (
+            (Player.games_played, player_ids),
+            (Player.games_won, winner_ids),
+        ):
+            if not counted_ids:
+                continue
+            statement = (
+                update(Player)
+                .where(Player.id.in_(counted_ids))  # type: ignore
+                .values({column: column + 1})
+                .execution_options(synchronize_session=False)
+            )
+            await session.exec(statement)  # type: ignore
+        await changes_services.record_where(
+            session,
+            Player,
+            Player.id.in_(player_ids),  # type: ignore
+        )
+
+    async def get_room_leaderboard(
+        self,
+        game_room_id: int,
+        session: AsyncSession,
+    ) -> Leaderboard | None:
+        """Scores of a game room nobody plays in, None if it has none."""
+        statement = (
+            select(PlayerScore.player_id, PlayerScore.score)
+            .join(Ranking)
+            .where(Ranking.game_room_id == game_room_id)
+        )
+        scores = dict((await session.exec(statement)).all())
+        return Leaderboard(scores) if scores else None  # type: ignore
+
+    async def get_names(
+        self,
+        player_ids: list[int],
+        session: AsyncSession,
+    ) -> dict[int, str]:
+        statement = select(Player.id, Player.name).where(Player.id.in_(player_ids))  # type: ignore
+        return dict((await session.exec(statement)).all())  # type: ignore
@@ -0,0 +1,139 @@
+"""Pay the one-time costs of the first requests while the server starts.
+
+Left alone, the first request for ``/openapi.json`` builds the whole schema,
+and the first request to a list endpoint opens a database connection,
+configures the mappers and compiles its statement. With ``STARTUP_WARMUP``
+the lifespan does all of this before the first guest connects.
+
+The OpenAPI schema is written to ``OPENAPI_CACHE_DIR`` and read back on later
+starts. Its file is keyed by the app version and by the routes, so a new
+release gets a new schema. A changed response model without a new version
+keeps the old one, delete the file to build it again.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlalchemy.orm import configure_mappers
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.config import settings
+from domuwa.database import engine, session_maker
+from domuwa.routers.common_router import CommonRouter
+
+logger = logging.getLogger(__name__)
+
+
+def openapi_cache_path(app: FastAPI, cache_dir: Path) -> Path:
+    routes = hashlib.sha256()
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            routes.update(f"{sorted(route.methods)} {route.path} {route.name}".encode())
+    return cache_dir / f"openapi-{app.version}-{routes.hexdigest()[:16]}.json"
+
+
+def load_openapi(app: FastAPI, cache_dir: str = settings.OPENAPI_CACHE_DIR) -> bool:
+    """Set the OpenAPI schema of ``app``, from the cache when it has one,
+    returns True if it was read from there."""
+    if not cache_dir:
+        app.openapi()
+        return False
+
+    path = openapi_cache_path(app, Path(cache_dir))
+    try:
+        app.openapi_schema = json.loads(path.read_bytes())
+        return True
+    except FileNotFoundError:
+        pass
+    except ValueError:
+        logger.warning("%s is not valid JSON, building the schema again", path)
+
+    schema = app.openapi()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # written whole or not at all, another start may be reading it
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(schema))
+        tmp_path.replace(path)
+        for stale in path.parent.glob("openapi-*.json"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+    except OSError:
+        logger.exception("could not write the OpenAPI schema to %s", path)
+    return False
+
+
+async def prime_pool(db_engine: AsyncEngine = engine) -> int:
+    """Open as many connections as the pool keeps, returns how many."""
+    size = db_engine.pool.size() if hasattr(db_engine.pool, "size") else 1
+    async with AsyncExitStack() as stack:
+        conns = await asyncio.gather(
+            *(stack.enter_async_context(db_engine.connect()) for _ in range(size))
+        )
+        for conn in conns:
+            await conn.execute(text("SELECT 1"))
+    return size
+
+
+def get_common_routers(app: FastAPI) -> list[CommonRouter]:
+    routers: dict[int, CommonRouter] = {}
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        router = getattr(route.endpoint, "__self__", None)
+        if isinstance(router, CommonRouter):
+            routers[id(router)] = router
+    return list(routers.values())
+
+
+async def warm_up(
+    app: FastAPI,
+    db_engine: AsyncEngine = engine,
+    db_session_maker: async_sessionmaker[AsyncSession] = session_maker,
+    cache_dir: str = settings.OPENAPI_CACHE_DIR,
+) -> dict[str, float]:
+    """Warm everything up, returns the milliseconds every step took."""
+    timings: dict[str, float] = {}
+    start = step_start = time.perf_counter()
+
+    def step_done(name: str) -> None:
+        nonlocal step_start
+        now = time.perf_counter()
+        timings[name] = (now - step_start) * 1000
+        step_start = now
+
+    cached = load_openapi(app, cache_dir)
+    step_done("openapi")
+    configure_mappers()
+    step_done("mappers")
+    connections = await prime_pool(db_engine)
+    step_done("pool")
+    routers = get_common_routers(app)
+    async with db_session_maker() as session:
+        for router in routers:
+            await router.warm_up(session)
+    step_done("routers")
+    timings["total"] = (time.perf_counter() - start) * 1000
+
+    logger.info(
+        "ready for fast responses after %.0f ms of warmup: OpenAPI schema %s "
+        "in %.0f ms, %d connections in %.0f ms, %d routers in %.0f ms",
+        timings["total"],
+        "read" if cached else "built",
+        timings["openapi"],
+        connections,
+        timings["pool"],
+        len(routers),
+        timings["routers"],
+    )
+    return timings
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -6,31 +7,67 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.responses import Response
 
+from domuwa.auth import hasher, routes
 from domuwa.config import settings
-from domuwa.database import create_db_and_tables
+from domuwa.database import checkpoint_wal, create_db_and_tables, session_maker
 from domuwa.routers.answers_router import get_answers_router
+from domuwa.routers.changes_router import get_changes_router
+from domuwa.routers.common_router import NEXT_CURSOR_HEADER
+from domuwa.routers.decks_router import get_decks_router
+from domuwa.routers.game_rooms_router import get_game_rooms_router
 from domuwa.routers.game_types_router import get_game_types_router
 from domuwa.routers.players_router import get_players_router
 from domuwa.routers.qna_categories_router import get_qna_categories_router
 from domuwa.routers.questions_router import get_questions_router
+from domuwa.routers.rankings_router import get_rankings_router
+from domuwa.services.archive_services import archive_retired_rows
+from domuwa.services.changes_services import compact_change_log
+from domuwa.services.game_category_services import GameCategoryServices
+from domuwa.services.game_room_hub import hub
+from domuwa.services.game_type_services import GameTypeServices
+from domuwa.services.qna_categories_services import QnACategoryServices
+from domuwa.warmup import warm_up
 
 
 @asynccontextmanager
-async def lifespan(_: FastAPI):
+async def lifespan(fastapi_app: FastAPI):
     logging.getLogger("asyncio").setLevel(logging.INFO)
-    create_db_and_tables()
+    await create_db_and_tables()
+    async with session_maker() as session:
+        for services in (
+            GameTypeServices(),
+            QnACategoryServices(),
+            GameCategoryServices(),
+        ):
+            await services.warm_cache(session)
+    if settings.STARTUP_WARMUP:
+        await warm_up(fastapi_app)
+    background_tasks = [
+        asyncio.create_task(checkpoint_wal()),
+        asyncio.create_task(compact_change_log()),
+        asyncio.create_task(archive_retired_rows()),
+        asyncio.create_task(hasher.calibrate_in_background()),
+    ]
     yield
+    for task in background_tasks:
+        task.cancel()
+    await hub.close_all()
+    hasher.shutdown()
 
 
 app = FastAPI(debug=True, lifespan=lifespan)
 
 API_PREFIX = "/api"
+app.include_router(routes.router, prefix=API_PREFIX)
 app.include_router(get_players_router(), prefix=API_PREFIX)
 app.include_router(get_game_types_router(), prefix=API_PREFIX)
 app.include_router(get_qna_categories_router(), prefix=API_PREFIX)
 app.include_router(get_answers_router(), prefix=API_PREFIX)
 app.include_router(get_questions_router(), prefix=API_PREFIX)
-# app.include_router(game_rooms_router, prefix=API_PREFIX)
+app.include_router(get_decks_router(), prefix=API_PREFIX)
+app.include_router(get_changes_router(), prefix=API_PREFIX)
+app.include_router(get_game_rooms_router(), prefix=API_PREFIX)
+app.include_router(get_rankings_router(), prefix=API_PREFIX)
 
 app.add_middleware(SessionMiddleware, secret_key=settings.SESSION_MIDDLEWARE_KEY)
 app.add_middleware(
@@ -38,6 +75,7 @@ app.add_middleware(
     allow_origins=settings.ALLOWED_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 
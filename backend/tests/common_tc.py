@@ -1,11 +1,16 @@
+import re
 from abc import ABC, abstractmethod
 from typing import Generic, TypeVar
 
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
-from sqlmodel import SQLModel, Session
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from domuwa.routers.common_router import NEXT_CURSOR_HEADER
 from domuwa.services.common_services import CommonServices
 
 DbModelT = TypeVar("DbModelT", bound=SQLModel)
@@ -28,7 +33,9 @@ class CommonTestCase(ABC, Generic[DbModelT]):
     ) -> None:
         pass
 
-    async def assert_valid_delete(self, model_id: int, db_session: Session) -> None:
+    async def assert_valid_delete(
+        self, model_id: int, db_session: AsyncSession
+    ) -> None:
         assert await self.services.get_by_id(model_id, db_session) is None
 
     @abstractmethod
@@ -40,7 +47,7 @@ class CommonTestCase(ABC, Generic[DbModelT]):
         pass
 
     @pytest.mark.asyncio
-    async def test_create(self, api_client: TestClient, db_session: Session):
+    async def test_create(self, api_client: TestClient, db_session: AsyncSession):
         model = self.build_model()
 
         response = api_client.post(self.path, json=model.model_dump())
@@ -78,12 +85,98 @@ class CommonTestCase(ABC, Generic[DbModelT]):
         for model_data in response_data:
             self.assert_valid_response(model_data)
 
+    def test_get_all_paginated(self, api_client: TestClient, model_count: int = 3):
+        for _ in range(model_count):
+            self.create_model()
+
+        response = api_client.get(self.path)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert NEXT_CURSOR_HEADER not in response.headers, response.headers
+        expected_ids = [model_data["id"] for model_data in response.json()]
+
+        ids = []
+        params: dict[str, str | int] = {"limit": 1}
+        while True:
+            response = api_client.get(self.path, params=params)
+            assert response.status_code == status.HTTP_200_OK, response.text
+            response_data = response.json()
+            assert len(response_data) == 1, response_data
+            ids.append(response_data[0]["id"])
+
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if cursor is None:
+                break
+            params["cursor"] = cursor
+
+        assert ids == expected_ids
+
+    def test_get_all_not_modified(self, api_client: TestClient):
+        model = self.create_model()
+
+        response = api_client.get(self.path)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        etag = response.headers["ETag"]
+        assert not etag.startswith("W/"), etag
+        last_modified = response.headers["Last-Modified"]
+
+        response = api_client.get(self.path, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED, response.text
+        assert response.content == b""
+        # weak comparison, a client may send the tag back as weak
+        response = api_client.get(self.path, headers={"If-None-Match": f"W/{etag}"})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED, response.text
+        assert response.headers["ETag"] == etag
+
+        response = api_client.get(
+            self.path,
+            headers={"If-Modified-Since": last_modified},
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED, response.text
+
+        response = api_client.delete(f"{self.path}{model.id}")  # type: ignore
+        assert response.status_code == status.HTTP_204_NO_CONTENT, response.text
+
+        response = api_client.get(self.path, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert response.headers["ETag"] != etag
+
+    def test_get_by_id_not_modified(
+        self,
+        api_client: TestClient,
+        db_engine: AsyncEngine,
+    ):
+        model = self.create_model()
+        path = f"{self.path}{model.id}"  # type: ignore
+
+        response = api_client.get(path)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        etag = response.headers["ETag"]
+
+        statements: list[tuple] = []
+
+        def count_statement(*args: object) -> None:
+            statements.append(args)
+
+        event.listen(db_engine.sync_engine, "after_execute", count_statement)
+        try:
+            response = api_client.get(path, headers={"If-None-Match": etag})
+        finally:
+            event.remove(db_engine.sync_engine, "after_execute", count_statement)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED, response.text
+        # only the latest changes of the tables are read
+        ((_, statement, *_),) = statements
+        assert set(re.findall(r"FROM (\w+)", str(statement))) == {"change"}
+
+    def test_get_all_invalid_cursor(self, api_client: TestClient):
+        response = api_client.get(self.path, params={"cursor": "not a cursor"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, response.text
+
     @abstractmethod
     def test_update(self, api_client: TestClient):
         pass
 
     @pytest.mark.asyncio
-    async def test_delete(self, api_client: TestClient, db_session: Session):
+    async def test_delete(self, api_client: TestClient, db_session: AsyncSession):
         model = self.create_model()
         model_id = model.id  # type: ignore
 
@@ -1,34 +1,64 @@
 import logging
 import warnings
+from pathlib import Path
 
 import pytest
+import pytest_asyncio
 from factory.alchemy import SQLAlchemyModelFactory
 from fastapi.testclient import TestClient
 from main import app
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import NullPool
 from sqlmodel import SQLModel, Session, create_engine
-from sqlmodel.pool import StaticPool
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from domuwa import database as db
+from domuwa.services import (
+    choices_cache,
+    game_room_hub,
+    game_rooms_services,
+    leaderboards,
+    question_draw_services,
+)
+from domuwa.services.common_services import CommonServices
 
 logging.getLogger("faker").setLevel(logging.INFO)
 logging.getLogger("factory").setLevel(logging.INFO)
 logging.getLogger("asyncio").setLevel(logging.INFO)
+logging.getLogger("aiosqlite").setLevel(logging.INFO)
 
 warnings.filterwarnings(action="ignore", category=DeprecationWarning)
 
-# SQLALCHEMY_DATABASE_URL = "sqlite:///test_database.db"
-SQLALCHEMY_DATABASE_URL = "sqlite://"
+CommonServices.strict_loading = True
 
 
-@pytest.fixture(name="db_session")
-def db_session_fixture():
+# factories need a sync session while the app uses an async one,
+# so both engines point to the same database file
+@pytest.fixture(name="db_path")
+def db_path_fixture(tmp_path: Path):
+    return tmp_path / "test_database.db"
+
+
+@pytest.fixture(name="sync_db_session")
+def sync_db_session_fixture(db_path: Path):
     from tests import factories  # noqa: F401
 
+    choices_cache.clear_all()
+    question_draw_services.clear()
+    game_rooms_services.clear()
+    game_room_hub.hub.clear()
+    leaderboards.clear()
+
     engine = create_engine(
-        SQLALCHEMY_DATABASE_URL,
+        f"sqlite:///{db_path}",
         connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
     )
+    event.listen(engine, "connect", db.set_sqlite_pragmas)
     SQLModel.metadata.drop_all(engine)
     SQLModel.metadata.create_all(engine)
 
@@ -41,16 +71,43 @@ def db_session_fixture():
 
     db_sess.rollback()
     db_sess.close()
+    engine.dispose()
+
+
+@pytest.fixture(name="db_engine")
+def db_engine_fixture(db_path: Path, sync_db_session: Session):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}",
+        connect_args={"check_same_thread": False},
+        poolclass=NullPool,
+    )
+    event.listen(engine.sync_engine, "connect", db.set_sqlite_pragmas)
+    return engine
+
+
+@pytest.fixture(name="db_session_maker")
+def db_session_maker_fixture(db_engine: AsyncEngine):
+    return async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture(name="db_session")
+async def db_session_fixture(db_session_maker: async_sessionmaker[AsyncSession]):
+    async with db_session_maker() as db_sess:
+        yield db_sess
 
 
 @pytest.fixture(name="api_client")
-def api_client_fixture(db_session: Session):
-    def override_get_db_session():
-        return db_session
+def api_client_fixture(db_session_maker: async_sessionmaker[AsyncSession]):
+    async def override_get_db_session():
+        async with db_session_maker() as db_sess:
+            yield db_sess
 
     app.dependency_overrides[db.get_db_session] = override_get_db_session
+    app.dependency_overrides[db.get_db_session_maker] = lambda: db_session_maker
 
     with TestClient(app) as client:
+        # lifespan warms the caches from the app database, not the test one
+        choices_cache.clear_all()
         yield client
 
     app.dependency_overrides.clear()
@@ -2,6 +2,7 @@ import factory
 from factory.alchemy import SQLAlchemyModelFactory
 
 from domuwa.models.answer import Answer
+from domuwa.models.game_category import GameCategory, GameCategoryChoices
 from domuwa.models.game_type import GameType, GameTypeChoices
 from domuwa.models.player import Player
 from domuwa.models.qna_category import QnACategory, QnACategoryChoices
@@ -17,6 +18,15 @@ class GameTypeFactory(SQLAlchemyModelFactory):
         sqlalchemy_get_or_create = ("name",)
 
 
+class GameCategoryFactory(SQLAlchemyModelFactory):
+    name = GameCategoryChoices.SFW
+
+    class Meta:  # type: ignore
+        model = GameCategory
+        sqlalchemy_session_persistence = "commit"
+        sqlalchemy_get_or_create = ("name",)
+
+
 class PlayerFactory(SQLAlchemyModelFactory):
     name = factory.Sequence(lambda n: "Player %d" % n)
 
@@ -3,10 +3,13 @@ from typing import Any
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from domuwa.models.answer import Answer
 from domuwa.services.answers_services import AnswerServices
+from domuwa.services.questions_services import QuestionServices
 from tests.common_tc import CommonTestCase
 from tests.factories import (
     AnswerFactory,
@@ -42,7 +45,9 @@ class TestAnswer(CommonTestCase[Answer]):
         assert response_data["game_type"]["id"] == model.game_type.id  # type: ignore
         assert response_data["game_category"]["id"] == model.game_category.id  # type: ignore
 
-    async def assert_valid_delete(self, model_id: int, db_session: Session) -> None:
+    async def assert_valid_delete(
+        self, model_id: int, db_session: AsyncSession
+    ) -> None:
         answer = await self.services.get_by_id(model_id, db_session)
         assert answer is not None
         assert answer.deleted
@@ -144,7 +149,7 @@ class TestAnswer(CommonTestCase[Answer]):
     async def test_create_answer_with_question(
         self,
         api_client: TestClient,
-        db_session: Session,
+        db_session: AsyncSession,
     ):
         answer = self.build_model_with_question()
 
@@ -161,7 +166,10 @@ class TestAnswer(CommonTestCase[Answer]):
         db_answer = await self.services.get_by_id(response_data["id"], db_session)
         assert db_answer is not None
 
-        question = db_answer.question
+        question = await QuestionServices().get_by_id(
+            db_answer.question_id,  # type: ignore
+            db_session,
+        )
         assert question is not None
         answer.id = response_data["id"]
         assert answer == question.answers[0], question.answers
@@ -170,7 +178,7 @@ class TestAnswer(CommonTestCase[Answer]):
     async def test_delete_answer_with_question(
         self,
         api_client: TestClient,
-        db_session: Session,
+        db_session: AsyncSession,
     ):
         answer = self.create_model_with_question()
         answer_id = answer.id
@@ -185,6 +193,137 @@ class TestAnswer(CommonTestCase[Answer]):
         db_answer = await self.services.get_by_id(answer_id, db_session)
         assert db_answer is not None
 
-        question = db_answer.question
+        question = await QuestionServices().get_by_id(
+            db_answer.question_id,  # type: ignore
+            db_session,
+        )
+        assert question is not None
+        assert not question.deleted
+
+    @pytest.mark.asyncio
+    async def test_create_bulk(self, api_client: TestClient, db_session: AsyncSession):
+        answers = [self.build_model_with_question() for _ in range(3)]
+        payload = [answer.model_dump(exclude={"id"}) for answer in answers]
+        payload[1]["question_id"] += 100
+
+        response = api_client.post(f"{self.path}bulk", json=payload)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        results = response.json()
+        assert results[1] == {
+            "id": None,
+            "error": f"question_id={payload[1]['question_id']} does not exist",
+        }, results
+        assert results[0]["id"] < results[2]["id"], results
+
+        for result, answer in zip(results[::2], answers[::2]):
+            assert result["error"] is None, result
+            db_answer = await self.services.get_by_id(result["id"], db_session)
+            assert db_answer is not None
+            assert db_answer.text == answer.text
+            assert db_answer.question_id == answer.question_id
+
+    @pytest.mark.asyncio
+    async def test_insert_rows_reports_rejected_rows(self, db_session: AsyncSession):
+        answer = self.build_model()
+        rows = [self.services.to_row(answer.model_dump()) for _ in range(3)]
+        rows[1]["text"] = None
+
+        results = await self.services.insert_rows(rows, db_session)
+        await db_session.commit()
+
+        assert [result.id is None for result in results] == [False, True, False]
+        assert "NOT NULL" in results[1].error  # type: ignore
+        assert len(await self.services.get_all(db_session)) == 2
+
+    @pytest.mark.asyncio
+    async def test_history(
+        self,
+        api_client: TestClient,
+        db_engine: AsyncEngine,
+        db_session: AsyncSession,
+    ):
+        answer = self.create_model_with_question()
+        assert answer.id is not None
+        ids = [answer.id]
+        for text in ("second version", "third version"):
+            response = api_client.patch(f"{self.path}{ids[-1]}", json={"text": text})
+            assert response.status_code == status.HTTP_200_OK, response.text
+            ids.append(response.json()["id"])
+
+        response = api_client.get(f"{self.path}{ids[0]}/latest")
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert response.json()["id"] == ids[-1]
+
+        statements: list[tuple] = []
+
+        def count_statement(*args: object) -> None:
+            statements.append(args)
+
+        event.listen(db_engine.sync_engine, "after_execute", count_statement)
+        try:
+            history = await self.services.get_history(ids[1], db_session)
+        finally:
+            event.remove(db_engine.sync_engine, "after_execute", count_statement)
+        assert [model.id for model in history] == ids[::-1]
+        assert len(statements) == 1
+
+        latest = await self.services.get_by_id(ids[-1], db_session)
+        assert latest is not None
+        assert latest.question_id == answer.question_id
+
+    def test_get_all_hides_superseded(self, api_client: TestClient):
+        answer = self.create_model_with_question()
+        response = api_client.patch(f"{self.path}{answer.id}", json={"text": "edit"})
+        assert response.status_code == status.HTTP_200_OK, response.text
+        latest_id = response.json()["id"]
+
+        response = api_client.get(self.path)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert [a["id"] for a in response.json()] == [latest_id], response.json()
+
+        response = api_client.get(self.path, params={"include_superseded": True})
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert [a["id"] for a in response.json()] == [answer.id, latest_id]
+
+    def test_update_superseded(self, api_client: TestClient):
+        answer = self.create_model_with_question()
+        response = api_client.patch(f"{self.path}{answer.id}", json={"text": "edit"})
+        assert response.status_code == status.HTTP_200_OK, response.text
+        latest_id = response.json()["id"]
+
+        response = api_client.patch(
+            f"{self.path}{answer.id}", json={"text": "stale edit"}
+        )
+        assert response.status_code == status.HTTP_409_CONFLICT, response.text
+
+        response = api_client.get(f"{self.path}{latest_id}/history")
+        assert [a["id"] for a in response.json()] == [latest_id, answer.id]
+        response = api_client.get(f"/api/questions/{answer.question_id}")
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert [a["id"] for a in response.json()["answers"]] == [latest_id]
+
+        response = api_client.patch(
+            f"{self.path}{latest_id}", json={"text": "second edit"}
+        )
+        assert response.status_code == status.HTTP_200_OK, response.text
+        latest_id = response.json()["id"]
+        response = api_client.get(f"/api/questions/{answer.question_id}")
+        assert [a["id"] for a in response.json()["answers"]] == [latest_id]
+
+    @pytest.mark.asyncio
+    async def test_bulk_delete(self, api_client: TestClient, db_session: AsyncSession):
+        answers = [self.create_model_with_question() for _ in range(3)]
+        selection = {"ids": [answers[0].id, answers[2].id]}
+
+        response = api_client.post(f"{self.path}bulk-delete", json=selection)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert response.json() == {"count": 2}
+
+        remaining = await self.services.get_all(db_session)
+        assert [answer.id for answer in remaining] == [answers[1].id]
+        question = await QuestionServices().get_by_id(
+            answers[0].question_id,  # type: ignore
+            db_session,
+        )
         assert question is not None
         assert not question.deleted
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.models.archive import answer_archive, question_archive
+from domuwa.models.links import GameRoomQuestionsLink
+from domuwa.models.question import Question
+from domuwa.services import change_counters
+from domuwa.services.archive_services import ArchiveServices
+from tests.factories import (
+    AnswerFactory,
+    GameTypeFactory,
+    PlayerFactory,
+    QnACategoryFactory,
+    QuestionFactory,
+)
+
+
+def create_question_with_answer() -> tuple[int, int]:
+    ids = {
+        "author_id": PlayerFactory.create().id,
+        "game_type_id": GameTypeFactory.create().id,
+        "game_category_id": QnACategoryFactory.create().id,
+    }
+    question = QuestionFactory.create(**ids)
+    answer = AnswerFactory.create(question_id=question.id, **ids)
+    return question.id, answer.id
+
+
+@pytest.mark.asyncio
+async def test_archive(api_client: TestClient, db_session: AsyncSession):
+    edited_id, edited_answer_id = create_question_with_answer()
+    deleted_id, deleted_answer_id = create_question_with_answer()
+    played_id, _ = create_question_with_answer()
+
+    response = api_client.patch(f"/api/questions/{edited_id}", json={"text": "edit"})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    latest_id = response.json()["id"]
+    for question_id in (deleted_id, played_id):
+        response = api_client.delete(f"/api/questions/{question_id}")
+        assert response.status_code == status.HTTP_204_NO_CONTENT, response.text
+    db_session.add(
+        GameRoomQuestionsLink(game_room_id=1, question_id=played_id, position=1)
+    )
+    await db_session.commit()
+    seq = api_client.get("/api/changes/").json()["seq"]
+
+    services = ArchiveServices()
+    archived = await services.archive(datetime.now() - timedelta(days=1), db_session)
+    assert archived == {"answer_archive": 0, "question_archive": 0}
+
+    archived = await services.archive(
+        datetime.now() + timedelta(days=1),
+        db_session,
+        batch_size=1,
+    )
+    assert archived == {"answer_archive": 1, "question_archive": 2}
+
+    question_ids = (await db_session.exec(select(Question.id))).all()
+    assert set(question_ids) == {played_id, latest_id}
+    archived_ids = (await db_session.exec(select(question_archive.c.id))).all()
+    assert sorted(archived_ids) == [edited_id, deleted_id]
+    archived_ids = (await db_session.exec(select(answer_archive.c.id))).all()
+    assert archived_ids == [deleted_answer_id]
+
+    response = api_client.get(f"/api/questions/{latest_id}/history")
+    assert response.status_code == status.HTTP_200_OK, response.text
+    (latest,) = response.json()
+    assert [answer["id"] for answer in latest["answers"]] == [edited_answer_id]
+
+    # every archived row is logged, the deleted ones again
+    changes = api_client.get("/api/changes/", params={"since": seq}).json()
+    assert sorted((c["table_name"], c["row_id"]) for c in changes["deleted"]) == [
+        ("answer", deleted_answer_id),
+        ("question", edited_id),
+        ("question", deleted_id),
+    ]
+    # its answer moved to the latest version before it went
+    (moved,) = changes["upserted"]
+    assert (moved["table_name"], moved["row_id"]) == ("answer", edited_answer_id)
+    assert moved["payload"]["question_id"] == latest_id
+
+    connection = await db_session.connection()
+    free_pages = await connection.exec_driver_sql("PRAGMA freelist_count")
+    assert free_pages.scalar() == 0
+
+
+@pytest.mark.asyncio
+async def test_archive_in_another_process(
+    api_client: TestClient,
+    db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    question_id, _ = create_question_with_answer()
+    response = api_client.delete(f"/api/questions/{question_id}")
+    assert response.status_code == status.HTTP_204_NO_CONTENT, response.text
+    response = api_client.get(f"/api/questions/{question_id}/history")
+    assert response.status_code == status.HTTP_200_OK, response.text
+    etag = response.headers["ETag"]
+
+    # the counters of the server are not bumped by another process
+    monkeypatch.setattr(change_counters, "bump", lambda *tables: None)
+    await ArchiveServices().archive(datetime.now() + timedelta(days=1), db_session)
+
+    response = api_client.get(
+        f"/api/questions/{question_id}/history",
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND, response.text
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.models.change import Change
+from domuwa.services.changes_services import ChangeServices
+from tests.factories import GameTypeFactory, QnACategoryFactory
+
+PATH = "/api/changes/"
+
+
+def get_changes(api_client: TestClient, since: int = 0, **params) -> dict:
+    response = api_client.get(PATH, params={"since": since, **params})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    return response.json()
+
+
+def create_player(api_client: TestClient, name: str) -> dict:
+    response = api_client.post("/api/players/", json={"name": name})
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    return response.json()
+
+
+def create_question(api_client: TestClient, author_id: int) -> dict:
+    question = {
+        "text": "question text",
+        "author_id": author_id,
+        "game_type_id": GameTypeFactory.create().id,
+        "game_category_id": QnACategoryFactory.create().id,
+    }
+    response = api_client.post("/api/questions/", json=question)
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    return response.json()
+
+
+def test_get_changes(api_client: TestClient):
+    player = create_player(api_client, "first player")
+    question = create_question(api_client, player["id"])
+
+    changes = get_changes(api_client)
+    assert [(c["table_name"], c["row_id"]) for c in changes["upserted"]] == [
+        ("player", player["id"]),
+        ("question", question["id"]),
+    ]
+    assert changes["upserted"][0]["payload"]["name"] == "first player"
+    assert changes["deleted"] == []
+    assert not changes["has_more"]
+    seq = changes["seq"]
+
+    assert get_changes(api_client, seq)["upserted"] == []
+
+    response = api_client.patch(
+        f"/api/questions/{question['id']}",
+        json={"text": "new question text"},
+    )
+    assert response.status_code == status.HTTP_200_OK, response.text
+    new_question = response.json()
+    response = api_client.delete(f"/api/players/{player['id']}")
+    assert response.status_code == status.HTTP_204_NO_CONTENT, response.text
+
+    changes = get_changes(api_client, seq)
+    (upserted,) = changes["upserted"]
+    assert upserted["row_id"] == new_question["id"]
+    assert upserted["payload"]["prev_version_id"] == question["id"]
+    (deleted,) = changes["deleted"]
+    assert (deleted["table_name"], deleted["row_id"]) == ("player", player["id"])
+    assert deleted["payload"] is None
+
+
+def test_get_changes_paginated(api_client: TestClient):
+    for i in range(3):
+        create_player(api_client, f"player {i}")
+
+    names: list[str] = []
+    changes: dict = {"seq": 0, "has_more": True}
+    while changes["has_more"]:
+        changes = get_changes(api_client, changes["seq"], limit=2)
+        names.extend(change["payload"]["name"] for change in changes["upserted"])
+    assert names == ["player 0", "player 1", "player 2"]
+
+
+def test_failed_write_not_logged(api_client: TestClient):
+    create_player(api_client, "same name")
+    seq = get_changes(api_client)["seq"]
+
+    response = api_client.post("/api/players/", json={"name": "same name"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST, response.text
+
+    assert get_changes(api_client, seq)["seq"] == seq
+
+
+@pytest.mark.asyncio
+async def test_compact(api_client: TestClient, db_session: AsyncSession):
+    player = create_player(api_client, "player")
+    for name in ("renamed once", "renamed twice"):
+        response = api_client.patch(f"/api/players/{player['id']}", json={"name": name})
+        assert response.status_code == status.HTTP_200_OK, response.text
+    other_player = create_player(api_client, "other player")
+
+    services = ChangeServices()
+    before = await services.get_since(0, 100, db_session)
+    compacted = await services.compact(datetime.now() + timedelta(days=1), db_session)
+    assert compacted == 2
+
+    row_ids = (await db_session.exec(select(Change.row_id))).all()
+    assert sorted(row_ids) == [player["id"], other_player["id"]]
+    assert await services.get_since(0, 100, db_session) == before
@@ -0,0 +1,233 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.config import settings
+from domuwa.database import (
+    create_db_and_tables,
+    get_user_version,
+    schema_fingerprint,
+)
+from domuwa.migrations import SchemaMismatchError
+from domuwa.models.question import Question
+from tests.factories import AnswerFactory, QuestionFactory
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas(db_session: AsyncSession):
+    async def pragma(name: str):
+        return (await db_session.exec(text(f"PRAGMA {name}"))).scalar()  # type: ignore
+
+    assert (await pragma("journal_mode")).upper() == settings.SQLITE_JOURNAL_MODE
+    assert await pragma("busy_timeout") == settings.SQLITE_BUSY_TIMEOUT_MS
+    assert await pragma("cache_size") == settings.SQLITE_CACHE_SIZE
+
+    synchronous = ["OFF", "NORMAL", "FULL", "EXTRA"]
+    assert synchronous[await pragma("synchronous")] == settings.SQLITE_SYNCHRONOUS
+    temp_store = ["DEFAULT", "FILE", "MEMORY"]
+    assert temp_store[await pragma("temp_store")] == settings.SQLITE_TEMP_STORE
+
+
+@pytest.mark.asyncio
+async def test_create_db_and_tables(db_engine: AsyncEngine):
+    # the tables are there already, but the fingerprint is not
+    assert await create_db_and_tables(db_engine)
+    assert not await create_db_and_tables(db_engine)
+
+    async with db_engine.begin() as conn:
+        fingerprint = schema_fingerprint(conn.dialect)
+        assert await get_user_version(conn) == fingerprint
+        await conn.execute(text("DROP TABLE play"))
+
+    # a dropped table is only noticed once the fingerprint is cleared
+    assert not await create_db_and_tables(db_engine)
+    async with db_engine.begin() as conn:
+        await conn.execute(text("PRAGMA user_version=0"))
+    assert await create_db_and_tables(db_engine)
+    async with db_engine.connect() as conn:
+        assert (await conn.execute(text("SELECT count(*) FROM play"))).scalar() == 0
+
+
+@pytest.mark.asyncio
+async def test_create_db_and_tables_checks_columns(db_engine: AsyncEngine):
+    async with db_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.execute(text("CREATE TABLE player (id INTEGER PRIMARY KEY)"))
+
+    with pytest.raises(SchemaMismatchError, match="player.name"):
+        await create_db_and_tables(db_engine)
+    async with db_engine.connect() as conn:
+        assert await get_user_version(conn) == 0
+        # the tables created before the check are rolled back with it
+        tables = await conn.run_sync(
+            lambda sync_conn: inspect(sync_conn).get_table_names()
+        )
+    assert tables == ["player"]
+
+
+@pytest.mark.asyncio
+async def test_create_db_and_tables_creates_indexes(db_engine: AsyncEngine):
+    async with db_engine.begin() as conn:
+        await conn.execute(text("DROP INDEX ix_player_name"))
+
+    assert await create_db_and_tables(db_engine)
+    async with db_engine.connect() as conn:
+        indexes = await conn.run_sync(
+            lambda sync_conn: inspect(sync_conn).get_indexes("player")
+        )
+    assert [index["name"] for index in indexes] == ["ix_player_name"]
+
+
+@pytest.mark.asyncio
+async def test_create_db_and_tables_adds_head_ids(db_engine: AsyncEngine):
+    ids = {"author_id": 1, "game_type_id": 1, "game_category_id": 1}
+    first = QuestionFactory.create(**ids)
+    second = QuestionFactory.create(prev_version_id=first.id, **ids)
+    latest = QuestionFactory.create(prev_version_id=second.id, **ids)
+    other = QuestionFactory.create(**ids)
+    answer = AnswerFactory.create(question_id=latest.id, **ids)
+    edited_answer = AnswerFactory.create(prev_version_id=answer.id, **ids)
+    # the versions as they were written before head_id existed
+    async with db_engine.begin() as conn:
+        for table_name in ("question", "answer"):
+            await conn.execute(text(f"DROP INDEX ix_{table_name}_head_id"))
+            await conn.execute(text(f"ALTER TABLE {table_name} DROP COLUMN head_id"))
+
+    assert await create_db_and_tables(db_engine)
+    async with db_engine.connect() as conn:
+        questions = await conn.execute(text("SELECT id, head_id FROM question"))
+        answers = await conn.execute(text("SELECT id, head_id FROM answer"))
+        assert sorted(questions.all()) == [
+            (first.id, latest.id),
+            (second.id, latest.id),
+            (latest.id, None),
+            (other.id, None),
+        ]
+        assert sorted(answers.all()) == [
+            (answer.id, edited_answer.id),
+            (edited_answer.id, None),
+        ]
+
+
+@pytest.mark.asyncio
+async def test_create_db_and_tables_adds_retired_at(db_engine: AsyncEngine):
+    ids = {"author_id": 1, "game_type_id": 1, "game_category_id": 1}
+    QuestionFactory.create(**ids)
+    deleted = QuestionFactory.create(deleted=True, **ids)
+    edited = QuestionFactory.create(**ids)
+    latest = QuestionFactory.create(prev_version_id=edited.id, **ids)
+    async with db_engine.begin() as conn:
+        await conn.execute(
+            text("UPDATE question SET head_id = :latest WHERE id = :edited"),
+            {"latest": latest.id, "edited": edited.id},
+        )
+        for table_name in ("question", "answer"):
+            await conn.execute(text(f"DROP INDEX ix_{table_name}_retired_at"))
+            await conn.execute(text(f"ALTER TABLE {table_name} DROP COLUMN retired_at"))
+
+    assert await create_db_and_tables(db_engine)
+    async with db_engine.connect() as conn:
+        retired = await conn.execute(
+            select(Question.id, Question.retired_at).where(
+                col(Question.retired_at).is_not(None)
+            )
+        )
+        rows = sorted(retired.all())
+    assert [row.id for row in rows] == [deleted.id, edited.id]
+    assert all(isinstance(row.retired_at, datetime) for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_create_db_and_tables_adds_round_positions(db_engine: AsyncEngine):
+    async with db_engine.begin() as conn:
+        await conn.execute(text("DROP TABLE gameroomquestionslink"))
+        await conn.execute(
+            text(
+                "CREATE TABLE gameroomquestionslink ("
+                "game_room_id INTEGER NOT NULL, question_id INTEGER NOT NULL, "
+                "PRIMARY KEY (game_room_id, question_id))"
+            )
+        )
+        await conn.execute(
+            text("INSERT INTO gameroomquestionslink VALUES (:room, :question)"),
+            [
+                {"room": 1, "question": 5},
+                {"room": 2, "question": 3},
+                {"room": 1, "question": 2},
+                {"room": 1, "question": 9},
+            ],
+        )
+
+    assert await create_db_and_tables(db_engine)
+    async with db_engine.connect() as conn:
+        links = await conn.execute(
+            text(
+                "SELECT game_room_id, position, question_id FROM gameroomquestionslink "
+                "ORDER BY game_room_id, position"
+            )
+        )
+        assert links.all() == [(1, 1, 5), (1, 2, 2), (1, 3, 9), (2, 1, 3)]
+        indexes = await conn.run_sync(
+            lambda sync_conn: inspect(sync_conn).get_indexes("gameroomquestionslink")
+        )
+    assert {index["name"] for index in indexes} == {
+        "ix_gameroomquestionslink_position",
+        "ix_gameroomquestionslink_question_id",
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_db_and_tables_merges_duplicate_scores(db_engine: AsyncEngine):
+    async with db_engine.begin() as conn:
+        await conn.execute(text("DROP TABLE player_score"))
+        await conn.execute(text("DROP TABLE ranking"))
+        await conn.execute(
+            text("CREATE TABLE ranking (id INTEGER PRIMARY KEY, game_room_id INTEGER)")
+        )
+        await conn.execute(
+            text(
+                "CREATE TABLE player_score ("
+                "id INTEGER PRIMARY KEY, player_id INTEGER, ranking_id INTEGER)"
+            )
+        )
+        await conn.execute(
+            text("INSERT INTO ranking VALUES (1, 1), (2, 1), (3, 2), (4, NULL)")
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO player_score VALUES "
+                "(1, 1, 1), (2, 1, 2), (3, 2, 2), (4, 1, 1), (5, 1, 3)"
+            )
+        )
+
+    assert await create_db_and_tables(db_engine)
+    async with db_engine.connect() as conn:
+        rankings = await conn.execute(text("SELECT id, game_room_id FROM ranking"))
+        assert rankings.all() == [(1, 1), (3, 2), (4, None)]
+        scores = await conn.execute(
+            text("SELECT id, player_id, ranking_id, score FROM player_score")
+        )
+        assert scores.all() == [(1, 1, 1, 0), (3, 2, 1, 0), (5, 1, 3, 0)]
+
+
+@pytest.mark.asyncio
+async def test_create_db_and_tables_sums_duplicate_scores(db_engine: AsyncEngine):
+    async with db_engine.begin() as conn:
+        await conn.execute(text("DROP INDEX ix_player_score_ranking_player"))
+        await conn.execute(
+            text(
+                "INSERT INTO player_score (id, player_id, ranking_id, score) VALUES "
+                "(1, 1, 1, 3), (2, 1, 1, 4), (3, 2, 1, 5)"
+            )
+        )
+
+    assert await create_db_and_tables(db_engine)
+    async with db_engine.connect() as conn:
+        scores = await conn.execute(
+            text("SELECT id, player_id, ranking_id, score FROM player_score")
+        )
+        assert scores.all() == [(1, 1, 1, 7), (3, 2, 1, 5)]
@@ -0,0 +1,131 @@
+import json
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.models.game_type import GameTypeChoices
+from domuwa.models.qna_category import QnACategoryChoices
+from domuwa.services.decks_services import iter_lines
+from domuwa.services.game_type_services import GameTypeServices
+from domuwa.services.players_services import PlayerServices
+from domuwa.services.qna_categories_services import QnACategoryServices
+from domuwa.services.questions_services import QuestionServices
+from tests.factories import (
+    AnswerFactory,
+    GameTypeFactory,
+    PlayerFactory,
+    QnACategoryFactory,
+    QuestionFactory,
+)
+
+EXPORT_PATH = "/api/decks/export"
+IMPORT_PATH = "/api/decks/import"
+
+
+def create_question(deleted: bool = False, answers: int = 0):
+    author = PlayerFactory.create()
+    ids = {
+        "author_id": author.id,
+        "game_type_id": GameTypeFactory.create().id,
+        "game_category_id": QnACategoryFactory.create().id,
+    }
+    question = QuestionFactory.create(deleted=deleted, **ids)
+    for _ in range(answers):
+        AnswerFactory.create(question_id=question.id, **ids)
+    return question
+
+
+def test_export(api_client: TestClient):
+    question = create_question(answers=2)
+    create_question(deleted=True)
+    edited_question = create_question(answers=1)
+    response = api_client.patch(
+        f"/api/questions/{edited_question.id}",
+        json={"text": "edited question"},
+    )
+    assert response.status_code == status.HTTP_200_OK, response.text
+
+    response = api_client.get(EXPORT_PATH)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["text"] for line in lines] == [question.text, "edited question"]
+    assert lines[0]["author"] == question.author.name  # type: ignore
+    assert lines[0]["game_type"] == GameTypeChoices.EGO
+    assert lines[0]["game_category"] == QnACategoryChoices.SFW
+    assert [answer["text"] for answer in lines[0]["answers"]] == [
+        answer.text
+        for answer in question.answers  # type: ignore
+    ]
+    # answers stay on the version they were added to
+    (edited_answer,) = edited_question.answers  # type: ignore
+    assert [answer["text"] for answer in lines[1]["answers"]] == [edited_answer.text]
+
+
+@pytest.mark.asyncio
+async def test_import(api_client: TestClient, db_session: AsyncSession):
+    exported = create_question(answers=1)
+    deck = api_client.get(EXPORT_PATH).content
+    new_question = {
+        "text": "imported question",
+        "author": "Imported Author",
+        "game_type": GameTypeChoices.NEVER_HAVE_I_EVER,
+        "game_category": QnACategoryChoices.NSFW,
+        "answers": [
+            {
+                "text": "imported answer",
+                "author": "Imported Author",
+                "game_type": GameTypeChoices.NEVER_HAVE_I_EVER,
+                "game_category": QnACategoryChoices.NSFW,
+            }
+        ],
+    }
+    deck += b"\n".join(
+        [json.dumps(new_question).encode(), b"", b"not json", b'{"text": "x"}']
+    )
+
+    response = api_client.post(IMPORT_PATH, content=deck)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    result = response.json()
+    assert result["questions"] == 2, result
+    assert result["answers"] == 2, result
+    assert result["skipped"] == 2, result
+    assert [error["line"] for error in result["errors"]] == [4, 5], result
+
+    questions = await QuestionServices().get_all(db_session)
+    assert len(questions) == 3
+    copy, imported = questions[1:]
+    assert copy.text == exported.text
+    assert copy.author_id == exported.author_id
+    assert [answer.text for answer in copy.answers] == [
+        answer.text
+        for answer in exported.answers  # type: ignore
+    ]
+
+    author = await PlayerServices().get_by_id(imported.author_id, db_session)  # type: ignore
+    assert author is not None
+    assert author.name == "Imported Author"
+    game_type = await GameTypeServices().get_name(imported.game_type_id, db_session)  # type: ignore
+    assert game_type == GameTypeChoices.NEVER_HAVE_I_EVER
+    game_category = await QnACategoryServices().get_name(
+        imported.game_category_id,  # type: ignore
+        db_session,
+    )
+    assert game_category == QnACategoryChoices.NSFW
+    assert [answer.author_id for answer in imported.answers] == [author.id]
+
+
+@pytest.mark.asyncio
+async def test_iter_lines():
+    async def chunks():
+        for chunk in (b'{"a"', b": 1}\n{", b'"b": 2}\n', b"last"):
+            yield chunk
+
+    assert [line async for line in iter_lines(chunks())] == [
+        b'{"a": 1}',
+        b'{"b": 2}',
+        b"last",
+    ]
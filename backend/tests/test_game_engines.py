@@ -0,0 +1,115 @@
+import pytest
+
+from domuwa.models.game_type import GameTypeChoices
+from domuwa.services.game_engines import (
+    EgoEngine,
+    GentlemensCardsEngine,
+    InvalidPlayError,
+    NeverHaveIEverEngine,
+    RoundPhase,
+    WhosMostLikelyEngine,
+    get_engine_type,
+)
+
+PLAYER_IDS = [1, 2, 3]
+ANSWER_IDS = [10, 11, 12]
+
+
+def test_engine_types():
+    for game_type in GameTypeChoices:
+        assert get_engine_type(game_type).game_type == game_type
+
+
+def test_ego():
+    engine = EgoEngine(PLAYER_IDS)
+    engine.start_round(1, ANSWER_IDS)
+    assert engine.subject == 1
+
+    with pytest.raises(InvalidPlayError):
+        engine.play(2, 99)
+    engine.play(1, 10)
+    with pytest.raises(InvalidPlayError):
+        engine.play(1, 11)
+    engine.play(2, 10)
+    assert not engine.round_complete
+    engine.play(3, 11)
+    assert engine.round_complete
+
+    assert engine.close_round() == {2: 1}
+    assert engine.scores == {1: 0, 2: 1, 3: 0}
+    # a closed round is scored once
+    assert engine.close_round() == {}
+
+    engine.start_round(2, ANSWER_IDS)
+    assert engine.subject == 2
+
+
+def test_whos_most_likely():
+    engine = WhosMostLikelyEngine(PLAYER_IDS)
+    engine.start_round(1)
+    with pytest.raises(InvalidPlayError):
+        engine.play(1, 4)
+    engine.play(1, 2)
+    engine.play(2, 3)
+    engine.play(3, 2)
+    assert engine.close_round() == {2: 1}
+
+    engine.start_round(2)
+    engine.play(1, 2)
+    engine.play(2, 3)
+    # whoever left is not waited for
+    engine.remove_player(3)
+    assert engine.round_complete
+    assert engine.close_round() == {2: 1, 3: 1}
+    assert engine.scores == {1: 0, 2: 2, 3: 1}
+
+
+def test_gentlemens_cards():
+    engine = GentlemensCardsEngine(PLAYER_IDS)
+    engine.start_round(1, ANSWER_IDS)
+    assert engine.judge == 1
+
+    with pytest.raises(InvalidPlayError):
+        engine.play(1, 10)
+    engine.play(2, 10)
+    with pytest.raises(InvalidPlayError):
+        engine.play(3, 10)
+    # only answers to the round's question are cards
+    with pytest.raises(InvalidPlayError):
+        engine.play(3, 13)
+    engine.play(3, 12)
+    assert engine.phase == RoundPhase.JUDGING
+    assert not engine.round_complete
+
+    with pytest.raises(InvalidPlayError):
+        engine.play(1, 11)
+    engine.play(1, 12)
+    assert engine.round_complete
+    assert engine.close_round() == {3: 1}
+
+    # the judge leaving ends the round without points
+    engine.start_round(2, ANSWER_IDS)
+    assert engine.judge == 2
+    engine.play(1, 10)
+    engine.remove_player(2)
+    assert engine.round_complete
+    assert engine.close_round() == {}
+
+
+def test_never_have_i_ever():
+    engine = NeverHaveIEverEngine(PLAYER_IDS)
+    with pytest.raises(InvalidPlayError):
+        engine.play(1, True)
+
+    engine.start_round(1)
+    with pytest.raises(InvalidPlayError):
+        engine.play(1, 1)
+    engine.play(1, True)
+    engine.play(2, False)
+    engine.add_player(4)
+    # a player joining during a round plays from the next one
+    with pytest.raises(InvalidPlayError):
+        engine.play(4, True)
+    engine.play(3, True)
+    assert engine.close_round() == {1: 1, 3: 1}
+    assert engine.scores == {1: 1, 2: 0, 3: 1, 4: 0}
@@ -0,0 +1,381 @@
+import asyncio
+
+import pytest
+from fastapi import WebSocketDisconnect, status
+from fastapi.testclient import TestClient
+from sqlalchemy import Connection, event
+from sqlalchemy.engine.interfaces import DBAPICursor, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.config import settings
+from domuwa.models.game_category import GameCategoryChoices
+from domuwa.models.game_room import GameRoom
+from domuwa.models.game_type import GameTypeChoices
+from domuwa.models.links import GameRoomQuestionsLink
+from domuwa.models.play import Play
+from domuwa.models.player import Player
+from domuwa.models.player_score import PlayerScore
+from domuwa.models.qna_category import QnACategoryChoices
+from domuwa.services.game_room_hub import GameRoomHub, RoomState, hub
+from domuwa.services.game_rooms_services import PREFETCH_ROUNDS
+from tests.factories import (
+    GameCategoryFactory,
+    GameTypeFactory,
+    PlayerFactory,
+    QnACategoryFactory,
+    QuestionFactory,
+)
+
+PATH = "/api/game-rooms/"
+
+
+def create_questions(
+    count: int,
+    qna_category: QnACategoryChoices,
+    game_type: GameTypeChoices = GameTypeChoices.EGO,
+) -> list[int]:
+    ids = {
+        "author_id": PlayerFactory.create().id,
+        "game_type_id": GameTypeFactory.create(name=game_type).id,
+        "game_category_id": QnACategoryFactory.create(name=qna_category).id,
+    }
+    return [QuestionFactory.create(**ids).id for _ in range(count)]
+
+
+def create_game_room(
+    api_client: TestClient,
+    rounds: int,
+    game_category: GameCategoryChoices = GameCategoryChoices.SFW,
+    game_type: GameTypeChoices = GameTypeChoices.EGO,
+) -> dict:
+    response = api_client.post(
+        PATH,
+        json={
+            "game_type_id": GameTypeFactory.create(name=game_type).id,
+            "game_category_id": GameCategoryFactory.create(name=game_category).id,
+            "rounds": rounds,
+        },
+    )
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_create(api_client: TestClient, db_session: AsyncSession):
+    question_ids = create_questions(20, QnACategoryChoices.SFW)
+    create_questions(5, QnACategoryChoices.NSFW)
+
+    game_room = create_game_room(api_client, rounds=15)
+    assert game_room["rounds"] == 15
+    assert game_room["cur_round"] == 0
+    assert game_room["game_category"]["name"] == GameCategoryChoices.SFW
+
+    statement = (
+        select(GameRoomQuestionsLink)
+        .where(GameRoomQuestionsLink.game_room_id == game_room["id"])
+        .order_by(GameRoomQuestionsLink.position)  # type: ignore
+    )
+    deck = (await db_session.exec(statement)).all()
+    assert [link.position for link in deck] == list(range(1, 16))
+    assert len({link.question_id for link in deck}) == 15
+    assert {link.question_id for link in deck} <= set(question_ids)
+
+    # a mixed game is played with questions of both categories
+    game_room = create_game_room(api_client, 30, GameCategoryChoices.MIXED)
+    assert game_room["rounds"] == 25
+
+
+def test_create_without_questions(api_client: TestClient):
+    response = api_client.post(
+        PATH,
+        json={
+            "game_type_id": GameTypeFactory.create().id,
+            "game_category_id": GameCategoryFactory.create().id,
+        },
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST, response.text
+
+
+def test_next_round(api_client: TestClient, db_engine: AsyncEngine):
+    question_ids = create_questions(6, QnACategoryChoices.SFW)
+    game_room = create_game_room(api_client, rounds=6)
+    path = f"{PATH}{game_room['id']}"
+
+    response = api_client.get(f"{path}/round")
+    assert response.status_code == status.HTTP_404_NOT_FOUND, response.text
+
+    deck_reads = []
+
+    def collect_deck_read(
+        conn: Connection,
+        cursor: DBAPICursor,
+        statement: str,
+        parameters: object,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        if statement.startswith("SELECT") and "gameroomquestionslink" in statement:
+            deck_reads.append(statement)
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", collect_deck_read)
+    played = []
+    try:
+        for game_round in range(1, 7):
+            response = api_client.post(f"{path}/next-round")
+            assert response.status_code == status.HTTP_200_OK, response.text
+            response_data = response.json()
+            assert response_data["round"] == game_round
+            assert response_data["question"]["answers"] == []
+            played.append(response_data["question"]["id"])
+    finally:
+        event.remove(db_engine.sync_engine, "before_cursor_execute", collect_deck_read)
+
+    assert sorted(played) == question_ids
+    # the deck is read a few rounds at a time
+    assert len(deck_reads) == -(-6 // PREFETCH_ROUNDS)
+
+    response = api_client.get(f"{path}/round")
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json()["question"]["id"] == played[-1]
+
+    response = api_client.post(f"{path}/next-round")
+    assert response.status_code == status.HTTP_409_CONFLICT, response.text
+    response = api_client.get(path)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json()["cur_round"] == 6
+
+
+@pytest.mark.asyncio
+async def test_delete(api_client: TestClient, db_session: AsyncSession):
+    create_questions(3, QnACategoryChoices.SFW)
+    game_room = create_game_room(api_client, rounds=3)
+    response = api_client.post(f"{PATH}{game_room['id']}/next-round")
+    assert response.status_code == status.HTTP_200_OK, response.text
+
+    response = api_client.delete(f"{PATH}{game_room['id']}")
+    assert response.status_code == status.HTTP_204_NO_CONTENT, response.text
+    response = api_client.get(f"{PATH}{game_room['id']}")
+    assert response.status_code == status.HTTP_404_NOT_FOUND, response.text
+    statement = select(GameRoomQuestionsLink).where(
+        GameRoomQuestionsLink.game_room_id == game_room["id"]
+    )
+    assert (await db_session.exec(statement)).all() == []
+
+
+@pytest.mark.asyncio
+async def test_websocket(api_client: TestClient, db_session: AsyncSession):
+    create_questions(3, QnACategoryChoices.SFW)
+    game_room = create_game_room(api_client, rounds=3)
+    path = f"{PATH}{game_room['id']}"
+    player_ids = [PlayerFactory.create().id for _ in range(2)]
+
+    with (
+        pytest.raises(WebSocketDisconnect) as exc_info,
+        api_client.websocket_connect(f"{path}/ws?player_id=1000") as websocket,
+    ):
+        websocket.receive_json()
+    assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
+
+    with (
+        api_client.websocket_connect(f"{path}/ws?player_id={player_ids[0]}") as first,
+        api_client.websocket_connect(f"{path}/ws?player_id={player_ids[1]}") as second,
+    ):
+        state = first.receive_json()
+        assert state["type"] == "state"
+        assert state["cur_round"] == 0
+        assert state["round"] is None
+        assert first.receive_json()["player_ids"] == player_ids[:1]
+        assert first.receive_json()["player_ids"] == player_ids
+        assert second.receive_json()["player_ids"] == player_ids
+        assert second.receive_json()["type"] == "players"
+
+        first.send_json({"type": "next_round"})
+        for websocket in (first, second):
+            message = websocket.receive_json()
+            assert message["type"] == "round"
+            assert message["round"] == 1
+
+        # HTTP requests go through the hub while players are connected
+        response = api_client.post(f"{path}/next-round")
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert response.json()["round"] == 2
+        for websocket in (first, second):
+            # the round nobody played is closed first
+            assert websocket.receive_json()["type"] == "scores"
+            assert websocket.receive_json()["question"] == response.json()["question"]
+        response = api_client.get(f"{path}/round")
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert response.json()["round"] == 2
+
+        second.send_text("not json")
+        assert second.receive_json()["type"] == "error"
+
+        # rounds are written behind the game
+        statement = select(GameRoom.cur_round).where(GameRoom.id == game_room["id"])
+        assert (await db_session.exec(statement)).one() == 0
+
+    # the last player leaving writes the room, wait until it is done
+    api_client.portal.call(hub.flush)  # type: ignore
+    # a new read transaction, the last one still sees the old round
+    await db_session.rollback()
+    assert (await db_session.exec(statement)).one() == 2
+    assert hub.rooms == {}
+
+
+@pytest.mark.asyncio
+async def test_play(api_client: TestClient, db_session: AsyncSession):
+    game_type = GameTypeChoices.NEVER_HAVE_I_EVER
+    create_questions(2, QnACategoryChoices.SFW, game_type)
+    game_room = create_game_room(api_client, rounds=2, game_type=game_type)
+    path = f"{PATH}{game_room['id']}"
+    player_ids = [PlayerFactory.create().id for _ in range(2)]
+
+    with (
+        api_client.websocket_connect(f"{path}/ws?player_id={player_ids[0]}") as first,
+        api_client.websocket_connect(f"{path}/ws?player_id={player_ids[1]}") as second,
+    ):
+        for websocket, messages in ((first, 3), (second, 2)):
+            for _ in range(messages):
+                websocket.receive_json()
+
+        # nothing to play before the first round
+        first.send_json({"type": "play", "choice": True})
+        assert first.receive_json()["type"] == "error"
+
+        first.send_json({"type": "next_round"})
+        for game_round in (1, 2):
+            for websocket in (first, second):
+                message = websocket.receive_json()
+                assert message["type"] == "round"
+                assert message["round"] == game_round
+
+            first.send_json({"type": "play", "choice": True})
+            for websocket in (first, second):
+                message = websocket.receive_json()
+                assert message["type"] == "played"
+                assert message["player_id"] == player_ids[0]
+            first.send_json({"type": "play", "choice": False})
+            assert first.receive_json()["type"] == "error"
+            if game_round == 1:
+                # acknowledged plays are written by the next flush
+                plays = select(Play.round, Play.player_id, Play.choice)
+                assert (await db_session.exec(plays)).all() == []
+                assert api_client.portal.call(hub.flush) == 1  # type: ignore
+                await db_session.rollback()
+                assert (await db_session.exec(plays)).all() == [(1, player_ids[0], 1)]
+
+            second.send_json({"type": "play", "choice": game_round == 2})
+            for websocket in (first, second):
+                assert websocket.receive_json()["type"] == "played"
+                message = websocket.receive_json()
+                assert message["type"] == "scores"
+                assert message["round"] == game_round
+            assert message["game_over"] == (game_round == 2)
+            if game_round == 1:
+                assert message["points"] == {str(player_ids[0]): 1}
+                first.send_json({"type": "next_round"})
+
+        assert message["scores"] == {str(player_ids[0]): 2, str(player_ids[1]): 1}
+        # the scores are written by the time the next message is handled
+        second.send_text("not json")
+        assert second.receive_json()["type"] == "error"
+
+        response = api_client.get(
+            "/api/rankings/top",
+            params={"game_room_id": game_room["id"]},
+        )
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert [rank["score"] for rank in response.json()] == [2, 1]
+
+    await db_session.rollback()
+    statement = select(PlayerScore.player_id, PlayerScore.score).order_by(
+        PlayerScore.player_id  # type: ignore
+    )
+    assert (await db_session.exec(statement)).all() == [
+        (player_ids[0], 2),
+        (player_ids[1], 1),
+    ]
+    # the rest of the plays are written with the scores of their round
+    assert sorted((await db_session.exec(plays)).all()) == [
+        (1, player_ids[0], 1),
+        (1, player_ids[1], 0),
+        (2, player_ids[0], 1),
+        (2, player_ids[1], 1),
+    ]
+    # the game counts for every player, the best one won it
+    statement = select(Player.games_played, Player.games_won).order_by(Player.id)  # type: ignore
+    assert (await db_session.exec(statement)).all()[-2:] == [(1, 1), (1, 0)]
+    response = api_client.get(f"/api/rankings/players/{player_ids[0]}")
+    assert response.json()["rank"] == 1
+    response = api_client.get(
+        f"/api/rankings/players/{player_ids[1]}",
+        params={"game_room_id": game_room["id"]},
+    )
+    assert response.json()["rank"] == 2
+
+
+@pytest.mark.asyncio
+async def test_plays_without_points_are_saved(
+    api_client: TestClient,
+    db_session: AsyncSession,
+):
+    game_type = GameTypeChoices.NEVER_HAVE_I_EVER
+    create_questions(1, QnACategoryChoices.SFW, game_type)
+    game_room = create_game_room(api_client, rounds=1, game_type=game_type)
+    path = f"{PATH}{game_room['id']}"
+    player_ids = [PlayerFactory.create().id for _ in range(2)]
+
+    with api_client.websocket_connect(f"{path}/ws?player_id={player_ids[1]}") as second:
+        with api_client.websocket_connect(
+            f"{path}/ws?player_id={player_ids[0]}"
+        ) as first:
+            first.send_json({"type": "next_round"})
+            while first.receive_json()["type"] != "round":
+                pass
+            first.send_json({"type": "play", "choice": False})
+            while first.receive_json()["type"] != "played":
+                pass
+        while second.receive_json().get("player_ids") != [player_ids[1]]:
+            pass
+    # the round closed without points once nobody was left to play
+
+    api_client.portal.call(hub.flush)  # type: ignore
+    plays = select(Play.round, Play.player_id, Play.choice)
+    assert (await db_session.exec(plays)).all() == [(1, player_ids[0], 0)]
+
+
+class SlowWebSocket:
+    def __init__(self, blocked: bool) -> None:
+        self.blocked = blocked
+        self.sent: list[str] = []
+        self.close_code: int | None = None
+
+    async def send_text(self, message: str) -> None:
+        if self.blocked:
+            await asyncio.Event().wait()
+        self.sent.append(message)
+
+    async def close(self, code: int, reason: str) -> None:
+        self.close_code = code
+
+
+@pytest.mark.asyncio
+async def test_slow_connection():
+    game_room_hub = GameRoomHub()
+    room = RoomState(GameRoom(id=1, rounds=1, cur_round=0), None)
+    game_room_hub.rooms[1] = room
+    slow, fast = SlowWebSocket(blocked=True), SlowWebSocket(blocked=False)
+    await game_room_hub.join(room, 1, slow)  # type: ignore
+    await game_room_hub.join(room, 2, fast)  # type: ignore
+
+    for i in range(settings.GAME_ROOM_SEND_QUEUE_SIZE + 1):
+        game_room_hub.broadcast(room, f"message {i}")
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert list(room.connections) == [2]
+    assert slow.close_code == status.WS_1013_TRY_AGAIN_LATER
+    assert fast.sent[-1] == f"message {settings.GAME_ROOM_SEND_QUEUE_SIZE}"
+    await game_room_hub.close_all()
@@ -1,5 +1,7 @@
+import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from domuwa.models.game_type import GameType, GameTypeChoices
 from domuwa.services.game_type_services import GameTypeServices
@@ -95,3 +97,35 @@ class TestGameType(CommonTestCase[GameType]):
             f"{self.path}{game_type1.id}", json={"name": game_type2.name}
         )
         assert response.status_code == status.HTTP_400_BAD_REQUEST, response.text
+
+    def test_cache(self, api_client: TestClient):
+        response = api_client.post(self.path, json={"name": GameTypeChoices.EGO})
+        assert response.status_code == status.HTTP_201_CREATED, response.text
+        game_type_id = response.json()["id"]
+        assert self.services.cache.get_name(game_type_id) == GameTypeChoices.EGO
+        assert self.services.cache.get_id(GameTypeChoices.EGO) == game_type_id
+
+        response = api_client.patch(
+            f"{self.path}{game_type_id}",
+            json={"name": GameTypeChoices.NEVER_HAVE_I_EVER},
+        )
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert (
+            self.services.cache.get_name(game_type_id)
+            == GameTypeChoices.NEVER_HAVE_I_EVER
+        )
+        assert self.services.cache.get_id(GameTypeChoices.EGO) is None
+
+        response = api_client.delete(f"{self.path}{game_type_id}")
+        assert response.status_code == status.HTTP_204_NO_CONTENT, response.text
+        assert self.services.cache.get_name(game_type_id) is None
+
+    @pytest.mark.asyncio
+    async def test_cache_read_through(self, db_session: AsyncSession):
+        game_type = GameTypeFactory.create(name=GameTypeChoices.EGO)
+        assert self.services.cache.get_name(game_type.id) is None
+
+        name = await self.services.get_name(game_type.id, db_session)
+        assert name == GameTypeChoices.EGO
+        assert self.services.cache.get_name(game_type.id) == GameTypeChoices.EGO
+        assert await self.services.get_id(name, db_session) == game_type.id
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from domuwa.auth import hasher, pwd_context
+from domuwa.auth.hashing import HashingBusyError, PasswordHasher
+from domuwa.auth.models import UserDb
+
+
+@pytest.mark.asyncio
+async def test_queue_limit():
+    hasher = PasswordHasher(pwd_context, workers=1, queue_size=1)
+    release = threading.Event()
+    try:
+        jobs = [asyncio.ensure_future(hasher.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert hasher.pending == 2
+        with pytest.raises(HashingBusyError):
+            await hasher.run(release.wait)
+
+        # the event loop keeps running while the jobs wait for their thread
+        await asyncio.sleep(0.01)
+        assert not any(job.done() for job in jobs)
+
+        release.set()
+        assert await asyncio.gather(*jobs) == [True, True]
+        await asyncio.sleep(0)
+        assert hasher.pending == 0
+        assert await hasher.run(sum, [1, 2]) == 3
+    finally:
+        release.set()
+        hasher.shutdown()
+
+
+def test_login_when_busy(
+    api_client: TestClient,
+    sync_db_session: Session,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    sync_db_session.add(UserDb(login="user", hashed_password="hash"))
+    sync_db_session.commit()
+
+    response = api_client.post(
+        "/api/auth/login", data={"username": "unknown", "password": "password"}
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED, response.text
+
+    monkeypatch.setattr(hasher, "max_pending", 0)
+    response = api_client.post(
+        "/api/auth/login", data={"username": "user", "password": "password"}
+    )
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE, response.text
+    assert response.headers["Retry-After"] == "1"
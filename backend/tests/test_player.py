@@ -68,3 +68,10 @@ class TestPlayer(CommonTestCase[Player]):
             f"{self.path}{player1.id}", json={"name": player2.name}
         )
         assert response.status_code == status.HTTP_400_BAD_REQUEST, response.text
+
+    def test_get_all_unsupported_filter(self, api_client: TestClient):
+        response = api_client.get(self.path, params={"game_type_id": 1})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, response.text
+        # players have no versions
+        response = api_client.get(self.path, params={"include_superseded": True})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, response.text
@@ -0,0 +1,113 @@
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import Any
+
+import pytest
+from sqlalchemy import Connection, event
+from sqlalchemy.engine.interfaces import DBAPICursor, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.models.answer import AnswerUpdate
+from domuwa.models.question import QuestionUpdate
+from domuwa.services import changes_services
+from domuwa.services.answers_services import AnswerServices
+from domuwa.services.archive_services import ArchiveServices
+from domuwa.services.changes_services import ChangeServices
+from domuwa.services.common_services import BulkSelection, GetAllFilters
+from domuwa.services.questions_services import QuestionServices
+from tests.factories import (
+    AnswerFactory,
+    GameTypeFactory,
+    PlayerFactory,
+    QnACategoryFactory,
+    QuestionFactory,
+)
+
+
+def create_questions_with_answers(count: int) -> dict[str, int]:
+    ids = {
+        "author_id": PlayerFactory.create().id,
+        "game_type_id": GameTypeFactory.create().id,
+        "game_category_id": QnACategoryFactory.create().id,
+    }
+    for _ in range(count):
+        question = QuestionFactory.create(**ids)
+        for _ in range(3):
+            AnswerFactory.create(question_id=question.id, **ids)
+    return ids
+
+
+async def run_hot_queries(session: AsyncSession, ids: dict[str, int]) -> None:
+    question_services = QuestionServices()
+    answer_services = AnswerServices()
+    playable = GetAllFilters(
+        game_type_id=ids["game_type_id"],
+        game_category_id=ids["game_category_id"],
+        excluded=False,
+    )
+    await question_services.get_all(session, playable, limit=10)
+    await answer_services.get_all(session, playable, limit=10)
+    await question_services.get_all(session, after_id=1, limit=10)
+
+    question = await question_services.get_by_id(1, session)
+    question = await question_services.update(
+        question,  # type: ignore
+        QuestionUpdate(text="edited question"),
+        session,
+    )
+    await question_services.get_latest(1, session)
+    await question_services.get_history(1, session)
+    answer = await answer_services.get_by_id(question.answers[0].id, session)  # type: ignore
+    await answer_services.update(answer, AnswerUpdate(text="edited answer"), session)  # type: ignore
+
+    await question_services.exclude_many(BulkSelection(ids=[2, 3]), session)
+    await question_services.delete(question, session)  # type: ignore
+    await answer_services.delete_many(BulkSelection(ids=[5, 6]), session)
+
+    await ChangeServices().get_since(0, 100, session)
+    await changes_services.get_latest_seqs(question_services.read_tables, session)
+    await ArchiveServices().archive(datetime.now() + timedelta(days=1), session)
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_do_not_scan_tables(
+    db_engine: AsyncEngine,
+    db_session: AsyncSession,
+):
+    ids = create_questions_with_answers(5)
+    statements: list[tuple[str, Sequence[Any]]] = []
+
+    def collect_statement(
+        conn: Connection,
+        cursor: DBAPICursor,
+        statement: str,
+        parameters: Sequence[Any],
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        if not executemany and not statement.startswith("PRAGMA"):
+            statements.append((statement, parameters))
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", collect_statement)
+    try:
+        await run_hot_queries(db_session, ids)
+    finally:
+        event.remove(db_engine.sync_engine, "before_cursor_execute", collect_statement)
+    assert statements
+
+    tables = SQLModel.metadata.tables.keys()
+    scans = []
+    connection = await db_session.connection()
+    for statement, parameters in statements:
+        plan = await connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}",
+            parameters,
+        )
+        for *_, detail in plan:
+            # SCAN <table> without an index reads every row
+            words = detail.split()
+            if words[0] == "SCAN" and words[1] in tables and "INDEX" not in words:
+                scans.append(f"{detail}: {statement}")
+    assert scans == []
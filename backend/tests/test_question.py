@@ -1,9 +1,15 @@
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from domuwa.models.answer import Answer
 from domuwa.models.question import Question
+from domuwa.routers.common_router import NEXT_CURSOR_HEADER
+from domuwa.routers.questions_router import QuestionRouter
 from domuwa.services.questions_services import QuestionServices
 from tests.common_tc import CommonTestCase
 from tests.factories import (
@@ -40,7 +46,9 @@ class TestQuestion(CommonTestCase[Question]):
         assert response_data["game_type"]["id"] == model.game_type.id  # type: ignore
         assert response_data["game_category"]["id"] == model.game_category.id  # type: ignore
 
-    async def assert_valid_delete(self, model_id: int, db_session: Session) -> None:
+    async def assert_valid_delete(
+        self, model_id: int, db_session: AsyncSession
+    ) -> None:
         question = await self.services.get_by_id(model_id, db_session)
         assert question is not None
         assert question.deleted
@@ -110,7 +118,7 @@ class TestQuestion(CommonTestCase[Question]):
     async def test_delete_with_answers(
         self,
         api_client: TestClient,
-        db_session: Session,
+        db_session: AsyncSession,
     ):
         model = self.create_model()
         model_id = model.id
@@ -125,3 +133,344 @@ class TestQuestion(CommonTestCase[Question]):
         assert response.status_code == status.HTTP_404_NOT_FOUND, response.text
 
         await self.assert_valid_delete(model_id, db_session)
+
+    def test_get_all_hides_deleted(self, api_client: TestClient):
+        question = self.create_model()
+        deleted_question = self.create_model()
+
+        response = api_client.delete(f"{self.path}{deleted_question.id}")
+        assert response.status_code == status.HTTP_204_NO_CONTENT, response.text
+
+        response = api_client.get(self.path)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert [q["id"] for q in response.json()] == [question.id], response.json()
+
+        response = api_client.get(self.path, params={"deleted": True})
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert [q["id"] for q in response.json()] == [deleted_question.id]
+
+    def test_get_all_hides_superseded(self, api_client: TestClient):
+        question = self.create_model()
+        response = api_client.patch(f"{self.path}{question.id}", json={"text": "edit"})
+        assert response.status_code == status.HTTP_200_OK, response.text
+        latest_id = response.json()["id"]
+
+        response = api_client.get(self.path)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert [q["id"] for q in response.json()] == [latest_id], response.json()
+
+        response = api_client.get(self.path, params={"include_superseded": True})
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert [q["id"] for q in response.json()] == [question.id, latest_id]
+
+    def test_get_all_fast_lists(self, api_client: TestClient):
+        question = self.create_model()
+        AnswerFactory.create(
+            question_id=question.id,
+            author_id=question.author_id,
+            game_type_id=question.game_type_id,
+            game_category_id=question.game_category_id,
+        )
+        self.create_model()
+
+        assert QuestionRouter.fast_lists
+        responses = {}
+        try:
+            for fast_lists in (True, False):
+                QuestionRouter.fast_lists = fast_lists
+                responses[fast_lists] = api_client.get(self.path, params={"limit": 1})
+        finally:
+            QuestionRouter.fast_lists = True
+
+        fast, plain = responses[True], responses[False]
+        assert fast.status_code == status.HTTP_200_OK, fast.text
+        assert fast.content == plain.content
+        assert len(fast.json()[0]["answers"]) == 1, fast.json()
+        for header in ("Content-Type", "ETag", "Last-Modified", NEXT_CURSOR_HEADER):
+            assert fast.headers[header] == plain.headers[header], header
+
+    def test_get_all_filtered(self, api_client: TestClient):
+        question = self.create_model()
+        self.create_model()
+
+        response = api_client.get(self.path, params={"author_id": question.author_id})
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert [q["id"] for q in response.json()] == [question.id], response.json()
+
+        response = api_client.get(
+            self.path,
+            params={"game_type_id": question.game_type_id, "excluded": True},
+        )
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert response.json() == [], response.json()
+
+    @pytest.mark.asyncio
+    async def test_get_all_query_count(
+        self,
+        db_engine: AsyncEngine,
+        db_session: AsyncSession,
+    ):
+        statements: list[tuple] = []
+
+        def count_statement(*args: object) -> None:
+            statements.append(args)
+
+        async def count_get_all_statements():
+            statements.clear()
+            event.listen(db_engine.sync_engine, "after_execute", count_statement)
+            try:
+                questions = await self.services.get_all(db_session)
+            finally:
+                event.remove(db_engine.sync_engine, "after_execute", count_statement)
+            return len(questions), len(statements)
+
+        def create_question_with_answers():
+            question = self.create_model()
+            for _ in range(3):
+                AnswerFactory.create(
+                    question_id=question.id,
+                    author_id=PlayerFactory.create().id,
+                    game_type_id=question.game_type_id,
+                    game_category_id=question.game_category_id,
+                )
+
+        create_question_with_answers()
+        # first call fills the lookup tables cache
+        await self.services.get_all(db_session)
+        question_count, statement_count = await count_get_all_statements()
+        assert question_count == 1
+
+        for _ in range(4):
+            create_question_with_answers()
+        question_count, more_statement_count = await count_get_all_statements()
+        assert question_count == 5
+        assert more_statement_count == statement_count
+
+    @pytest.mark.asyncio
+    async def test_create_bulk(self, api_client: TestClient, db_session: AsyncSession):
+        author = PlayerFactory.create()
+        ids = {
+            "author_id": author.id,
+            "game_type_id": GameTypeFactory.create().id,
+            "game_category_id": QnACategoryFactory.create().id,
+        }
+        payload = [
+            {"text": "first question", **ids},
+            {
+                "text": "second question",
+                **ids,
+                "answers": [
+                    {"text": "first answer", **ids},
+                    {"text": "second answer", **ids},
+                ],
+            },
+            {"text": "missing author", **ids, "author_id": author.id + 100},
+            {
+                "text": "answer with missing author",
+                **ids,
+                "answers": [{"text": "answer", **ids, "author_id": author.id + 100}],
+            },
+        ]
+
+        response = api_client.post(f"{self.path}bulk", json=payload)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        results = response.json()
+        assert len(results) == len(payload), results
+
+        first, second, missing_author, missing_answer_author = results
+        assert first["error"] is None, first
+        assert first["answer_ids"] == [], first
+        assert second["error"] is None, second
+        assert len(second["answer_ids"]) == 2, second
+        assert first["id"] < second["id"], results
+        for result in (missing_author, missing_answer_author):
+            assert result["id"] is None, result
+            assert result["error"] == f"author_id={author.id + 100} does not exist"
+
+        question = await self.services.get_by_id(second["id"], db_session)
+        assert question is not None
+        assert [answer.id for answer in question.answers] == second["answer_ids"]
+        assert [answer.text for answer in question.answers] == [
+            "first answer",
+            "second answer",
+        ]
+        assert len(await self.services.get_all(db_session)) == 2
+
+    def test_not_modified_follows_related_tables(self, api_client: TestClient):
+        question = self.create_model()
+        path = f"{self.path}{question.id}"
+        etag = api_client.get(path).headers["ETag"]
+
+        response = api_client.patch(
+            f"/api/players/{question.author_id}",
+            json={"name": "renamed author"},
+        )
+        assert response.status_code == status.HTTP_200_OK, response.text
+
+        response = api_client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert response.json()["author"]["name"] == "renamed author"
+
+    @pytest.mark.asyncio
+    async def test_history(self, api_client: TestClient, db_session: AsyncSession):
+        model = self.create_model()
+        assert model.id is not None
+        ids = [model.id]
+        for text in ("second version", "third version"):
+            response = api_client.patch(f"{self.path}{ids[-1]}", json={"text": text})
+            assert response.status_code == status.HTTP_200_OK, response.text
+            ids.append(response.json()["id"])
+
+        for model_id in ids:
+            response = api_client.get(f"{self.path}{model_id}/history")
+            assert response.status_code == status.HTTP_200_OK, response.text
+            assert [q["id"] for q in response.json()] == ids[::-1]
+
+            response = api_client.get(f"{self.path}{model_id}/latest")
+            assert response.status_code == status.HTTP_200_OK, response.text
+            assert response.json()["text"] == "third version"
+
+        for model_id in ids:
+            question = await self.services.get_by_id(model_id, db_session)
+            assert question is not None
+            assert question.head_id == (None if model_id == ids[-1] else ids[-1])
+
+        response = api_client.get(f"{self.path}{ids[-1] + 1}/history")
+        assert response.status_code == status.HTTP_404_NOT_FOUND, response.text
+
+    def test_update_superseded(self, api_client: TestClient):
+        question = self.create_model()
+        response = api_client.patch(f"{self.path}{question.id}", json={"text": "edit"})
+        assert response.status_code == status.HTTP_200_OK, response.text
+        latest_id = response.json()["id"]
+
+        response = api_client.patch(
+            f"{self.path}{question.id}", json={"text": "stale edit"}
+        )
+        assert response.status_code == status.HTTP_409_CONFLICT, response.text
+
+        response = api_client.get(f"{self.path}{latest_id}/history")
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert [q["id"] for q in response.json()] == [latest_id, question.id]
+
+    @pytest.mark.asyncio
+    async def test_update_keeps_answers(
+        self,
+        api_client: TestClient,
+        db_session: AsyncSession,
+    ):
+        question = self.create_model()
+        answer_ids = [
+            AnswerFactory.create(
+                question_id=question.id,
+                author_id=question.author_id,
+                game_type_id=question.game_type_id,
+                game_category_id=question.game_category_id,
+            ).id
+            for _ in range(2)
+        ]
+        seq = api_client.get("/api/changes/").json()["seq"]
+
+        latest_id = question.id
+        for text in ("edit", "second edit"):
+            response = api_client.patch(f"{self.path}{latest_id}", json={"text": text})
+            assert response.status_code == status.HTTP_200_OK, response.text
+            latest_id = response.json()["id"]
+            assert [a["id"] for a in response.json()["answers"]] == answer_ids
+
+        # no answer row was written
+        changes = api_client.get("/api/changes/", params={"since": seq}).json()
+        assert {c["table_name"] for c in changes["upserted"]} == {"question"}
+        statement = select(Answer.question_id).order_by(col(Answer.id))
+        assert (await db_session.exec(statement)).all() == [question.id] * 2
+
+        response = api_client.patch(
+            f"/api/answers/{answer_ids[0]}", json={"text": "edited answer"}
+        )
+        assert response.status_code == status.HTTP_200_OK, response.text
+        new_answer_id = response.json()["id"]
+        response = api_client.get(f"{self.path}{latest_id}")
+        assert [a["id"] for a in response.json()["answers"]] == [
+            answer_ids[1],
+            new_answer_id,
+        ]
+
+        # superseded versions of the answers go with the question too
+        response = api_client.delete(f"{self.path}{latest_id}")
+        assert response.status_code == status.HTTP_204_NO_CONTENT, response.text
+        statement = (
+            select(Answer.id).where(col(Answer.deleted)).order_by(col(Answer.id))
+        )
+        assert (await db_session.exec(statement)).all() == [
+            *answer_ids,
+            new_answer_id,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_bulk_delete(
+        self,
+        api_client: TestClient,
+        db_engine: AsyncEngine,
+        db_session: AsyncSession,
+    ):
+        questions = [self.create_model() for _ in range(3)]
+        answer_ids = [
+            AnswerFactory.create(
+                question_id=question.id,
+                author_id=question.author_id,
+                game_type_id=question.game_type_id,
+                game_category_id=question.game_category_id,
+            ).id
+            for question in questions
+        ]
+        selection = {"author_id": questions[0].author_id}
+
+        statements: list[tuple] = []
+
+        def count_statement(*args: object) -> None:
+            statements.append(args)
+
+        event.listen(db_engine.sync_engine, "after_execute", count_statement)
+        try:
+            response = api_client.post(f"{self.path}bulk-delete", json=selection)
+        finally:
+            event.remove(db_engine.sync_engine, "after_execute", count_statement)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert response.json() == {"count": 1}
+        # an UPDATE and a change log INSERT per table
+        assert len(statements) == 4
+
+        response = api_client.post(f"{self.path}bulk-delete", json=selection)
+        assert response.json() == {"count": 0}
+
+        remaining = await self.services.get_all(db_session)
+        assert [question.id for question in remaining] == [
+            question.id for question in questions[1:]
+        ]
+        changes = api_client.get("/api/changes/").json()["deleted"]
+        assert [(c["table_name"], c["row_id"]) for c in changes] == [
+            ("answer", answer_ids[0]),
+            ("question", questions[0].id),
+        ]
+
+    def test_bulk_exclude(self, api_client: TestClient):
+        questions = [self.create_model() for _ in range(3)]
+        selection = {
+            "ids": [question.id for question in questions[:2]],
+            "author_id": questions[1].author_id,
+        }
+
+        response = api_client.post(f"{self.path}bulk-exclude", json=selection)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert response.json() == {"count": 1}
+
+        response = api_client.get(self.path, params={"excluded": True})
+        assert [question["id"] for question in response.json()] == [questions[1].id]
+
+    def test_bulk_update_empty_selection(self, api_client: TestClient):
+        self.create_model()
+        for action in ("bulk-exclude", "bulk-delete"):
+            response = api_client.post(f"{self.path}{action}", json={})
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        response = api_client.get(self.path, params={"excluded": False})
+        assert len(response.json()) == 1
@@ -0,0 +1,81 @@
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.models.links import GameRoomQuestionsLink
+from domuwa.services.question_draw_services import QuestionDrawServices, QuestionPool
+from tests.factories import GameTypeFactory, PlayerFactory, QnACategoryFactory
+
+
+def test_pool_draw():
+    pool = QuestionPool(range(1, 101))
+    drawn = pool.draw(10, exclude={1, 2, 3})
+    assert len(drawn) == len(set(drawn)) == 10
+    assert not {1, 2, 3} & set(drawn)
+
+    for question_id in range(1, 91):
+        pool.remove(question_id)
+    assert len(pool) == 10
+    assert sorted(pool.draw(20)) == list(range(91, 101))
+    assert sorted(pool.draw(20, exclude={100})) == list(range(91, 100))
+
+    pool.add(5)
+    pool.add(150)
+    assert 5 in pool
+    assert 150 in pool
+    assert 1 not in pool
+    assert len(pool.draw(12)) == 12
+
+
+@pytest.mark.asyncio
+async def test_draw(api_client: TestClient, db_session: AsyncSession):
+    ids = {
+        "author_id": PlayerFactory.create().id,
+        "game_type_id": GameTypeFactory.create().id,
+        "game_category_id": QnACategoryFactory.create().id,
+    }
+    payload = [{"text": f"question {i}", **ids} for i in range(4)]
+    payload.append({"text": "excluded question", **ids, "excluded": True})
+    response = api_client.post("/api/questions/bulk", json=payload)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    question_ids = [result["id"] for result in response.json()]
+
+    services = QuestionDrawServices()
+    key = (ids["game_type_id"], ids["game_category_id"])
+    drawn = await services.draw(*key, 10, db_session)
+    assert sorted(drawn) == question_ids[:4]
+    other_category = await services.draw(
+        ids["game_type_id"],
+        ids["game_category_id"] + 1,
+        10,
+        db_session,
+    )
+    assert other_category == []
+
+    # writes after the pool is loaded keep it up to date
+    response = api_client.patch(
+        f"/api/questions/{question_ids[0]}", json={"text": "edit"}
+    )
+    assert response.status_code == status.HTTP_200_OK, response.text
+    edited_id = response.json()["id"]
+    response = api_client.delete(f"/api/questions/{question_ids[1]}")
+    assert response.status_code == status.HTTP_204_NO_CONTENT, response.text
+    response = api_client.post(
+        "/api/questions/bulk-exclude",
+        json={"ids": [question_ids[2]]},
+    )
+    assert response.status_code == status.HTTP_200_OK, response.text
+    response = api_client.post("/api/questions/", json={"text": "new question", **ids})
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    new_id = response.json()["id"]
+
+    drawn = await services.draw(*key, 10, db_session)
+    assert sorted(drawn) == [question_ids[3], edited_id, new_id]
+
+    db_session.add(
+        GameRoomQuestionsLink(game_room_id=1, question_id=edited_id, position=1)
+    )
+    await db_session.commit()
+    drawn = await services.draw(*key, 10, db_session, game_room_id=1)
+    assert sorted(drawn) == [question_ids[3], new_id]
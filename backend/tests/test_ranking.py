@@ -0,0 +1,73 @@
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from domuwa.services.leaderboards import Leaderboard
+from tests.factories import PlayerFactory
+
+PATH = "/api/rankings/"
+
+
+def test_leaderboard():
+    leaderboard = Leaderboard({1: 3, 2: 5, 3: 3})
+    assert leaderboard.top(10) == [(2, 5), (1, 3), (3, 3)]
+    assert [leaderboard.rank(player_id) for player_id in (1, 2, 3)] == [2, 1, 2]
+    assert leaderboard.rank(4) is None
+    assert leaderboard.rank_of(0) == 4
+
+    assert leaderboard.add(4) == 0
+    assert leaderboard.add(3, 40) == 43
+    leaderboard.discard(2)
+    assert leaderboard.top(2) == [(3, 43), (1, 3)]
+    assert leaderboard.rank(4) == 3
+    assert len(leaderboard) == 3
+
+    with pytest.raises(ValueError, match="cannot be negative"):
+        leaderboard.set(1, -1)
+
+
+def test_top(api_client: TestClient):
+    players = [
+        PlayerFactory.create(games_played=5, games_won=games_won)
+        for games_won in (1, 4, 2, 4)
+    ]
+    PlayerFactory.create()
+
+    response = api_client.get(f"{PATH}top", params={"k": 3})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert [
+        (rank["player_id"], rank["rank"], rank["score"]) for rank in response.json()
+    ] == [
+        (players[1].id, 1, 4),
+        (players[3].id, 1, 4),
+        (players[2].id, 3, 2),
+    ]
+    assert response.json()[0]["name"] == players[1].name
+
+    response = api_client.get(f"{PATH}top", params={"k": 0})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY, response.text
+    response = api_client.get(f"{PATH}top", params={"game_room_id": 1000})
+    assert response.status_code == status.HTTP_404_NOT_FOUND, response.text
+
+
+def test_rank(api_client: TestClient):
+    players = [
+        PlayerFactory.create(games_played=3, games_won=games_won)
+        for games_won in (2, 3)
+    ]
+    newcomer = PlayerFactory.create()
+
+    for player, rank in ((players[0], 2), (players[1], 1), (newcomer, 3)):
+        response = api_client.get(f"{PATH}players/{player.id}")
+        assert response.status_code == status.HTTP_200_OK, response.text
+        assert response.json()["rank"] == rank
+        assert response.json()["score"] == player.games_won
+
+    # deleted players drop off the leaderboard
+    response = api_client.delete(f"/api/players/{players[1].id}")
+    assert response.status_code == status.HTTP_204_NO_CONTENT, response.text
+    response = api_client.get(f"{PATH}players/{players[0].id}")
+    assert response.json()["rank"] == 1
+
+    response = api_client.get(f"{PATH}players/1000")
+    assert response.status_code == status.HTTP_404_NOT_FOUND, response.text
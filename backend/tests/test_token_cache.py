@@ -0,0 +1,122 @@
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import Connection, event
+from sqlalchemy.engine.interfaces import DBAPICursor, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.auth import create_access_token, get_current_user
+from domuwa.auth.models import User, UserDb
+from domuwa.auth.token_cache import TokenCache, token_cache
+
+
+def test_token_cache() -> None:
+    cache = TokenCache(maxsize=2, ttl=60)
+    users = [User(login=f"user{i}") for i in range(3)]
+    cache.put("a", {"sub": "user0"}, users[0])
+    cache.put("b", {"sub": "user1", "exp": time.time() - 1}, users[1])
+    assert cache.get("a").user == users[0]  # type: ignore
+    # expired with its token
+    assert cache.get("b") is None
+
+    cache.put("b", {"sub": "user1"}, users[1])
+    cache.get("a")
+    cache.put("c", {"sub": "user2"}, users[2])
+    # the least recently used entry is dropped
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    cache.invalidate_user("user0")
+    assert cache.get("a") is None
+    assert cache.stats() == {"size": 1, "hits": 3, "misses": 3}
+
+
+@pytest.mark.asyncio
+async def test_get_current_user(
+    db_session: AsyncSession,
+    db_engine: AsyncEngine,
+) -> None:
+    token_cache.clear()
+    user_db = UserDb(login="user", hashed_password="hash", is_active=True)
+    db_session.add(user_db)
+    await db_session.commit()
+    token = create_access_token({"sub": "user"}, timedelta(minutes=5))
+
+    statements: list[str] = []
+
+    def count_statement(
+        conn: Connection,
+        cursor: DBAPICursor,
+        statement: str,
+        parameters: object,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        statements.append(statement)
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        user = await get_current_user(token, db_session)
+        assert await get_current_user(token, db_session) is user
+    finally:
+        event.remove(db_engine.sync_engine, "before_cursor_execute", count_statement)
+    assert len(statements) == 1
+    assert user.is_active
+
+    # deactivating the user drops the cached token
+    user_db.is_active = False
+    await db_session.commit()
+    assert not (await get_current_user(token, db_session)).is_active
+    assert token_cache.stats() == {"size": 1, "hits": 1, "misses": 2}
+    token_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_invalidate_after_commit(db_session: AsyncSession) -> None:
+    token_cache.clear()
+    user_db = UserDb(login="user", hashed_password="hash", is_active=True)
+    db_session.add(user_db)
+    await db_session.commit()
+
+    user_db.is_active = False
+    await db_session.flush()
+    # cached by another request, before the change is committed
+    token_cache.put("token", {"sub": "user"}, User(login="user", is_active=True))
+    await db_session.commit()
+    assert token_cache.get("token") is None
+
+    # nothing is left to drop once a change is rolled back
+    user_db.is_active = True
+    await db_session.flush()
+    token_cache.put("token", {"sub": "user"}, User(login="user", is_active=False))
+    await db_session.rollback()
+    await db_session.commit()
+    assert token_cache.get("token") is not None
+    token_cache.clear()
+
+
+def test_read_token_cache_stats(
+    api_client: TestClient,
+    sync_db_session: Session,
+) -> None:
+    token_cache.clear()
+    sync_db_session.add(UserDb(login="user", hashed_password="hash", is_active=True))
+    sync_db_session.commit()
+    token = create_access_token({"sub": "user"}, timedelta(minutes=5))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = api_client.get("/api/auth/token-cache", headers=headers)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json() == {"size": 1, "hits": 0, "misses": 1}
+
+    response = api_client.get("/api/auth/token-cache", headers=headers)
+    assert response.json() == {"size": 1, "hits": 1, "misses": 1}
+
+    response = api_client.get("/api/auth/token-cache")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED, response.text
+    token_cache.clear()
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pytest
+from main import app
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from domuwa.warmup import get_common_routers, openapi_cache_path, warm_up
+from tests.factories import (
+    GameTypeFactory,
+    PlayerFactory,
+    QnACategoryFactory,
+    QuestionFactory,
+)
+
+
+@pytest.mark.asyncio
+async def test_warm_up(
+    db_engine: AsyncEngine,
+    db_session_maker: async_sessionmaker[AsyncSession],
+    tmp_path: Path,
+):
+    QuestionFactory.create(
+        author_id=PlayerFactory.create().id,
+        game_type_id=GameTypeFactory.create().id,
+        game_category_id=QnACategoryFactory.create().id,
+    )
+    app.openapi_schema = None
+    try:
+        timings = await warm_up(app, db_engine, db_session_maker, str(tmp_path))
+        assert timings["total"] >= timings["routers"]
+        schema = app.openapi_schema
+        assert schema is not None
+        path = openapi_cache_path(app, tmp_path)
+        assert path.exists()
+        assert all("list_adapter" in vars(router) for router in get_common_routers(app))
+
+        # the next start reads the schema instead of building it
+        app.openapi_schema = None
+        path.write_text('{"openapi": "cached"}')
+        await warm_up(app, db_engine, db_session_maker, str(tmp_path))
+        assert app.openapi_schema == {"openapi": "cached"}
+
+        # and builds it again when the file is broken
+        app.openapi_schema = None
+        path.write_text("{")
+        await warm_up(app, db_engine, db_session_maker, str(tmp_path))
+        assert app.openapi_schema == schema
+    finally:
+        app.openapi_schema = None